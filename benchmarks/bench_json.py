@@ -0,0 +1,109 @@
+"""
+Serialization time per 1,000 projects.
+
+Builds public project dicts with ProjectRecord.to_api from synthetic rows (three
+languages of ~4 KB HTML descriptions, tags, srcsets) and times:
+  - fastapi default: jsonable_encoder walk + JSONResponse.render (stdlib json);
+  - stdlib json only (what encode_json does without orjson);
+  - encode_json (orjson).
+No database needed.
+
+    python benchmarks/bench_json.py --projects 1000 --repeat 20
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from dt_backend.http_cache import encode_json  # noqa: E402
+from dt_backend.records import ProjectRecord  # noqa: E402
+
+DESCRIPTION = {
+    "ru": "<p>Проект студентов: <b>машинное обучение</b> и анализ данных. " * 60 + "</p>",
+    "kz": "<p>Студенттердің жобасы: <i>машиналық оқыту</i> және деректер. " * 60 + "</p>",
+    "en": "<p>Student project: <b>machine learning</b> and data analysis &amp; more. " * 60 + "</p>",
+}
+
+
+def _rows(n: int) -> list:
+    rows = []
+    for i in range(n):
+        image = f"/static/uploads/ab/cd/{i:064x}.png"
+        rows.append(
+            {
+                "id": i + 1,
+                "title_ru": f"Проект {i}",
+                "title_kz": f"Жоба {i}",
+                "title_en": f"Project {i}",
+                "description_ru": DESCRIPTION["ru"],
+                "description_kz": DESCRIPTION["kz"],
+                "description_en": DESCRIPTION["en"],
+                "technologies": ["Python", "FastAPI", "PostgreSQL", "React"],
+                "genres": ["education"],
+                "image": image,
+                "images": [image, f"/static/uploads/ef/01/{i + 1:064x}.jpg"],
+                "category": "web",
+                "categories": ["web", "aiml"],
+                "featured": i % 7 == 0,
+                "project_url": f"https://example.org/p/{i}",
+            }
+        )
+    return rows
+
+
+def _variants(rows: list) -> dict:
+    out = {}
+    for r in rows:
+        for url in r["images"]:
+            out[url] = [
+                {"url": f"{url}.w{w}.webp", "width": w, "height": w // 2, "type": "image/webp"} for w in (320, 640, 1280)
+            ]
+    return out
+
+
+def _time(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--projects", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rows = _rows(args.projects)
+    variants = _variants(rows)
+    records = [ProjectRecord.from_row(r) for r in rows]
+    projects = [p.to_api(variants) for p in records]
+    fastapi_body = JSONResponse(jsonable_encoder(projects)).body
+    assert encode_json(projects) == fastapi_body == json.dumps(
+        projects, ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8"), "encoders disagree"
+
+    scale = 1000 / args.projects
+    cases = [
+        ("fastapi default (jsonable_encoder + json)", lambda: JSONResponse(jsonable_encoder(projects)).body),
+        ("stdlib json", lambda: json.dumps(projects, ensure_ascii=False, separators=(",", ":")).encode("utf-8")),
+        ("encode_json", lambda: encode_json(projects)),
+        ("ProjectRecord.to_api (build dicts)", lambda: [p.to_api(variants) for p in records]),
+    ]
+    print(f"{len(fastapi_body) / 1024:.0f} KiB of JSON for {args.projects} projects")
+    print(f"{'case':<44} {'ms / 1000 projects':>19}")
+    for name, fn in cases:
+        print(f"{name:<44} {_time(fn, args.repeat) * 1000 * scale:>19.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
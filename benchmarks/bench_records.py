@@ -0,0 +1,101 @@
+"""
+Memory and build time of the cached project list: per-row dicts vs ProjectRecord.
+
+"before" is the old shape (row_to_project: a 17-key dict per project, tag
+columns as lists, kept in the snapshot); "after" is ProjectRecord.from_rows (an
+immutable NamedTuple per project, each distinct tag array normalized once and
+its tuple shared). Measures, over synthetic rows (see bench_json):
+  - time to build the list from rows;
+  - bytes retained by the list (tracemalloc), excluding the shared row strings;
+  - time to render the public dicts (`to_api`) from records, for reference.
+No database needed.
+
+    python benchmarks/bench_records.py --projects 1000 --repeat 20
+"""
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from bench_json import _rows, _time, _variants  # noqa: E402
+from dt_backend.records import ProjectRecord  # noqa: E402
+from dt_backend.utils import _parse_csv_tags, srcset_for  # noqa: E402
+
+
+def _legacy_list(value: Any) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return [str(x) for x in value]
+    if isinstance(value, str):
+        return _parse_csv_tags(value)
+    return []
+
+
+def legacy_row_to_project(row: Dict[str, Any], variants: Dict[str, Any]) -> Dict[str, Any]:
+    """The removed utils.row_to_project, inlined for comparison."""
+    images = _legacy_list(row.get("images"))
+    return {
+        "id": str(row.get("id")),
+        "titleRu": row.get("title_ru"),
+        "titleKz": row.get("title_kz"),
+        "titleEn": row.get("title_en"),
+        "descriptionRu": row.get("description_ru"),
+        "descriptionKz": row.get("description_kz"),
+        "descriptionEn": row.get("description_en"),
+        "technologies": _legacy_list(row.get("technologies")),
+        "genres": _legacy_list(row.get("genres")),
+        "image": row.get("image"),
+        "images": images,
+        "imageSrcset": srcset_for(variants, row.get("image")),
+        "imagesSrcset": [srcset_for(variants, u) for u in images],
+        "category": row.get("category"),
+        "categories": _legacy_list(row.get("categories")),
+        "featured": bool(row.get("featured")),
+        "projectUrl": row.get("project_url"),
+    }
+
+
+def _retained(build) -> int:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return after - before
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--projects", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rows = _rows(args.projects)
+    variants = _variants(rows)
+    records = [ProjectRecord.from_row(r) for r in rows]
+    for r, p in zip(rows, records):
+        legacy = legacy_row_to_project(r, variants)
+        assert {k: list(v) if isinstance(v, tuple) else v for k, v in p.to_api(variants).items()} == legacy
+
+    build_dicts = lambda: [legacy_row_to_project(r, variants) for r in rows]  # noqa: E731
+    build_records = lambda: ProjectRecord.from_rows(rows)  # noqa: E731
+    n = args.projects
+    print(f"{'case':<36} {'us / project':>13} {'bytes / project':>16}")
+    for name, fn in (("before: dict per row", build_dicts), ("after: ProjectRecord", build_records)):
+        t = _time(fn, args.repeat)
+        print(f"{name:<36} {t / n * 1e6:>13.2f} {_retained(fn) / n:>16.0f}")
+    t = _time(lambda: [p.to_api(variants) for p in records], args.repeat)
+    print(f"{'ProjectRecord.to_api (render)':<36} {t / n * 1e6:>13.2f} {'-':>16}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+"""
+Rich-text sanitizer: HTMLParser reference vs single-pass fast path vs memo hit.
+
+Every corpus document (and --fuzz random ones) is first checked for identical
+output between utils._sanitize_with_parser (the reference) and
+utils.sanitize_rich_text_html, and for idempotence (sanitizing the output
+gives the output back; the memo relies on it for stripped outputs). Any mismatch fails the run.
+Corpus:
+  - realistic editor descriptions (paragraphs, lists, links, entities);
+  - pasted markup (comments, spans with styles, <script>) -> reference path;
+  - adversarial: deep nesting, thousands of links, a huge text node,
+    many unclosed tags, stray '<' / '&'.
+Inputs over SANITIZE_MEMO_MAX_INPUT are not hashed or memoized ("memo hit" is
+then a full run); over SANITIZE_FAST_MAX_INPUT they go to the reference parser.
+No database needed.
+
+    python benchmarks/bench_sanitize.py --repeat 5 --fuzz 2000
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from dt_backend import utils  # noqa: E402
+from dt_backend.utils import _sanitize_fast, _sanitize_with_parser, sanitize_rich_text_html  # noqa: E402
+
+_WORDS = "проект игра game design level жоба AI unity dt студент & < > \" ' R&D x<5".split()
+
+
+def _text(rng: random.Random, n: int) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(n))
+
+
+def _realistic(rng: random.Random) -> str:
+    parts = []
+    for _ in range(rng.randint(2, 6)):
+        parts.append(f"<p>{_text(rng, 30)} <strong>{_text(rng, 3)}</strong> &mdash; <em>{_text(rng, 4)}</em></p>")
+    items = "".join(f"<li>{_text(rng, 6)}</li>" for _ in range(rng.randint(2, 5)))
+    parts.append(f"<ul>{items}</ul>")
+    parts.append(f'<p>See <a href="https://example.com/p/{rng.randint(1, 999)}?a=1&amp;b=2">demo</a><br/>&copy; 2024</p>')
+    return "\n".join(parts)
+
+
+def _pasted(rng: random.Random) -> str:
+    return (
+        "<!--StartFragment--><p class=MsoNormal style='margin:0'><span lang=RU>"
+        f"{_text(rng, 40)}</span></p><script>alert('x')</script>"
+        f'<a href="javascript:alert(1)">x</a><p>{_text(rng, 20)}&nbsp text</p><!--EndFragment-->'
+    )
+
+
+def corpus() -> List[Tuple[str, str]]:
+    rng = random.Random(42)
+    link = '<a href="https://example.com/{i}">link {i}</a>, '
+    return [
+        ("realistic", "\n".join(_realistic(rng) for _ in range(3))),
+        ("realistic x50", "\n".join(_realistic(rng) for _ in range(50))),
+        ("pasted (fallback)", _pasted(rng)),
+        ("deep nesting 5k", "<blockquote><b>" * 5000 + "x" + "</b></blockquote>" * 5000),
+        ("unclosed 10k", "<li><em>x" * 10000),
+        ("links 5k", "<p>" + "".join(link.format(i=i) for i in range(5000)) + "</p>"),
+        ("mailto/unsafe links 2k", "".join(f'<a href="mailto:u{i}@x.kz">m</a><a href=data:x>d</a>' for i in range(2000))),
+        ("huge text 2MB", "<p>" + ("lorem ipsum dolor sit amet " * 80000) + "</p>"),
+        ("stray < and & 20k", "a < 5 & b " * 20000),
+    ]
+
+
+def _fuzz_doc(rng: random.Random) -> str:
+    pieces = [
+        "<p>", "</p>", "<b>", "</B>", "<br>", "<br/>", "<p/>", "<span style='x'>", "</span>", "<ul>", "<li>",
+        "</ul>", "<a href=\"http://a.kz/?q=1&amp;r=2\">", "<a HREF='mailto:x@y'>", "<a href=javascript:x>",
+        "<a href=\"  https://x \">", "<a>", "<a href=\"https://[::1\">", "<a href=\"ht\ttp://x\">", "<a/>",
+        "</a>", "<a href=\"https://ж.kz\"/>", "&amp;", "&#39;", "&#x27;", "&nbsp", "&", "& ", "&#", "<", "< ",
+        "<5", "<<", "<>", "<=", ">", "\"", "'", "<!-- c -->", "<script>x</script>", "<p class=a", "</p x>", "<x-y>", "text ",
+        "текст ", "R&D ", "&a-b ", "&#39 ", "\n", "<code>", "</pre>", "<blockquote>", "<i\n>", "<a href=\"https://x\" title=\"<\">",
+    ]
+    return "".join(rng.choice(pieces) for _ in range(rng.randint(1, 40)))
+
+
+def check(docs: List[str]) -> int:
+    failures = 0
+    for doc in docs:
+        s = doc.strip()
+        expected = _sanitize_with_parser(s) if s else ""
+        got = sanitize_rich_text_html(doc)
+        idempotent = expected != expected.strip() or not expected or _sanitize_with_parser(expected) == expected
+        if got != expected or not idempotent or sanitize_rich_text_html(expected) != expected.strip() and idempotent:
+            failures += 1
+            if failures <= 5:
+                print(f"MISMATCH for {doc[:200]!r}\n  reference: {expected[:200]!r}\n  got:       {got[:200]!r}")
+    return failures
+
+
+def _time(fn: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--fuzz", type=int, default=2000)
+    args = parser.parse_args()
+
+    docs = corpus()
+    rng = random.Random(7)
+    failures = check([d for _, d in docs] + [_fuzz_doc(rng) for _ in range(args.fuzz)])
+    if failures:
+        print(f"{failures} mismatches")
+        return 1
+
+    print(f"{'case':<24} {'size':>9} {'parser ms':>10} {'fast ms':>9} {'memo hit ms':>12}  path")
+    for name, doc in docs:
+        s = doc.strip()
+        t_ref = _time(lambda: _sanitize_with_parser(s), args.repeat)
+        utils._memo_clear()
+        t_new = _time(lambda: (utils._memo_clear(), sanitize_rich_text_html(doc)), args.repeat)
+        sanitize_rich_text_html(doc)
+        t_hit = _time(lambda: sanitize_rich_text_html(doc), args.repeat)
+        fast = len(s) <= utils.SANITIZE_FAST_MAX_INPUT and _sanitize_fast(s) is not None
+        memo = "" if len(s) <= utils.SANITIZE_MEMO_MAX_INPUT else ", not memoized"
+        path = ("fast" if fast else "parser") + memo
+        print(f"{name:<24} {len(doc):>9} {t_ref * 1e3:>10.2f} {t_new * 1e3:>9.2f} {t_hit * 1e3:>12.3f}  {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""
+CPU cost of serving static/css/styles.css from the API worker.
+
+Compares, per request (process CPU time, in-process via httpx's ASGI
+transport, no database needed):
+  - on-the-fly: plain StaticFiles behind Starlette's GZipMiddleware, i.e.
+    compressing on every request;
+  - precompressed: CachingStaticFiles serving the .br/.gz sibling written by
+    `python -m dt_backend.cli precompress-static`;
+  - revalidate: CachingStaticFiles answering If-None-Match with 304.
+With nginx serving /static directly (nginx/default.conf) none of these reach
+the worker at all.
+
+    pip install httpx
+    python benchmarks/bench_static.py --requests 2000
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import httpx
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.routing import Mount
+from starlette.staticfiles import StaticFiles
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from dt_backend.paths import static_dir  # noqa: E402
+from dt_backend.static_files import CachingStaticFiles, precompress  # noqa: E402
+
+PATH = "/static/css/styles.css"
+
+
+async def _measure(app, total: int, headers: dict) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        r = await client.get(PATH, headers=headers)
+        if "If-None-Match" in headers:
+            headers = {**headers, "If-None-Match": r.headers.get("etag", "")}
+        cpu0, wall0 = time.process_time(), time.perf_counter()
+        sizes = set()
+        for _ in range(total):
+            r = await client.get(PATH, headers=headers)
+            sizes.add((r.status_code, r.headers.get("content-encoding"), int(r.headers.get("content-length") or 0)))
+        cpu, wall = time.process_time() - cpu0, time.perf_counter() - wall0
+    return {"cpu_us": cpu / total * 1e6, "rps": total / wall, "responses": sorted(sizes, key=str)}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    precompress(static_dir())
+    plain = Starlette(
+        routes=[Mount("/static", StaticFiles(directory=str(static_dir())))],
+        middleware=[Middleware(GZipMiddleware, minimum_size=500, compresslevel=9)],
+    )
+    caching = Starlette(routes=[Mount("/static", CachingStaticFiles(directory=str(static_dir())))])
+
+    cases = [
+        ("on-the-fly gzip", plain, {"Accept-Encoding": "gzip"}),
+        ("precompressed gzip", caching, {"Accept-Encoding": "gzip"}),
+        ("precompressed br", caching, {"Accept-Encoding": "br, gzip"}),
+        ("revalidate (304)", caching, {"Accept-Encoding": "br, gzip", "If-None-Match": ""}),
+    ]
+    print(f"{'case':<20} {'cpu us/req':>11} {'req/s':>9}  responses (status, encoding, bytes)")
+    for name, app, headers in cases:
+        res = asyncio.run(_measure(app, args.requests, dict(headers)))
+        print(f"{name:<20} {res['cpu_us']:>11.0f} {res['rps']:>9.0f}  {res['responses']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
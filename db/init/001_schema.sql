@@ -41,6 +41,42 @@ CREATE TABLE IF NOT EXISTS genres (
   name TEXT NOT NULL UNIQUE
 );
 
+CREATE TABLE IF NOT EXISTS upload_variants (
+  url TEXT PRIMARY KEY,
+  source TEXT NOT NULL,
+  width INTEGER NOT NULL,
+  height INTEGER NOT NULL,
+  mime TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS upload_variants_source_idx ON upload_variants (source);
+
+CREATE TABLE IF NOT EXISTS upload_blobs (
+  sha256 TEXT PRIMARY KEY,
+  url TEXT NOT NULL UNIQUE,
+  size BIGINT NOT NULL,
+  mime TEXT NOT NULL,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS upload_refs (
+  url TEXT NOT NULL,
+  project_id INTEGER NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
+  PRIMARY KEY (url, project_id)
+);
+
+CREATE INDEX IF NOT EXISTS upload_refs_project_idx ON upload_refs (project_id);
+
+CREATE TABLE IF NOT EXISTS site_stats (
+  id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+  projects INTEGER NOT NULL DEFAULT 0,
+  technologies INTEGER NOT NULL DEFAULT 0,
+  students INTEGER NOT NULL DEFAULT 500,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+INSERT INTO site_stats (id) VALUES (TRUE) ON CONFLICT (id) DO NOTHING;
+
 INSERT INTO categories (name, name_ru, name_kz, name_en) VALUES
   ('aiml', 'AI/ML', 'AI/ML', 'AI/ML'),
   ('iot', 'IoT', 'IoT', 'IoT'),
@@ -51,3 +87,37 @@ ON CONFLICT (name) DO UPDATE SET
   name_ru = EXCLUDED.name_ru,
   name_kz = EXCLUDED.name_kz,
   name_en = EXCLUDED.name_en;
+
+CREATE INDEX IF NOT EXISTS projects_featured_id_idx ON projects (featured DESC, id ASC);
+CREATE INDEX IF NOT EXISTS projects_technologies_gin ON projects USING GIN (technologies);
+CREATE INDEX IF NOT EXISTS projects_genres_gin ON projects USING GIN (genres);
+CREATE INDEX IF NOT EXISTS projects_categories_gin ON projects USING GIN (categories);
+
+ALTER TABLE projects ADD COLUMN IF NOT EXISTS search_ru tsvector GENERATED ALWAYS AS (
+  setweight(to_tsvector('russian'::regconfig, coalesce(title_ru, '')), 'A') ||
+  setweight(to_tsvector('russian'::regconfig, regexp_replace(coalesce(description_ru, ''), '<[^>]*>', ' ', 'g')), 'B')
+) STORED;
+ALTER TABLE projects ADD COLUMN IF NOT EXISTS search_kz tsvector GENERATED ALWAYS AS (
+  setweight(to_tsvector('simple'::regconfig, coalesce(title_kz, '')), 'A') ||
+  setweight(to_tsvector('simple'::regconfig, regexp_replace(coalesce(description_kz, ''), '<[^>]*>', ' ', 'g')), 'B')
+) STORED;
+ALTER TABLE projects ADD COLUMN IF NOT EXISTS search_en tsvector GENERATED ALWAYS AS (
+  setweight(to_tsvector('english'::regconfig, coalesce(title_en, '')), 'A') ||
+  setweight(to_tsvector('english'::regconfig, regexp_replace(coalesce(description_en, ''), '<[^>]*>', ' ', 'g')), 'B')
+) STORED;
+CREATE INDEX IF NOT EXISTS projects_search_ru_gin ON projects USING GIN (search_ru);
+CREATE INDEX IF NOT EXISTS projects_search_kz_gin ON projects USING GIN (search_kz);
+CREATE INDEX IF NOT EXISTS projects_search_en_gin ON projects USING GIN (search_en);
+
+-- pg_trgm может быть недоступен (нет contrib / прав): init не должен падать,
+-- индексы тогда создаст migrate() (миграция 3) после установки расширения.
+DO $$
+BEGIN
+  CREATE EXTENSION IF NOT EXISTS pg_trgm;
+  CREATE INDEX IF NOT EXISTS projects_title_ru_trgm ON projects USING GIN (lower(title_ru) gin_trgm_ops);
+  CREATE INDEX IF NOT EXISTS projects_title_kz_trgm ON projects USING GIN (lower(title_kz) gin_trgm_ops);
+  CREATE INDEX IF NOT EXISTS projects_title_en_trgm ON projects USING GIN (lower(title_en) gin_trgm_ops);
+EXCEPTION WHEN undefined_file OR insufficient_privilege OR feature_not_supported THEN
+  RAISE NOTICE 'pg_trgm is not available (%), trigram indexes are left to migrate()', SQLERRM;
+END
+$$;
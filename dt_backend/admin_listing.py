@@ -0,0 +1,158 @@
+"""
+Paginated project list for the admin pages (/api/admin/projects, /admin/projects).
+
+One page is read with `LIMIT/OFFSET` plus `COUNT(*) OVER ()` for the total,
+sorted by a whitelisted ORDER BY and optionally filtered by a title substring
+(`lower(title_*) LIKE`, served by the projects_title_*_trgm indexes when
+pg_trgm is installed). Pages are rendered as a stream (see iter_chunks), and
+thumbnails use the smallest image variant instead of the full upload.
+"""
+from dataclasses import dataclass, replace
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+from urllib.parse import urlencode
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+ADMIN_PAGE_SIZE = 50
+MAX_ADMIN_PAGE_SIZE = 200
+
+# Сколько байт HTML копить перед отправкой очередного chunk ответа.
+STREAM_CHUNK_SIZE = 16 * 1024
+
+SORTS = {
+    "id_desc": "id DESC",
+    "id_asc": "id ASC",
+    "title_asc": "lower(title_ru) ASC, id DESC",
+    "title_desc": "lower(title_ru) DESC, id DESC",
+    "featured": "featured DESC, id DESC",
+}
+DEFAULT_SORT = "id_desc"
+
+LIST_COLUMNS = "id, title_ru, title_kz, title_en, category, featured, image, project_url"
+
+
+@dataclass(frozen=True)
+class AdminListQuery:
+    page: int = 1
+    per_page: int = ADMIN_PAGE_SIZE
+    sort: str = DEFAULT_SORT
+    q: str = ""
+
+    @classmethod
+    def parse(
+        cls,
+        page: Optional[int] = None,
+        per_page: Optional[int] = None,
+        sort: Optional[str] = None,
+        q: Optional[str] = None,
+    ) -> "AdminListQuery":
+        """Clamps user input instead of rejecting it (these come from links and forms)."""
+        return cls(
+            page=max(1, page or 1),
+            per_page=min(MAX_ADMIN_PAGE_SIZE, max(1, per_page or ADMIN_PAGE_SIZE)),
+            sort=sort if sort in SORTS else DEFAULT_SORT,
+            q=(q or "").strip(),
+        )
+
+    @property
+    def offset(self) -> int:
+        return (self.page - 1) * self.per_page
+
+    def query_string(self, **changes: Any) -> str:
+        """`?page=..&sort=..` for a link to another page of the same list (defaults omitted)."""
+        target = replace(self, **changes)
+        params = {"page": target.page, "per_page": target.per_page, "sort": target.sort, "q": target.q}
+        defaults = {"page": 1, "per_page": ADMIN_PAGE_SIZE, "sort": DEFAULT_SORT, "q": ""}
+        qs = urlencode({k: v for k, v in params.items() if v != defaults[k]})
+        return f"?{qs}" if qs else "?"
+
+
+@dataclass(frozen=True)
+class AdminListPage:
+    query: AdminListQuery
+    rows: List[Dict[str, Any]]
+    total: int
+
+    @property
+    def pages(self) -> int:
+        return max(1, -(-self.total // self.query.per_page))
+
+    @property
+    def has_prev(self) -> bool:
+        return self.query.page > 1
+
+    @property
+    def has_next(self) -> bool:
+        return self.query.page < self.pages
+
+
+def _like_pattern(q: str) -> str:
+    escaped = q.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def fetch_admin_page(conn: Connection, query: AdminListQuery) -> AdminListPage:
+    where = ""
+    params: Dict[str, Any] = {"limit": query.per_page, "offset": query.offset}
+    if query.q:
+        where = (
+            "WHERE lower(title_ru) LIKE :pattern OR lower(title_kz) LIKE :pattern "
+            "OR lower(title_en) LIKE :pattern"
+        )
+        params["pattern"] = _like_pattern(query.q)
+
+    rows = conn.execute(
+        text(
+            f"""
+            SELECT {LIST_COLUMNS}, COUNT(*) OVER () AS total
+            FROM projects
+            {where}
+            ORDER BY {SORTS[query.sort]}
+            LIMIT :limit OFFSET :offset
+            """
+        ),
+        params,
+    ).mappings().all()
+
+    if rows:
+        total = int(rows[0]["total"])
+    elif query.page > 1:
+        # Страница за концом списка: окно пустое, total считаем отдельно.
+        total = int(conn.execute(text(f"SELECT COUNT(*) FROM projects {where}"), params).scalar_one())
+    else:
+        total = 0
+    return AdminListPage(query=query, rows=[dict(r) for r in rows], total=total)
+
+
+def thumbnail_url(variants: Mapping[str, List[Dict[str, Any]]], url: Any) -> str:
+    """Smallest variant of an upload (variants come smallest first), else the URL itself."""
+    if not url:
+        return ""
+    entries = variants.get(str(url))
+    return entries[0]["url"] if entries else str(url)
+
+
+def iter_chunks(parts: Iterable[str], chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+    """Joins small rendered fragments into ~chunk_size UTF-8 chunks for StreamingResponse."""
+    buf: List[str] = []
+    size = 0
+    for part in parts:
+        buf.append(part)
+        size += len(part)
+        if size >= chunk_size:
+            yield "".join(buf).encode("utf-8")
+            buf.clear()
+            size = 0
+    if buf:
+        yield "".join(buf).encode("utf-8")
+
+
+def page_links(page: AdminListPage) -> List[Tuple[str, Optional[str]]]:
+    """(label, query string or None for the current/disabled item) for a pager."""
+    q = page.query
+    return [
+        ("«", q.query_string(page=q.page - 1) if page.has_prev else None),
+        (f"{q.page} / {page.pages}", None),
+        ("»", q.query_string(page=q.page + 1) if page.has_next else None),
+    ]
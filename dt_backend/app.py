@@ -1,28 +1,58 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from starlette.middleware.sessions import SessionMiddleware
 
+from .catalog import CatalogCache
+from .compression import CompressionMiddleware, CompressionSettings
 from .config import get_settings
-from .db import create_db_engine, ensure_schema
+from .db import create_async_db_engine, create_db_engine
+from .jobs import JobRegistry
+from .migrations import migrate
 from .paths import static_dir, templates_dir, uploads_dir
 from .routers.admin.auth import create_admin_auth_router
 from .routers.admin.categories import create_admin_categories_router
 from .routers.admin.genres import create_admin_genres_router
+from .routers.admin.jobs import create_admin_jobs_router
 from .routers.admin.projects import create_admin_projects_router
+from .routers.admin.stats import create_admin_stats_router
 from .routers.admin.technologies import create_admin_technologies_router
 from .routers.admin.template_auth import create_admin_template_auth_router
 from .routers.admin.template_projects import create_admin_template_projects_router
 from .routers.public.api import create_public_api_router
 from .routers.public.legacy_pages import create_legacy_pages_router
 from .routers.public.root import create_root_router
+from .static_files import CachingStaticFiles
+from .templating import SiteTemplates
+from .uploads import UploadStore
 
 
 def create_app() -> FastAPI:
     settings = get_settings()
     engine = create_db_engine(settings)
+    async_engine = create_async_db_engine(settings)
+    catalog = CatalogCache(
+        engine,
+        ttl_seconds=settings.catalog_ttl_seconds,
+        async_engine=async_engine,
+        version_check_seconds=settings.catalog_version_check_seconds,
+    )
 
     uploads_dir().mkdir(parents=True, exist_ok=True)
+    uploads = UploadStore(
+        uploads_dir(),
+        engine,
+        max_file_bytes=settings.upload_max_file_bytes,
+        max_request_bytes=settings.upload_max_request_bytes,
+        image_avif=settings.image_avif,
+    )
+
+    jobs = JobRegistry(engine)
+
+    site = SiteTemplates(
+        templates_dir(),
+        cache_dir=settings.templates_cache_dir,
+        auto_reload=settings.templates_auto_reload,
+    )
 
     app = FastAPI()
 
@@ -35,25 +65,46 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
-    app.mount("/static", StaticFiles(directory=str(static_dir())), name="static")
+    # Последним = самым внешним: сжимает всё, что отдают роутеры и /static.
+    if settings.compression_gzip_level > 0:
+        compression = CompressionSettings(
+            minimum_size=settings.compression_min_size,
+            gzip_level=settings.compression_gzip_level,
+            brotli_quality=settings.compression_brotli_quality,
+        )
+        app.state.compression = compression
+        app.add_middleware(CompressionMiddleware, settings=compression)
+
+    app.mount("/static", CachingStaticFiles(directory=str(static_dir())), name="static")
 
     @app.on_event("startup")
     def _startup() -> None:
-        ensure_schema(engine)
+        # Обычно схема уже актуальна (cli migrate): один SELECT без блокировок.
+        migrate(engine, wait=False)
+        catalog.get()
+        site.precompile()
+        site.prerender(app.url_path_for)
+
+    @app.on_event("shutdown")
+    async def _shutdown() -> None:
+        if async_engine is not None:
+            await async_engine.dispose()
 
-    app.include_router(create_public_api_router(engine))
+    app.include_router(create_public_api_router(engine, catalog, async_engine))
     app.include_router(create_root_router(settings))
-    app.include_router(create_legacy_pages_router(templates_dir()))
+    app.include_router(create_legacy_pages_router(site))
 
     # Original admin interface with templates (restored design)
-    app.include_router(create_admin_template_auth_router(settings, templates_dir()))
-    app.include_router(create_admin_template_projects_router(engine, uploads_dir(), templates_dir()))
+    app.include_router(create_admin_template_auth_router(settings, site))
+    app.include_router(create_admin_template_projects_router(engine, catalog, uploads, site))
 
     # API-based admin endpoints (kept for backward compatibility)
     app.include_router(create_admin_auth_router(settings))
-    app.include_router(create_admin_projects_router(engine, uploads_dir()))
-    app.include_router(create_admin_technologies_router(engine))
-    app.include_router(create_admin_categories_router(engine))
-    app.include_router(create_admin_genres_router(engine))
+    app.include_router(create_admin_projects_router(engine, catalog, uploads, jobs))
+    app.include_router(create_admin_technologies_router(engine, catalog))
+    app.include_router(create_admin_categories_router(engine, catalog))
+    app.include_router(create_admin_genres_router(engine, catalog))
+    app.include_router(create_admin_stats_router(engine, catalog))
+    app.include_router(create_admin_jobs_router(jobs))
 
     return app
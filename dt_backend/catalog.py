@@ -0,0 +1,389 @@
+"""
+In-process catalog snapshot for the public API.
+
+The catalog (projects + taxonomies) changes only when an admin saves something,
+but is read on every page load. Public endpoints read an immutable snapshot from
+memory. Every write to a catalog table bumps `catalog_version` in the database
+(statement triggers, migration 4) in the same transaction, so admin saves, the
+CLI import/export and the upload GC are all seen by every worker: a worker
+re-reads that one row at most every `version_check_seconds` and rebuilds the
+snapshot once when it changed. `CatalogCache.invalidate()` makes the writing
+worker re-check (and rebuild) on its next read.
+"""
+import asyncio
+import base64
+import binascii
+import bisect
+import threading
+import time
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Callable, Dict, FrozenSet, Hashable, List, Mapping, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.concurrency import run_in_threadpool
+
+from .filters import ProjectFilter
+from .http_cache import CachedBody, cached_body, encode_json, make_etag
+from .images import load_variants
+from .records import ProjectRecord
+from .stats import load_site_stats, stats_payload
+
+PROJECTS_SQL = """
+    SELECT
+        id,
+        title_ru, title_kz, title_en,
+        description_ru, description_kz, description_en,
+        technologies,
+        genres,
+        image,
+        images,
+        category,
+        categories,
+        featured,
+        project_url
+    FROM projects
+    ORDER BY featured DESC, id ASC
+"""
+
+CATEGORIES_SQL = "SELECT id, name, name_ru, name_kz, name_en FROM categories ORDER BY name ASC"
+
+DERIVED_CATEGORIES_SQL = """
+    SELECT DISTINCT category AS name
+    FROM projects
+    WHERE category IS NOT NULL AND category <> ''
+    ORDER BY name ASC
+"""
+
+TECHNOLOGIES_SQL = "SELECT name FROM technologies ORDER BY name ASC"
+
+DERIVED_TECHNOLOGIES_SQL = """
+    SELECT DISTINCT t AS name
+    FROM projects
+    LEFT JOIN LATERAL unnest(technologies) AS t ON TRUE
+    WHERE t IS NOT NULL AND t <> ''
+    ORDER BY name ASC
+"""
+
+GENRES_SQL = "SELECT name FROM genres ORDER BY name ASC"
+
+DERIVED_GENRES_SQL = """
+    SELECT DISTINCT g AS name
+    FROM projects
+    LEFT JOIN LATERAL unnest(genres) AS g ON TRUE
+    WHERE g IS NOT NULL AND g <> ''
+    ORDER BY name ASC
+"""
+
+
+# Сколько сериализованных ответов держит один snapshot (пагинация даёт много ключей).
+MAX_CACHED_RESPONSES = 1024
+
+SortKey = Tuple[bool, int]
+
+
+def project_sort_key(project: ProjectRecord) -> SortKey:
+    # ORDER BY featured DESC, id ASC
+    return (not project.featured, project.id)
+
+
+def encode_cursor(project: ProjectRecord) -> str:
+    raw = f"{int(project.featured)}:{project.id}".encode("ascii")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: str) -> SortKey:
+    """Returns the sort key of the last item of the previous page. Raises ValueError."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        featured, _, pid = base64.urlsafe_b64decode(padded.encode("ascii")).decode("ascii").partition(":")
+        if featured not in ("0", "1"):
+            raise ValueError("bad cursor")
+        return (featured != "1", int(pid))
+    except (binascii.Error, UnicodeError, ValueError):
+        raise ValueError("invalid cursor")
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """
+    Read-only view of the catalog at one version. Projects are immutable
+    ProjectRecords; response dicts are built from them (ProjectRecord.to_api
+    with `variants`) only when a body is serialized.
+    """
+
+    version: int
+    built_at: float
+    # Время последнего реального изменения содержимого (для Last-Modified):
+    # пересборка без изменений данных его не сдвигает.
+    modified_at: float
+    digest: str
+    projects: Tuple[ProjectRecord, ...]
+    projects_by_id: Mapping[int, ProjectRecord]
+    projects_by_category: Mapping[str, Tuple[ProjectRecord, ...]]
+    # Инвертированные индексы тег -> id проектов (in-memory аналог GIN).
+    ids_by_technology: Mapping[str, FrozenSet[int]]
+    ids_by_genre: Mapping[str, FrozenSet[int]]
+    ids_by_category: Mapping[str, FrozenSet[int]]
+    categories: Tuple[Dict[str, Any], ...]
+    technologies: Tuple[str, ...]
+    genres: Tuple[str, ...]
+    # upload URL -> srcset entries (images.load_variants)
+    variants: Mapping[str, List[Dict[str, Any]]]
+    # site_stats (как в /api/stats); в digest, чтобы /api/bootstrap получал новый ETag.
+    stats: Mapping[str, int]
+    _responses: Dict[Hashable, CachedBody] = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    def response(self, key: Hashable, build: Callable[[], Any]) -> CachedBody:
+        """Serialized body for `key`, built once per snapshot."""
+        cached = self._responses.get(key)
+        if cached is None:
+            cached = cached_body(build(), last_modified=self.modified_at)
+            if len(self._responses) < MAX_CACHED_RESPONSES:
+                self._responses[key] = cached
+        return cached
+
+    def cached(self, key: Hashable) -> Optional[CachedBody]:
+        """The memoized body for `key`, if any (for bodies built from an async query)."""
+        return self._responses.get(key)
+
+    def filtered(self, f: ProjectFilter) -> Tuple[ProjectRecord, ...]:
+        """Projects matching `f`, in catalog order."""
+        if f.is_empty:
+            return self.projects
+        if len(f.categories) == 1 and not f.technologies and not f.genres:
+            return self.projects_by_category.get(f.categories[0], ())
+
+        ids: Optional[FrozenSet[int]] = None
+        for values, index in (
+            (f.technologies, self.ids_by_technology),
+            (f.genres, self.ids_by_genre),
+            (f.categories, self.ids_by_category),
+        ):
+            if not values:
+                continue
+            sets = [index.get(v, frozenset()) for v in values]
+            matched = frozenset().union(*sets) if f.match == "any" else frozenset.intersection(*sets)
+            ids = matched if ids is None else ids & matched
+            if not ids:
+                return ()
+        return tuple(p for p in self.projects if p.id in ids)  # type: ignore[operator]
+
+    @staticmethod
+    def page(
+        projects: Tuple[ProjectRecord, ...],
+        after: Optional[SortKey],
+        limit: int,
+    ) -> Tuple[Tuple[ProjectRecord, ...], Optional[str]]:
+        """
+        Keyset page: items strictly after `after` in (featured DESC, id ASC) order.
+        Binary search on the sorted snapshot, so deep pages cost the same as the first.
+        """
+        start = 0 if after is None else bisect.bisect_right(projects, after, key=project_sort_key)
+        items = projects[start : start + limit]
+        next_cursor = encode_cursor(items[-1]) if items and start + limit < len(projects) else None
+        return items, next_cursor
+
+
+def _categories_payload(conn: Connection) -> List[Dict[str, Any]]:
+    rows = conn.execute(text(CATEGORIES_SQL)).mappings().all()
+    if rows:
+        out = []
+        for r in rows:
+            code = r["name"]
+            out.append(
+                {
+                    "id": int(r["id"]),
+                    "code": code,
+                    "nameRu": r.get("name_ru") or code,
+                    "nameKz": r.get("name_kz") or code,
+                    "nameEn": r.get("name_en") or code,
+                }
+            )
+        return out
+
+    derived = conn.execute(text(DERIVED_CATEGORIES_SQL)).mappings().all()
+    return [{"code": r["name"], "nameRu": r["name"], "nameKz": r["name"], "nameEn": r["name"]} for r in derived]
+
+
+def _names(conn: Connection, sql: str, derived_sql: str) -> List[str]:
+    names = conn.execute(text(sql)).scalars().all()
+    if names:
+        return list(names)
+    return list(conn.execute(text(derived_sql)).scalars().all())
+
+
+CATALOG_VERSION_SQL = "SELECT version FROM catalog_version"
+
+
+def load_catalog_version(conn: Connection) -> int:
+    """Current `catalog_version`; 0 before migration 4 is applied."""
+    try:
+        return int(conn.execute(text(CATALOG_VERSION_SQL)).scalar() or 0)
+    except DBAPIError:
+        conn.rollback()
+        return 0
+
+
+def build_snapshot(conn: Connection, version: int, previous: Optional[CatalogSnapshot] = None) -> CatalogSnapshot:
+    variants = load_variants(conn)
+    projects = ProjectRecord.from_rows(conn.execute(text(PROJECTS_SQL)).mappings())
+
+    # Precomputed category filter: primary `category` OR any of `categories`.
+    by_category: Dict[str, List[ProjectRecord]] = {}
+    by_technology: Dict[str, set] = {}
+    by_genre: Dict[str, set] = {}
+    for p in projects:
+        for code in p.category_codes:
+            by_category.setdefault(code, []).append(p)
+        for t in p.technologies:
+            by_technology.setdefault(t, set()).add(p.id)
+        for g in p.genres:
+            by_genre.setdefault(g, set()).add(p.id)
+
+    categories = tuple(_categories_payload(conn))
+    technologies = tuple(_names(conn, TECHNOLOGIES_SQL, DERIVED_TECHNOLOGIES_SQL))
+    genres = tuple(_names(conn, GENRES_SQL, DERIVED_GENRES_SQL))
+    stats_row = load_site_stats(conn)
+    stats = stats_payload(stats_row) if stats_row else {}
+
+    built_at = time.time()
+    digest = make_etag(encode_json([[p.to_api(variants) for p in projects], categories, technologies, genres, stats]))
+    modified_at = previous.modified_at if previous is not None and previous.digest == digest else built_at
+
+    return CatalogSnapshot(
+        version=version,
+        built_at=built_at,
+        modified_at=modified_at,
+        digest=digest,
+        projects=projects,
+        projects_by_id=MappingProxyType({p.id: p for p in projects}),
+        projects_by_category=MappingProxyType({k: tuple(v) for k, v in by_category.items()}),
+        ids_by_technology=MappingProxyType({k: frozenset(v) for k, v in by_technology.items()}),
+        ids_by_genre=MappingProxyType({k: frozenset(v) for k, v in by_genre.items()}),
+        ids_by_category=MappingProxyType(
+            {k: frozenset(p.id for p in v) for k, v in by_category.items()}
+        ),
+        categories=categories,
+        technologies=technologies,
+        genres=genres,
+        variants=MappingProxyType(variants),
+        stats=MappingProxyType(stats),
+    )
+
+
+class CatalogCache:
+    """
+    Holds the current CatalogSnapshot and rebuilds it when `catalog_version`
+    in the database moves (or after `invalidate()` in this process).
+
+    The version row is read at most once per `version_check_seconds` (0 = on
+    every read), which bounds how long another worker's write stays invisible.
+    `ttl_seconds` additionally forces a rebuild of an old snapshot (0 = never).
+
+    Async handlers use `aget()`: with an async engine the check and the rebuild
+    run on the async driver, otherwise they are pushed to the thread pool.
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        ttl_seconds: float = 0.0,
+        async_engine: Optional[AsyncEngine] = None,
+        version_check_seconds: float = 1.0,
+    ) -> None:
+        self._engine = engine
+        self._async_engine = async_engine
+        self._async_lock: Optional[asyncio.Lock] = None
+        self._ttl = ttl_seconds
+        self._check_interval = version_check_seconds
+        # Последняя прочитанная catalog_version и когда её читали (monotonic).
+        self._version = -1
+        self._checked_monotonic = 0.0
+        # invalidate() в этом процессе: пересборка без ожидания проверки версии.
+        self._generation = 0
+        self._built_generation = -1
+        self._version_lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._built_monotonic = 0.0
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def invalidate(self) -> None:
+        with self._version_lock:
+            self._generation += 1
+            self._checked_monotonic = 0.0
+
+    def _check_due(self) -> bool:
+        return self._check_interval <= 0 or time.monotonic() - self._checked_monotonic >= self._check_interval
+
+    def _seen_version(self, version: int) -> None:
+        with self._version_lock:
+            self._version = version
+            self._checked_monotonic = time.monotonic()
+
+    def _is_fresh(self, snapshot: Optional[CatalogSnapshot]) -> bool:
+        if snapshot is None or snapshot.version != self._version or self._built_generation != self._generation:
+            return False
+        return self._ttl <= 0 or time.monotonic() - self._built_monotonic < self._ttl
+
+    def _swap(self, snapshot: CatalogSnapshot, generation: int) -> CatalogSnapshot:
+        self._built_monotonic = time.monotonic()
+        self._built_generation = generation
+        self._snapshot = snapshot
+        return snapshot
+
+    def get(self) -> CatalogSnapshot:
+        if self._check_due():
+            with self._engine.connect() as conn:
+                self._seen_version(load_catalog_version(conn))
+        snapshot = self._snapshot
+        if self._is_fresh(snapshot):
+            return snapshot  # type: ignore[return-value]
+
+        with self._build_lock:
+            snapshot = self._snapshot
+            if self._is_fresh(snapshot):
+                return snapshot  # type: ignore[return-value]
+
+            # Read the version before loading: a write that lands during the build
+            # bumps it again, so the next check rebuilds instead of serving stale data.
+            generation = self._generation
+            with self._engine.connect() as conn:
+                version = load_catalog_version(conn)
+                self._seen_version(version)
+                snapshot = build_snapshot(conn, version, previous=self._snapshot)
+            return self._swap(snapshot, generation)
+
+    async def aget(self) -> CatalogSnapshot:
+        if self._async_engine is None:
+            if self._check_due() or not self._is_fresh(self._snapshot):
+                return await run_in_threadpool(self.get)
+            return self._snapshot  # type: ignore[return-value]
+
+        if self._check_due():
+            async with self._async_engine.connect() as conn:
+                self._seen_version(await conn.run_sync(load_catalog_version))
+        snapshot = self._snapshot
+        if self._is_fresh(snapshot):
+            return snapshot  # type: ignore[return-value]
+
+        if self._async_lock is None:
+            self._async_lock = asyncio.Lock()
+        async with self._async_lock:
+            snapshot = self._snapshot
+            if self._is_fresh(snapshot):
+                return snapshot  # type: ignore[return-value]
+
+            generation = self._generation
+            async with self._async_engine.connect() as conn:
+                version = await conn.run_sync(load_catalog_version)
+                self._seen_version(version)
+                snapshot = await conn.run_sync(build_snapshot, version, self._snapshot)
+            return self._swap(snapshot, generation)
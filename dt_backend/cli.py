@@ -0,0 +1,148 @@
+"""
+Maintenance commands:
+
+    python -m dt_backend.cli migrate [--status]
+    python -m dt_backend.cli precompress-static [--dir static] [--force]
+    python -m dt_backend.cli import-projects FILE [--format csv|jsonl]
+    python -m dt_backend.cli gc-uploads [--dry-run] [--grace-hours 24] [--batch-size 200]
+"""
+import argparse
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+from .config import get_settings
+from .db import create_db_engine
+from .importer import FORMATS, ProjectImportError, detect_format, import_projects
+from .jobs import Job
+from .migrations import MIGRATIONS, applied_versions, migrate
+from .paths import static_dir, uploads_dir
+from .upload_maintenance import GC_BATCH_SIZE, GC_GRACE_SECONDS, collect_garbage
+from .uploads import UploadStore
+from .static_files import precompress
+
+
+def _migrate(args: argparse.Namespace) -> int:
+    engine = create_db_engine(get_settings())
+    try:
+        if args.status:
+            with engine.connect() as conn:
+                done = set(applied_versions(conn))
+            for m in MIGRATIONS:
+                print(f"  {m.version:>3} {'applied' if m.version in done else 'pending':<8} {m.name}")
+            return 0
+        result = migrate(engine)
+    finally:
+        engine.dispose()
+
+    applied = ", ".join(map(str, result["applied"])) or "nothing to apply"
+    print(f"migrate: schema version {result['current']} ({applied})")
+    if result["deferred"]:
+        print(f"migrate: deferred (retried on the next run): {', '.join(map(str, result['deferred']))}")
+    return 0
+
+
+def _precompress_static(args: argparse.Namespace) -> int:
+    stats = precompress(args.dir, force=args.force)
+    saved = stats["bytes_in"] - stats["bytes_out"]
+    print(
+        f"precompress-static: {stats['files']} files, {stats['written']} written, "
+        f"{stats['skipped']} up to date/skipped, {saved} bytes saved"
+    )
+    return 0
+
+
+def _import_projects(args: argparse.Namespace) -> int:
+    fmt = args.format or detect_format(args.file.name)
+    if fmt is None:
+        print("import-projects: cannot tell the format from the file name, pass --format", file=sys.stderr)
+        return 2
+
+    engine = create_db_engine(get_settings())
+    try:
+        with args.file.open("rb") as f, engine.begin() as conn:
+            result = import_projects(conn, f, fmt)
+    except ProjectImportError as e:
+        print(f"import-projects: rejected, {e.total} invalid record(s):", file=sys.stderr)
+        for error in e.errors:
+            print(f"  {error}", file=sys.stderr)
+        return 1
+    finally:
+        engine.dispose()
+
+    print(
+        f"import-projects: {result['imported']} projects imported; new technologies: {result['technologies']}, "
+        f"genres: {result['genres']}, categories: {result['categories']}"
+    )
+    return 0
+
+
+def _gc_uploads(args: argparse.Namespace) -> int:
+    settings = get_settings()
+    engine = create_db_engine(settings)
+    store = UploadStore(
+        uploads_dir(),
+        engine,
+        max_file_bytes=settings.upload_max_file_bytes,
+        max_request_bytes=settings.upload_max_request_bytes,
+    )
+    try:
+        report = collect_garbage(
+            engine,
+            store,
+            Job(id="cli", kind="uploads-gc"),
+            dry_run=args.dry_run,
+            grace_seconds=args.grace_hours * 3600,
+            batch_size=args.batch_size,
+        )
+    finally:
+        engine.dispose()
+
+    for url in report["sample"] if args.dry_run else ():
+        print(f"  {url}")
+    print(
+        f"gc-uploads{' (dry run)' if args.dry_run else ''}: {report['scanned']} files, "
+        f"{report['orphans']} orphaned ({report['orphanBytes']} bytes), {report['tooNew']} within grace period, "
+        f"{report['deleted']} deleted, {report['reclaimedBytes']} bytes reclaimed"
+    )
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m dt_backend.cli")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("migrate", help="apply pending schema migrations (waits for a concurrent run)")
+    p.add_argument("--status", action="store_true", help="list migrations and whether they are applied")
+    p.set_defaults(func=_migrate)
+
+    p = sub.add_parser("precompress-static", help="write .br/.gz siblings for static text assets")
+    p.add_argument("--dir", type=Path, default=static_dir(), help="static directory (default: %(default)s)")
+    p.add_argument("--force", action="store_true", help="rewrite siblings even if they are up to date")
+    p.set_defaults(func=_precompress_static)
+
+    p = sub.add_parser(
+        "import-projects",
+        help="bulk-insert projects from CSV/JSONL (running API workers pick them up within CATALOG_VERSION_CHECK_SECONDS)",
+    )
+    p.add_argument("file", type=Path)
+    p.add_argument("--format", choices=FORMATS, help="default: from the file extension")
+    p.set_defaults(func=_import_projects)
+
+    p = sub.add_parser("gc-uploads", help="delete files in static/uploads that no project references")
+    p.add_argument("--dry-run", action="store_true", help="only report what would be deleted")
+    p.add_argument(
+        "--grace-hours",
+        type=float,
+        default=GC_GRACE_SECONDS / 3600,
+        help="keep files modified within this many hours (default: %(default)s)",
+    )
+    p.add_argument("--batch-size", type=int, default=GC_BATCH_SIZE, help="files per transaction (default: %(default)s)")
+    p.set_defaults(func=_gc_uploads)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
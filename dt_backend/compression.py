@@ -0,0 +1,211 @@
+"""
+Negotiated brotli/gzip response compression.
+
+CompressionMiddleware compresses text responses (JSON, admin HTML, css/js
+without a precompressed sibling) once they reach `minimum_size`; streamed
+bodies are compressed chunk by chunk with a flush per chunk. Responses that
+already carry Content-Encoding are passed through untouched: json_response
+uses that to serve bytes compressed once per memoized CachedBody instead of
+recompressing the same payload on every request.
+
+A compressed response is a different representation, so its ETag is
+weakened (W/"..."), like nginx does; If-None-Match uses weak comparison, so
+revalidation still answers 304.
+"""
+import gzip
+import zlib
+from dataclasses import dataclass
+from typing import FrozenSet, List, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli not installed
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "application/x-ndjson",
+    "image/svg+xml",
+    "text/",
+)
+
+
+@dataclass(frozen=True)
+class CompressionSettings:
+    minimum_size: int = 500
+    gzip_level: int = 6
+    brotli_quality: int = 4
+
+
+def accepted_encodings(header: Optional[str]) -> FrozenSet[str]:
+    """Encodings from Accept-Encoding with a non-zero q ("br;q=0" is a refusal)."""
+    out = set()
+    for part in (header or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        out.add(coding)
+    return frozenset(out)
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    accepted = accepted_encodings(accept_encoding)
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def compress(data: bytes, encoding: str, settings: CompressionSettings) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=settings.brotli_quality)
+    return gzip.compress(data, compresslevel=settings.gzip_level, mtime=0)
+
+
+def is_compressible(content_type: Optional[str]) -> bool:
+    ct = (content_type or "").lower()
+    return ct.startswith(COMPRESSIBLE_TYPES)
+
+
+def add_vary(headers: MutableHeaders, value: str) -> None:
+    current = [v.strip() for v in headers.get("vary", "").split(",") if v.strip()]
+    if value.lower() not in (v.lower() for v in current):
+        headers["Vary"] = ", ".join(current + [value])
+
+
+def weaken_etag(headers: MutableHeaders) -> None:
+    etag = headers.get("etag")
+    if etag and not etag.startswith("W/"):
+        headers["ETag"] = f"W/{etag}"
+
+
+class _StreamCompressor:
+    def __init__(self, encoding: str, settings: CompressionSettings) -> None:
+        self._encoding = encoding
+        if encoding == "br":
+            self._br = brotli.Compressor(quality=settings.brotli_quality)
+        else:
+            # wbits 16+: gzip container.
+            self._gz = zlib.compressobj(settings.gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def chunk(self, data: bytes) -> bytes:
+        if self._encoding == "br":
+            return self._br.process(data) + self._br.flush()
+        return self._gz.compress(data) + self._gz.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self._encoding == "br":
+            return self._br.finish()
+        return self._gz.flush(zlib.Z_FINISH)
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, settings: CompressionSettings = CompressionSettings()) -> None:
+        self.app = app
+        self.settings = settings
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope.get("method") == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, _CompressingSend(send, encoding, self.settings))
+
+
+class _CompressingSend:
+    """send() wrapper: pending -> (passthrough | buffering -> streaming)."""
+
+    def __init__(self, send: Send, encoding: str, settings: CompressionSettings) -> None:
+        self._send = send
+        self._encoding = encoding
+        self._settings = settings
+        self._start: Optional[Message] = None
+        self._state = "pending"
+        self._buffer: List[bytes] = []
+        self._buffered = 0
+        self._stream: Optional[_StreamCompressor] = None
+
+    async def __call__(self, message: Message) -> None:
+        kind = message["type"]
+        if kind == "http.response.start":
+            self._start = message
+            return
+        if kind != "http.response.body" or self._state == "passthrough":
+            await self._flush_start()
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more = message.get("more_body", False)
+
+        if self._state == "pending":
+            headers = MutableHeaders(scope=self._start)
+            if (
+                self._start["status"] != 200
+                or "content-encoding" in headers
+                or "no-transform" in headers.get("cache-control", "")
+                or not is_compressible(headers.get("content-type"))
+            ):
+                self._state = "passthrough"
+                await self._flush_start()
+                await self._send(message)
+                return
+            add_vary(headers, "Accept-Encoding")
+            self._state = "buffering"
+
+        if self._state == "buffering":
+            # The head of the body is held back until we know whether it reaches minimum_size.
+            self._buffer.append(body)
+            self._buffered += len(body)
+            if not more:
+                data = b"".join(self._buffer)
+                if len(data) >= self._settings.minimum_size:
+                    data = compress(data, self._encoding, self._settings)
+                    self._mark_encoded(length=len(data))
+                self._state = "passthrough"
+                await self._flush_start()
+                await self._send({"type": "http.response.body", "body": data})
+                return
+            if self._buffered < self._settings.minimum_size:
+                return
+            self._stream = _StreamCompressor(self._encoding, self._settings)
+            self._mark_encoded(length=None)
+            self._state = "streaming"
+            await self._flush_start()
+            body, self._buffer = b"".join(self._buffer), []
+
+        out = self._stream.chunk(body)
+        if not more:
+            out += self._stream.finish()
+        await self._send({"type": "http.response.body", "body": out, "more_body": more})
+
+    def _mark_encoded(self, length: Optional[int]) -> None:
+        headers = MutableHeaders(scope=self._start)
+        headers["Content-Encoding"] = self._encoding
+        if length is not None:
+            headers["Content-Length"] = str(length)
+        elif "content-length" in headers:
+            del headers["content-length"]
+        weaken_etag(headers)
+
+    async def _flush_start(self) -> None:
+        if self._start is not None:
+            start, self._start = self._start, None
+            await self._send(start)
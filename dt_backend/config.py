@@ -12,6 +12,17 @@ class Settings:
     secret_key: str
     frontend_url: str
     cors_origins: List[str]
+    catalog_ttl_seconds: float
+    catalog_version_check_seconds: float
+    db_async: bool
+    image_avif: bool
+    upload_max_file_bytes: int
+    upload_max_request_bytes: int
+    compression_min_size: int
+    compression_gzip_level: int
+    compression_brotli_quality: int
+    templates_cache_dir: str
+    templates_auto_reload: bool
 
 
 def get_settings() -> Settings:
@@ -28,6 +39,31 @@ def get_settings() -> Settings:
     cors_raw = os.getenv("CORS_ORIGINS") or "http://localhost:3000,http://localhost:3001"
     cors_origins = [o.strip() for o in cors_raw.split(",") if o.strip()]
 
+    # Как часто воркер сверяет catalog_version в БД (записи других воркеров и CLI
+    # видны не позже чем через столько секунд; 0 = на каждый запрос).
+    catalog_version_check_seconds = float(os.getenv("CATALOG_VERSION_CHECK_SECONDS", "1") or 0)
+    # Необязательный предел возраста snapshot (0 = живёт до изменения catalog_version).
+    catalog_ttl_seconds = float(os.getenv("CATALOG_TTL_SECONDS", "0") or 0)
+
+    db_async = (os.getenv("DB_ASYNC") or "").strip().lower() in ("1", "true", "on", "yes")
+
+    # AVIF кодируется заметно дольше WebP, поэтому включается явно.
+    image_avif = (os.getenv("IMAGE_AVIF") or "").strip().lower() in ("1", "true", "on", "yes")
+
+    # Лимиты загрузок (MB); общий лимит совпадает с client_max_body_size в nginx.
+    upload_max_file_bytes = int(float(os.getenv("UPLOAD_MAX_FILE_MB", "20") or 20) * 1024 * 1024)
+    upload_max_request_bytes = int(float(os.getenv("UPLOAD_MAX_REQUEST_MB", "50") or 50) * 1024 * 1024)
+
+    # Сжатие ответов (br/gzip). COMPRESSION_GZIP_LEVEL=0 выключает middleware.
+    compression_min_size = int(os.getenv("COMPRESSION_MIN_SIZE", "500") or 500)
+    compression_gzip_level = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6") or 0)
+    compression_brotli_quality = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4") or 0)
+
+    # Байткод Jinja-шаблонов (общий для воркеров). Пусто = каталог во временной папке.
+    templates_cache_dir = (os.getenv("TEMPLATES_CACHE_DIR") or "").strip()
+    # Для разработки: перечитывать изменённые шаблоны без рестарта.
+    templates_auto_reload = (os.getenv("TEMPLATES_AUTO_RELOAD") or "").strip().lower() in ("1", "true", "on", "yes")
+
     return Settings(
         database_url=database_url,
         admin_user=admin_user,
@@ -35,5 +71,16 @@ def get_settings() -> Settings:
         secret_key=secret_key,
         frontend_url=frontend_url,
         cors_origins=cors_origins,
+        catalog_ttl_seconds=catalog_ttl_seconds,
+        catalog_version_check_seconds=catalog_version_check_seconds,
+        db_async=db_async,
+        image_avif=image_avif,
+        upload_max_file_bytes=upload_max_file_bytes,
+        upload_max_request_bytes=upload_max_request_bytes,
+        compression_min_size=compression_min_size,
+        compression_gzip_level=compression_gzip_level,
+        compression_brotli_quality=compression_brotli_quality,
+        templates_cache_dir=templates_cache_dir,
+        templates_auto_reload=templates_auto_reload,
     )
 
@@ -0,0 +1,93 @@
+"""
+Catalog export as NDJSON or CSV, streamed row by row.
+
+Rows come from a server-side cursor (`stream_results` + `yield_per`), so
+memory stays flat whatever the table size. With `copy=True` Postgres itself
+formats the output (`COPY ... TO STDOUT`) and the bytes are passed through.
+Columns match the import format (see importer), plus `id`; re-importing an
+export creates new projects.
+"""
+import csv
+import io
+from typing import Iterator
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from .http_cache import encode_json
+from .importer import STAGING_COLUMNS
+
+FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+EXPORT_COLUMNS = ("id",) + STAGING_COLUMNS
+
+# Строк на один fetch серверного курсора (и на один chunk ответа).
+EXPORT_BATCH_SIZE = 500
+
+_TAG_COLUMNS = ("technologies", "genres", "images", "categories")
+
+EXPORT_SQL = f"SELECT {', '.join(EXPORT_COLUMNS)} FROM projects ORDER BY id"
+
+# CSV: списки как "a, b" (как в форме и в импорте), featured как true/false.
+EXPORT_CSV_SQL = "SELECT {} FROM projects ORDER BY id".format(
+    ", ".join(
+        f"array_to_string({c}, ', ') AS {c}" if c in _TAG_COLUMNS else "featured::text AS featured" if c == "featured" else c
+        for c in EXPORT_COLUMNS
+    )
+)
+
+COPY_SQL = {
+    "csv": f"COPY ({EXPORT_CSV_SQL}) TO STDOUT WITH (FORMAT csv, HEADER)",
+    # JSON в CSV-режиме с quote/delimiter, которых в JSON не бывает (управляющие
+    # символы row_to_json экранирует): COPY отдаёт строки как есть, без экранирования
+    # обратных слешей, как сделал бы текстовый формат.
+    "ndjson": (
+        f"COPY (SELECT row_to_json(p) FROM ({EXPORT_SQL}) AS p) TO STDOUT "
+        "WITH (FORMAT csv, QUOTE E'\\x01', DELIMITER E'\\x02')"
+    ),
+}
+
+
+def _rows(engine: Engine, sql: str) -> Iterator[list]:
+    """Batches of row mappings from a server-side cursor."""
+    with engine.connect() as conn:
+        result = conn.execution_options(yield_per=EXPORT_BATCH_SIZE).execute(text(sql))
+        for batch in result.mappings().partitions():
+            yield batch
+
+
+def iter_ndjson(engine: Engine) -> Iterator[bytes]:
+    for batch in _rows(engine, EXPORT_SQL):
+        yield b"".join(encode_json(dict(r)) + b"\n" for r in batch)
+
+
+def iter_csv(engine: Engine) -> Iterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+    writer.writerow(EXPORT_COLUMNS)
+    for batch in _rows(engine, EXPORT_CSV_SQL):
+        writer.writerows(tuple(r.values()) for r in batch)
+        yield buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")
+
+
+def iter_copy(engine: Engine, fmt: str) -> Iterator[bytes]:
+    with engine.connect() as conn:
+        with conn.connection.driver_connection.cursor() as cur:
+            with cur.copy(COPY_SQL[fmt]) as copy:
+                for data in copy:
+                    yield bytes(data)
+
+
+def iter_export(engine: Engine, fmt: str, *, copy: bool = False) -> Iterator[bytes]:
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of: {', '.join(FORMATS)}")
+    if copy:
+        return iter_copy(engine, fmt)
+    return iter_ndjson(engine) if fmt == "ndjson" else iter_csv(engine)
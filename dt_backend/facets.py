@@ -0,0 +1,54 @@
+"""
+Facet counts: how many projects use each technology / genre / category.
+
+One query over `projects`: each project's three tag arrays are unnested once
+into (dimension, name) rows by a LEFT JOIN LATERAL over a UNION ALL, so the
+row count is the number of tags, not the product of the three array lengths.
+Those rows are counted per (dim, name) with GROUPING SETS, plus the empty set
+for the total (COUNT(DISTINCT id): a project appears once per tag, and arrays
+may repeat a tag). The optional ProjectFilter is the same one /api/projects uses.
+"""
+from typing import Any, Dict, List
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from .filters import ProjectFilter
+
+FACET_DIMENSIONS = ("technologies", "genres", "categories")
+
+FACETS_SQL = """
+    SELECT
+      GROUPING(f.dim, f.name) AS grp,
+      f.dim,
+      f.name,
+      COUNT(DISTINCT p.id) AS count
+    FROM projects AS p
+    LEFT JOIN LATERAL (
+      SELECT 'technologies' AS dim, t.name FROM unnest(p.technologies) AS t(name)
+      UNION ALL
+      SELECT 'genres', g.name FROM unnest(p.genres) AS g(name)
+      UNION ALL
+      SELECT 'categories', c.name FROM unnest(p.categories) AS c(name)
+    ) AS f ON TRUE
+    WHERE {where}
+    GROUP BY GROUPING SETS ((f.dim, f.name), ())
+"""
+
+
+def facet_counts(conn: Connection, f: ProjectFilter) -> Dict[str, Any]:
+    """
+    {"total": n, "technologies": [{"name", "count"}, ...], "genres": [...],
+    "categories": [...]}; each list sorted by count desc, then name.
+    """
+    where, params = f.where_sql("p")
+    out: Dict[str, Any] = {"total": 0}
+    buckets: Dict[str, List[Dict[str, Any]]] = {dim: [] for dim in FACET_DIMENSIONS}
+    for row in conn.execute(text(FACETS_SQL.format(where=where)), params):
+        if row.grp:  # (): итог по всем проектам
+            out["total"] = int(row.count)
+        elif row.name:  # NULL: проекты совсем без тегов; '' в массиве не считаем
+            buckets[row.dim].append({"name": row.name, "count": int(row.count)})
+    for dim, items in buckets.items():
+        out[dim] = sorted(items, key=lambda x: (-x["count"], x["name"]))
+    return out
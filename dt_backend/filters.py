@@ -0,0 +1,72 @@
+"""
+Multi-facet project filters (technology / genre / category).
+
+Within one dimension the values are OR-ed (`match="any"`) or AND-ed
+(`match="all"`); dimensions are always AND-ed. The same filter is applied
+in memory against the catalog snapshot and, for queries that hit Postgres
+(search, facets), compiled to `&&` / `@>` on the TEXT[] columns so the GIN
+indexes from migrations can be used.
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+MATCH_MODES = ("any", "all")
+
+# dimension -> projects column
+FILTER_COLUMNS = (
+    ("technologies", "technologies"),
+    ("genres", "genres"),
+    ("categories", "categories"),
+)
+
+
+def _clean(values: Optional[Iterable[str]]) -> Tuple[str, ...]:
+    out: List[str] = []
+    for v in values or []:
+        for part in str(v).split(","):
+            s = part.strip()
+            if s and s != "all" and s not in out:
+                out.append(s)
+    return tuple(sorted(out))
+
+
+@dataclass(frozen=True)
+class ProjectFilter:
+    technologies: Tuple[str, ...] = ()
+    genres: Tuple[str, ...] = ()
+    categories: Tuple[str, ...] = ()
+    match: str = "any"
+
+    @classmethod
+    def from_query(
+        cls,
+        technologies: Optional[Iterable[str]] = None,
+        genres: Optional[Iterable[str]] = None,
+        categories: Optional[Iterable[str]] = None,
+        match: Optional[str] = None,
+    ) -> "ProjectFilter":
+        """Normalizes query values (CSV allowed, "all" ignored). Raises ValueError on bad `match`."""
+        m = (match or "any").strip().lower()
+        if m not in MATCH_MODES:
+            raise ValueError("match must be one of: any, all")
+        return cls(_clean(technologies), _clean(genres), _clean(categories), m)
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.technologies or self.genres or self.categories)
+
+    def where_sql(self, alias: str = "") -> Tuple[str, Dict[str, Any]]:
+        """
+        SQL condition + params, e.g. "technologies && CAST(:f_technologies AS text[])".
+        Returns ("TRUE", {}) for an empty filter.
+        """
+        op = "@>" if self.match == "all" else "&&"
+        prefix = f"{alias}." if alias else ""
+        clauses: List[str] = []
+        params: Dict[str, Any] = {}
+        for dim, column in FILTER_COLUMNS:
+            values = getattr(self, dim)
+            if values:
+                clauses.append(f"{prefix}{column} {op} CAST(:f_{dim} AS text[])")
+                params[f"f_{dim}"] = list(values)
+        return (" AND ".join(clauses) or "TRUE"), params
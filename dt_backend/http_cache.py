@@ -0,0 +1,138 @@
+"""
+HTTP validators (ETag / Last-Modified) for JSON (and pre-rendered HTML) responses.
+
+Bodies are serialized once, hashed into a strong ETag and can be memoized
+(see CatalogSnapshot.response), so a matching If-None-Match costs a hash lookup.
+When compression is enabled (app.state.compression), a CachedBody also keeps
+its br/gzip bytes, so a memoized payload is compressed once, not per request.
+"""
+import hashlib
+import json
+import time
+from dataclasses import dataclass, field
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Dict, Optional
+
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+from starlette.datastructures import MutableHeaders
+
+from .compression import CompressionSettings, add_vary, choose_encoding, compress
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson not installed
+    orjson = None
+
+
+@dataclass(frozen=True)
+class CachedBody:
+    body: bytes
+    etag: str
+    last_modified: float
+    # encoding -> compressed body, filled lazily by encoded().
+    _encoded: Dict[str, bytes] = field(default_factory=dict, compare=False, repr=False)
+
+    def encoded(self, encoding: str, settings: CompressionSettings) -> bytes:
+        data = self._encoded.get(encoding)
+        if data is None:
+            data = self._encoded[encoding] = compress(self.body, encoding, settings)
+        return data
+
+
+def encode_json(content: Any) -> bytes:
+    """
+    Compact UTF-8 JSON, byte-identical to fastapi.responses.JSONResponse.render
+    for the plain dict/list/tuple/str/int/bool/None values ProjectRecord.to_api produces.
+    orjson when installed (several times faster on long descriptions).
+    """
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """Default response class of the public router: encode_json instead of stdlib json."""
+
+    def render(self, content: Any) -> bytes:
+        return encode_json(content)
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def cached_bytes(body: bytes, last_modified: Optional[float] = None) -> CachedBody:
+    return CachedBody(body=body, etag=make_etag(body), last_modified=time.time() if last_modified is None else last_modified)
+
+
+def cached_body(content: Any, last_modified: Optional[float] = None) -> CachedBody:
+    return cached_bytes(encode_json(content), last_modified)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    value = if_none_match.strip()
+    if value == "*":
+        return True
+    # Weak comparison (RFC 9110, 13.1.2): W/"x" matches "x".
+    for tag in value.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+
+def is_not_modified(request: Request, etag: str, last_modified: float) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match takes precedence over If-Modified-Since.
+        return _etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(last_modified) <= since
+    return False
+
+
+def validator_headers(etag: str, last_modified: float) -> Dict[str, str]:
+    return {
+        "ETag": etag,
+        "Last-Modified": formatdate(last_modified, usegmt=True),
+        # Кэшировать можно, но каждый раз с ревалидацией.
+        "Cache-Control": "no-cache",
+    }
+
+
+def json_response(request: Request, cached: CachedBody, headers: Optional[Dict[str, str]] = None) -> Response:
+    return cached_response(request, cached, media_type="application/json", headers=headers)
+
+
+def cached_response(
+    request: Request, cached: CachedBody, *, media_type: str, headers: Optional[Dict[str, str]] = None
+) -> Response:
+    headers = {**validator_headers(cached.etag, cached.last_modified), **(headers or {})}
+
+    body, encoding = cached.body, None
+    settings: Optional[CompressionSettings] = getattr(request.app.state, "compression", None)
+    if settings is not None:
+        vary = MutableHeaders(headers)
+        add_vary(vary, "Accept-Encoding")
+        headers["Vary"] = vary["vary"]
+        if len(cached.body) >= settings.minimum_size:
+            encoding = choose_encoding(request.headers.get("accept-encoding"))
+        if encoding is not None:
+            # Same weak ETag as CompressionMiddleware would produce.
+            headers["ETag"] = f"W/{cached.etag}"
+
+    if request.method in ("GET", "HEAD") and is_not_modified(request, cached.etag, cached.last_modified):
+        return Response(status_code=304, headers=headers)
+    if encoding is not None:
+        body = cached.encoded(encoding, settings)
+        headers["Content-Encoding"] = encoding
+    return Response(body, media_type=media_type, headers=headers)
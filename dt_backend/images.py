@@ -0,0 +1,136 @@
+"""
+Upload-time image derivatives.
+
+Every uploaded image gets a fixed set of downscaled WebP (and optionally AVIF)
+variants stored next to the original as `<name>.w<width>.<ext>`. Their pixel
+sizes are recorded in `upload_variants`, and ProjectRecord.to_api exposes them as
+`imageSrcset` / `imagesSrcset`. Pillow is optional: without it uploads are
+stored as before and no variants are produced.
+"""
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:  # pragma: no cover - Pillow not installed
+    Image = None  # type: ignore[assignment]
+
+log = logging.getLogger(__name__)
+
+VARIANT_WIDTHS = (320, 640, 1280)
+WEBP_QUALITY = 78
+AVIF_QUALITY = 55
+
+UPLOADS_URL_PREFIX = "/static/uploads/"
+
+
+@dataclass(frozen=True)
+class ImageVariant:
+    url: str
+    width: int
+    height: int
+    mime: str
+
+    def to_api(self) -> Dict[str, Any]:
+        return {"url": self.url, "width": self.width, "height": self.height, "type": self.mime}
+
+
+def avif_supported() -> bool:
+    return Image is not None and bool(features.check("avif"))
+
+
+def variant_files(original: Path) -> List[Path]:
+    """Derivative files that belong to `original` (for deletion)."""
+    return sorted(original.parent.glob(f"{original.name}.w*.*"))
+
+
+def make_variants(original: Path, url: str, *, avif: bool = False) -> List[ImageVariant]:
+    """
+    Writes the derivatives of `original` and returns them. Blocking (CPU + disk):
+    call from a worker thread. Images narrower than a target width are not
+    upscaled; a single variant at the original width is made instead.
+    """
+    if Image is None:
+        return []
+
+    formats = [("webp", "image/webp", {"quality": WEBP_QUALITY, "method": 4})]
+    if avif and avif_supported():
+        formats.append(("avif", "image/avif", {"quality": AVIF_QUALITY}))
+
+    try:
+        with Image.open(original) as im:
+            im = ImageOps.exif_transpose(im)
+            if im.mode not in ("RGB", "RGBA"):
+                im = im.convert("RGBA" if "A" in im.getbands() or "transparency" in im.info else "RGB")
+
+            widths = sorted({min(w, im.width) for w in VARIANT_WIDTHS})
+            out: List[ImageVariant] = []
+            for width in widths:
+                height = max(1, round(im.height * width / im.width))
+                resized = im if width == im.width else im.resize((width, height), Image.Resampling.LANCZOS)
+                for ext, mime, opts in formats:
+                    dest = original.with_name(f"{original.name}.w{width}.{ext}")
+                    resized.save(dest, format=ext.upper(), **opts)
+                    out.append(ImageVariant(f"{url}.w{width}.{ext}", width, height, mime))
+            return out
+    except Exception:
+        # Не картинка или битый файл: оригинал остаётся, просто без вариантов.
+        log.warning("image variants failed for %s", original, exc_info=True)
+        return []
+
+
+def record_variants(conn: Connection, source: str, variants: Sequence[ImageVariant]) -> None:
+    conn.execute(text("DELETE FROM upload_variants WHERE source = :source"), {"source": source})
+    if variants:
+        conn.execute(
+            text(
+                """
+                INSERT INTO upload_variants (source, url, width, height, mime)
+                VALUES (:source, :url, :width, :height, :mime)
+                ON CONFLICT (url) DO UPDATE SET
+                  source = EXCLUDED.source,
+                  width = EXCLUDED.width,
+                  height = EXCLUDED.height,
+                  mime = EXCLUDED.mime
+                """
+            ),
+            [{"source": source, "url": v.url, "width": v.width, "height": v.height, "mime": v.mime} for v in variants],
+        )
+
+
+def load_variants(conn: Connection, sources: Optional[Iterable[str]] = None) -> Dict[str, List[Dict[str, Any]]]:
+    """source URL -> srcset entries (smallest first). All sources when `sources` is None."""
+    sql = "SELECT source, url, width, height, mime FROM upload_variants"
+    params: Dict[str, Any] = {}
+    if sources is not None:
+        params["sources"] = [s for s in dict.fromkeys(sources) if s]
+        if not params["sources"]:
+            return {}
+        sql += " WHERE source = ANY(:sources)"
+    sql += " ORDER BY source, width, mime DESC"
+
+    out: Dict[str, List[Dict[str, Any]]] = {}
+    for r in conn.execute(text(sql), params).mappings():
+        out.setdefault(r["source"], []).append(
+            ImageVariant(r["url"], int(r["width"]), int(r["height"]), r["mime"]).to_api()
+        )
+    return out
+
+
+def delete_variants(conn: Connection, uploads_dir: Path, source: str) -> None:
+    """Removes the derivative files and rows of an uploaded original (best-effort on files)."""
+    if not source.startswith(UPLOADS_URL_PREFIX):
+        return
+    original = uploads_dir / source[len(UPLOADS_URL_PREFIX):]
+    for f in variant_files(original):
+        try:
+            f.unlink()
+        except OSError:
+            pass
+    conn.execute(text("DELETE FROM upload_variants WHERE source = :source"), {"source": source})
+
@@ -0,0 +1,235 @@
+"""
+Bulk project import (CSV or JSONL).
+
+Records are validated and normalized the same way the admin form does it
+(descriptions through sanitize_rich_text_html, tag lists through
+parse_tech_input, primary category first in `categories`) and streamed with
+COPY into a temporary staging table. The merge is set-based and runs in the
+caller's transaction: unknown technologies/genres/categories are upserted,
+projects are inserted in file order, upload references and site_stats are
+updated. Any invalid record rejects the whole file.
+
+CSV: header row with the column names below; list columns as "a, b" or
+"{a,b}". JSONL: one object per line; list columns as arrays or strings.
+"""
+import csv
+import io
+import json
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from .stats import refresh_site_stats
+from .uploads import UPLOADS_URL_PREFIX
+from .utils import parse_tech_input, sanitize_rich_text_html
+
+FORMATS = ("csv", "jsonl")
+
+REQUIRED_FIELDS = (
+    "title_ru",
+    "title_kz",
+    "title_en",
+    "description_ru",
+    "description_kz",
+    "description_en",
+)
+
+# Сколько ошибок валидации возвращать (остальные только считаются).
+MAX_REPORTED_ERRORS = 50
+
+STAGING_COLUMNS = REQUIRED_FIELDS + (
+    "technologies",
+    "genres",
+    "image",
+    "images",
+    "category",
+    "categories",
+    "featured",
+    "project_url",
+)
+STAGING_TYPES = ["int4"] + ["text"] * 6 + ["text[]", "text[]", "text", "text[]", "text", "text[]", "bool", "text"]
+
+CREATE_STAGING_SQL = """
+    CREATE TEMP TABLE project_import (
+      line INTEGER NOT NULL,
+      title_ru TEXT NOT NULL,
+      title_kz TEXT NOT NULL,
+      title_en TEXT NOT NULL,
+      description_ru TEXT NOT NULL,
+      description_kz TEXT NOT NULL,
+      description_en TEXT NOT NULL,
+      technologies TEXT[] NOT NULL,
+      genres TEXT[] NOT NULL,
+      image TEXT NOT NULL,
+      images TEXT[] NOT NULL,
+      category TEXT NOT NULL,
+      categories TEXT[] NOT NULL,
+      featured BOOLEAN NOT NULL,
+      project_url TEXT NOT NULL
+    ) ON COMMIT DROP
+"""
+
+UPSERT_TAGS_SQL = """
+    INSERT INTO {table} (name)
+    SELECT DISTINCT v FROM project_import, unnest({column}) AS v
+    ON CONFLICT (name) DO NOTHING
+"""
+
+MERGE_SQL = f"""
+    WITH inserted AS (
+      INSERT INTO projects (
+        title_ru, title_kz, title_en,
+        description_ru, description_kz, description_en,
+        technologies, genres, image, images, category, categories, featured, project_url
+      )
+      SELECT
+        title_ru, title_kz, title_en,
+        description_ru, description_kz, description_en,
+        technologies, genres, image, images, category, categories, featured, project_url
+      FROM project_import
+      ORDER BY line
+      RETURNING id, image, images
+    ),
+    refs AS (
+      INSERT INTO upload_refs (url, project_id)
+      SELECT DISTINCT u.url, i.id
+      FROM inserted i, unnest(array_append(i.images, i.image)) AS u(url)
+      WHERE u.url LIKE '{UPLOADS_URL_PREFIX}%'
+      ON CONFLICT DO NOTHING
+    )
+    SELECT COUNT(*) FROM inserted
+"""
+
+
+class ProjectImportError(ValueError):
+    """The file was rejected; `errors` are "line N: ..." messages."""
+
+    def __init__(self, errors: List[str], total: Optional[int] = None) -> None:
+        total = len(errors) if total is None else total
+        super().__init__(f"{total} invalid record(s): " + "; ".join(errors[:3]))
+        self.errors = errors
+        self.total = total
+
+
+def detect_format(filename: Optional[str], content_type: Optional[str] = None) -> Optional[str]:
+    name = (filename or "").lower()
+    ctype = (content_type or "").split(";")[0].strip().lower()
+    if name.endswith(".csv") or ctype == "text/csv":
+        return "csv"
+    if name.endswith((".jsonl", ".ndjson")) or ctype in ("application/jsonl", "application/x-ndjson"):
+        return "jsonl"
+    return None
+
+
+def _truthy(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    if value is None:
+        return False
+    return str(value).strip().lower() in ("1", "true", "on", "yes")
+
+
+def _records(stream: IO[bytes], fmt: str) -> Iterator[Tuple[int, Any]]:
+    """(line number, record) pairs; a record that cannot be parsed is yielded as an exception."""
+    lines = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        for record in reader:
+            yield reader.line_num, record
+        return
+
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            yield number, json.loads(line)
+        except json.JSONDecodeError as e:
+            yield number, ValueError(f"invalid JSON: {e.msg}")
+
+
+def normalize_record(record: Any) -> Tuple[Any, ...]:
+    """Import record -> staging row (without `line`). Raises ValueError."""
+    if isinstance(record, Exception):
+        raise record
+    if not isinstance(record, dict):
+        raise ValueError("expected an object")
+
+    def field(name: str) -> str:
+        value = record.get(name)
+        return "" if value is None else str(value).strip()
+
+    missing = [name for name in REQUIRED_FIELDS if not field(name)]
+    if missing:
+        raise ValueError("missing " + ", ".join(missing))
+
+    categories = parse_tech_input(record.get("categories"))
+    if not categories:
+        categories = [field("category") or "web"]
+    image = field("image")
+    images = list(dict.fromkeys(([image] if image else []) + parse_tech_input(record.get("images"))))
+
+    return (
+        field("title_ru"),
+        field("title_kz"),
+        field("title_en"),
+        sanitize_rich_text_html(record.get("description_ru")),
+        sanitize_rich_text_html(record.get("description_kz")),
+        sanitize_rich_text_html(record.get("description_en")),
+        list(dict.fromkeys(parse_tech_input(record.get("technologies")))),
+        list(dict.fromkeys(parse_tech_input(record.get("genres")))),
+        image,
+        images,
+        categories[0],
+        list(dict.fromkeys(categories)),
+        _truthy(record.get("featured")),
+        field("project_url"),
+    )
+
+
+def import_projects(conn: Connection, stream: IO[bytes], fmt: str) -> Dict[str, int]:
+    """
+    Imports `stream` inside the transaction of `conn` (the caller commits and
+    invalidates the catalog). Raises ProjectImportError if any record is
+    invalid; nothing is written then.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of: {', '.join(FORMATS)}")
+
+    conn.execute(text(CREATE_STAGING_SQL))
+
+    errors: List[str] = []
+    failed = 0
+    staged = 0
+    with conn.connection.driver_connection.cursor() as cur:
+        with cur.copy(f"COPY project_import (line, {', '.join(STAGING_COLUMNS)}) FROM STDIN") as copy:
+            copy.set_types(STAGING_TYPES)
+            try:
+                for line, record in _records(stream, fmt):
+                    try:
+                        row = normalize_record(record)
+                    except ValueError as e:
+                        failed += 1
+                        if len(errors) < MAX_REPORTED_ERRORS:
+                            errors.append(f"line {line}: {e}")
+                        continue
+                    # После первой ошибки файл всё равно отклонён: дальше только валидируем.
+                    if not failed:
+                        copy.write_row((line,) + row)
+                    staged += 1
+            except (UnicodeDecodeError, csv.Error) as e:
+                raise ProjectImportError([f"unreadable {fmt}: {e}"])
+
+    if failed:
+        raise ProjectImportError(errors, failed)
+    if not staged:
+        raise ProjectImportError(["no records"])
+
+    # Новые значения справочников (столбец staging-таблицы называется так же, как таблица).
+    added = {
+        table: conn.execute(text(UPSERT_TAGS_SQL.format(table=table, column=table))).rowcount
+        for table in ("technologies", "genres", "categories")
+    }
+    imported = conn.execute(text(MERGE_SQL)).scalar_one()
+    refresh_site_stats(conn)
+    return {"imported": int(imported), **added}
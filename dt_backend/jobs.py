@@ -0,0 +1,244 @@
+"""
+Admin background jobs (upload cleanup, GC, ...), persisted in `admin_jobs`.
+
+A job runs after the response via FastAPI BackgroundTasks; the handler returns
+its id right away and the admin UI polls /api/admin/jobs/{id} for progress.
+Status, progress and the result are stored in the database, so any worker
+answers the poll and a finished job survives a restart. At most one job of a
+kind is active at a time (a partial unique index): submitting again while it
+is queued or running returns the same job.
+
+Progress is written at most every JOB_PROGRESS_INTERVAL seconds and doubles as
+a heartbeat. An active job whose heartbeat is older than `stale_seconds` (its
+worker died or was restarted) is marked failed, which frees its kind.
+"""
+import logging
+import secrets
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from .http_cache import encode_json
+
+log = logging.getLogger(__name__)
+
+# Сколько завершённых задач хранить (для GET /api/admin/jobs).
+MAX_FINISHED_JOBS = 50
+
+# Как часто job.report() пишет прогресс в БД (он же heartbeat).
+JOB_PROGRESS_INTERVAL = 1.0
+
+# Активная задача без heartbeat дольше этого считается прерванной.
+JOB_STALE_SECONDS = 15 * 60
+
+ACTIVE_STATUSES = ("queued", "running")
+
+JOB_COLUMNS = """
+    id, kind, status, progress, result, error,
+    EXTRACT(EPOCH FROM created_at)::float8 AS created_at,
+    EXTRACT(EPOCH FROM started_at)::float8 AS started_at,
+    EXTRACT(EPOCH FROM finished_at)::float8 AS finished_at
+"""
+
+
+def _json(value: Any) -> Optional[str]:
+    return None if value is None else encode_json(value).decode("utf-8")
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    status: str = "queued"
+    progress: Dict[str, Any] = field(default_factory=dict)
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    # Set by JobRegistry.run: persists progress (throttled).
+    on_progress: Optional[Callable[["Job"], None]] = field(default=None, repr=False, compare=False)
+
+    @classmethod
+    def from_row(cls, row: Mapping[str, Any]) -> "Job":
+        return cls(
+            id=row["id"],
+            kind=row["kind"],
+            status=row["status"],
+            progress=dict(row["progress"] or {}),
+            result=row["result"],
+            error=row["error"],
+            created_at=row["created_at"],
+            started_at=row["started_at"],
+            finished_at=row["finished_at"],
+        )
+
+    @property
+    def active(self) -> bool:
+        return self.status in ACTIVE_STATUSES
+
+    def report(self, **progress: Any) -> None:
+        """Called by the job function; replaces the given progress counters."""
+        self.progress = {**self.progress, **progress}
+        if self.on_progress is not None:
+            self.on_progress(self)
+
+    def to_api(self) -> Dict[str, Any]:
+        return {
+            "jobId": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "progress": self.progress,
+            "result": self.result,
+            "error": self.error,
+            "createdAt": self.created_at,
+            "startedAt": self.started_at,
+            "finishedAt": self.finished_at,
+        }
+
+
+JobFunc = Callable[[Job], Dict[str, Any]]
+
+
+class JobRegistry:
+    def __init__(
+        self,
+        engine: Engine,
+        max_finished: int = MAX_FINISHED_JOBS,
+        stale_seconds: float = JOB_STALE_SECONDS,
+        progress_interval: float = JOB_PROGRESS_INTERVAL,
+    ) -> None:
+        self._engine = engine
+        self._max_finished = max_finished
+        self._stale_seconds = stale_seconds
+        self._progress_interval = progress_interval
+
+    def _expire_stale(self, conn: Connection) -> None:
+        conn.execute(
+            text(
+                """
+                UPDATE admin_jobs
+                SET status = 'failed', error = 'interrupted: the worker running it stopped', finished_at = now()
+                WHERE status IN ('queued', 'running')
+                  AND heartbeat_at < now() - make_interval(secs => :stale)
+                """
+            ),
+            {"stale": self._stale_seconds},
+        )
+
+    def submit(self, kind: str) -> Tuple[Job, bool]:
+        """(job, created). Returns the active job of `kind` if there is one."""
+        with self._engine.begin() as conn:
+            self._expire_stale(conn)
+            # Активная задача могла завершиться между INSERT и SELECT — тогда пробуем снова.
+            while True:
+                row = conn.execute(
+                    text(
+                        f"""
+                        INSERT INTO admin_jobs (id, kind) VALUES (:id, :kind)
+                        ON CONFLICT (kind) WHERE status IN ('queued', 'running') DO NOTHING
+                        RETURNING {JOB_COLUMNS}
+                        """
+                    ),
+                    {"id": secrets.token_hex(8), "kind": kind},
+                ).mappings().first()
+                if row is not None:
+                    self._prune(conn)
+                    return Job.from_row(row), True
+                row = conn.execute(
+                    text(
+                        f"""
+                        SELECT {JOB_COLUMNS} FROM admin_jobs
+                        WHERE kind = :kind AND status IN ('queued', 'running')
+                        """
+                    ),
+                    {"kind": kind},
+                ).mappings().first()
+                if row is not None:
+                    return Job.from_row(row), False
+
+    def run(self, job: Job, func: JobFunc) -> None:
+        """Runs `func(job)` and records the outcome; never raises."""
+        job.status = "running"
+        job.started_at = time.time()
+        last_saved = time.monotonic()
+        lock = threading.Lock()
+
+        def save_progress(j: Job) -> None:
+            nonlocal last_saved
+            with lock:
+                if time.monotonic() - last_saved < self._progress_interval:
+                    return
+                last_saved = time.monotonic()
+            self._save(j, "progress = CAST(:progress AS jsonb)")
+
+        try:
+            self._save(job, "status = 'running', started_at = now()")
+            job.on_progress = save_progress
+            job.result = func(job)
+            job.status = "done"
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+            job.status = "failed"
+            log.exception("job %s (%s) failed", job.id, job.kind)
+        finally:
+            job.on_progress = None
+            job.finished_at = time.time()
+            self._save(
+                job,
+                "status = :status, progress = CAST(:progress AS jsonb), result = CAST(:result AS jsonb), "
+                "error = :error, finished_at = now()",
+            )
+
+    def _save(self, job: Job, assignments: str) -> None:
+        # Ошибка записи статуса не должна ронять фоновую задачу.
+        try:
+            with self._engine.begin() as conn:
+                conn.execute(
+                    text(f"UPDATE admin_jobs SET {assignments}, heartbeat_at = now() WHERE id = :id"),
+                    {
+                        "id": job.id,
+                        "status": job.status,
+                        "progress": _json(job.progress),
+                        "result": _json(job.result),
+                        "error": job.error,
+                    },
+                )
+        except Exception:
+            log.exception("could not save job %s (%s)", job.id, job.kind)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._engine.begin() as conn:
+            self._expire_stale(conn)
+            row = conn.execute(
+                text(f"SELECT {JOB_COLUMNS} FROM admin_jobs WHERE id = :id"), {"id": job_id}
+            ).mappings().first()
+        return Job.from_row(row) if row is not None else None
+
+    def list(self) -> List[Job]:
+        with self._engine.begin() as conn:
+            self._expire_stale(conn)
+            rows = conn.execute(
+                text(f"SELECT {JOB_COLUMNS} FROM admin_jobs ORDER BY created_at DESC")
+            ).mappings().all()
+        return [Job.from_row(r) for r in rows]
+
+    def _prune(self, conn: Connection) -> None:
+        conn.execute(
+            text(
+                """
+                DELETE FROM admin_jobs
+                WHERE id IN (
+                  SELECT id FROM admin_jobs
+                  WHERE status NOT IN ('queued', 'running')
+                  ORDER BY created_at DESC
+                  OFFSET :keep
+                )
+                """
+            ),
+            {"keep": self._max_finished},
+        )
@@ -0,0 +1,457 @@
+"""
+Versioned schema migrations (replaces the DDL that ensure_schema ran on every boot).
+
+Applied versions are recorded in `schema_version`. migrate() first reads the
+current version without any lock; when nothing is pending (the usual boot)
+it returns right away. Otherwise it takes a Postgres advisory lock, so exactly
+one process applies the pending steps. At startup (`wait=False`) the other
+workers do not wait for it unless the database has no schema yet; the CLI
+(`python -m dt_backend.cli migrate`) waits.
+
+The lock is held by a separate autocommit connection that keeps no snapshot,
+and waiting processes poll pg_try_advisory_lock instead of blocking in
+pg_advisory_lock. `CREATE INDEX CONCURRENTLY` (non-transactional steps)
+waits for every open snapshot, and a statement blocked on the lock would
+keep one until the migration finishes: a deadlock. Transactional steps record their version in the same
+transaction; a non-transactional step is recorded after it completes and
+must therefore be safe to re-run (IF NOT EXISTS, invalid indexes rebuilt).
+A step that cannot run yet (pg_trgm not installed) raises MigrationDeferred:
+it is not recorded, the following steps still run, and every later migrate()
+retries it.
+
+Version 1 is the former ensure_schema without its indexes; every statement
+in it is idempotent, so it also adopts databases created before migrations
+(or by db/init/001_schema.sql).
+"""
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import DBAPIError
+
+from .search import SEARCH_CONFIGS
+from .stats import DEFAULT_STUDENTS, refresh_site_stats
+
+log = logging.getLogger(__name__)
+
+# Ключ pg_advisory_lock для миграций (любое фиксированное число, общее для всех процессов).
+SCHEMA_LOCK_ID = 0x64745F6D
+LOCK_POLL_SECONDS = 0.2
+
+SCHEMA_VERSION_SQL = """
+    CREATE TABLE IF NOT EXISTS schema_version (
+      version INTEGER PRIMARY KEY,
+      name TEXT NOT NULL,
+      applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    )
+"""
+
+
+class MigrationDeferred(Exception):
+    """A migration step cannot run yet (e.g. a missing extension); it stays pending."""
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    apply: Callable[[Connection], None]
+    # False: выполняется вне транзакции (CREATE INDEX CONCURRENTLY).
+    transactional: bool = True
+
+
+def _baseline(conn: Connection) -> None:
+    conn.execute(
+        text(
+            """
+            CREATE TABLE IF NOT EXISTS categories (
+              id SERIAL PRIMARY KEY,
+              name TEXT NOT NULL UNIQUE
+            );
+            """
+        )
+    )
+
+    # Мультиязычные названия категорий (name = код/slug).
+    conn.execute(text("ALTER TABLE categories ADD COLUMN IF NOT EXISTS name_ru TEXT NOT NULL DEFAULT ''"))
+    conn.execute(text("ALTER TABLE categories ADD COLUMN IF NOT EXISTS name_kz TEXT NOT NULL DEFAULT ''"))
+    conn.execute(text("ALTER TABLE categories ADD COLUMN IF NOT EXISTS name_en TEXT NOT NULL DEFAULT ''"))
+
+    conn.execute(
+        text(
+            """
+            CREATE TABLE IF NOT EXISTS genres (
+              id SERIAL PRIMARY KEY,
+              name TEXT NOT NULL UNIQUE
+            );
+            """
+        )
+    )
+    conn.execute(
+        text(
+            """
+            CREATE TABLE IF NOT EXISTS projects (
+              id SERIAL PRIMARY KEY,
+
+              title_ru TEXT NOT NULL,
+              title_kz TEXT NOT NULL,
+              title_en TEXT NOT NULL,
+
+              description_ru TEXT NOT NULL,
+              description_kz TEXT NOT NULL,
+              description_en TEXT NOT NULL,
+
+              technologies TEXT[] NOT NULL DEFAULT '{}',
+              genres TEXT[] NOT NULL DEFAULT '{}',
+
+              image TEXT NOT NULL DEFAULT '',
+              images TEXT[] NOT NULL DEFAULT '{}',
+              category TEXT NOT NULL DEFAULT 'web',
+              categories TEXT[] NOT NULL DEFAULT '{}',
+              featured BOOLEAN NOT NULL DEFAULT FALSE,
+
+              project_url TEXT NOT NULL DEFAULT ''
+            );
+            """
+        )
+    )
+
+    # Если projects уже есть (например, после старой версии схемы) — добавим недостающие поля.
+    conn.execute(text("ALTER TABLE projects ADD COLUMN IF NOT EXISTS genres TEXT[] NOT NULL DEFAULT '{}'"))
+    conn.execute(text("ALTER TABLE projects ADD COLUMN IF NOT EXISTS categories TEXT[] NOT NULL DEFAULT '{}'"))
+    conn.execute(text("ALTER TABLE projects ADD COLUMN IF NOT EXISTS images TEXT[] NOT NULL DEFAULT '{}'"))
+
+    # Основная категория всегда входит в categories: тогда фильтр по категории —
+    # это `categories && ...` и он идёт по GIN-индексу.
+    conn.execute(
+        text(
+            """
+            UPDATE projects
+            SET categories = array_prepend(category, categories)
+            WHERE category <> '' AND NOT (category = ANY(categories))
+            """
+        )
+    )
+
+    # Полнотекстовый поиск: tsvector на каждый язык (заголовок — вес A,
+    # описание без HTML-тегов — вес B); GIN-индексы — в версии 2.
+    for lang, config in SEARCH_CONFIGS.items():
+        conn.execute(
+            text(
+                f"""
+                ALTER TABLE projects ADD COLUMN IF NOT EXISTS search_{lang} tsvector
+                GENERATED ALWAYS AS (
+                  setweight(to_tsvector('{config}'::regconfig, coalesce(title_{lang}, '')), 'A') ||
+                  setweight(
+                    to_tsvector('{config}'::regconfig, regexp_replace(coalesce(description_{lang}, ''), '<[^>]*>', ' ', 'g')),
+                    'B'
+                  )
+                ) STORED
+                """
+            )
+        )
+
+    conn.execute(
+        text(
+            """
+            CREATE TABLE IF NOT EXISTS technologies (
+              id SERIAL PRIMARY KEY,
+              name TEXT NOT NULL UNIQUE
+            );
+            """
+        )
+    )
+
+    # Уменьшенные копии загруженных картинок (WebP/AVIF) и их размеры в пикселях.
+    conn.execute(
+        text(
+            """
+            CREATE TABLE IF NOT EXISTS upload_variants (
+              url TEXT PRIMARY KEY,
+              source TEXT NOT NULL,
+              width INTEGER NOT NULL,
+              height INTEGER NOT NULL,
+              mime TEXT NOT NULL
+            );
+            """
+        )
+    )
+
+    # Загрузки хранятся по SHA-256 содержимого; upload_refs - какие проекты их используют.
+    conn.execute(
+        text(
+            """
+            CREATE TABLE IF NOT EXISTS upload_blobs (
+              sha256 TEXT PRIMARY KEY,
+              url TEXT NOT NULL UNIQUE,
+              size BIGINT NOT NULL,
+              mime TEXT NOT NULL,
+              created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            );
+            """
+        )
+    )
+    conn.execute(
+        text(
+            """
+            CREATE TABLE IF NOT EXISTS upload_refs (
+              url TEXT NOT NULL,
+              project_id INTEGER NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
+              PRIMARY KEY (url, project_id)
+            );
+            """
+        )
+    )
+    # Ссылки для проектов, сохранённых до появления upload_refs (в т.ч. старые token_hex-имена).
+    conn.execute(
+        text(
+            """
+            INSERT INTO upload_refs (url, project_id)
+            SELECT DISTINCT u.url, p.id
+            FROM projects p, unnest(array_append(p.images, p.image)) AS u(url)
+            WHERE u.url LIKE '/static/uploads/%'
+            ON CONFLICT DO NOTHING
+            """
+        )
+    )
+
+    # Счётчики для /api/stats (одна строка), пересчитываются при записи проектов.
+    conn.execute(
+        text(
+            f"""
+            CREATE TABLE IF NOT EXISTS site_stats (
+              id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+              projects INTEGER NOT NULL DEFAULT 0,
+              technologies INTEGER NOT NULL DEFAULT 0,
+              students INTEGER NOT NULL DEFAULT {DEFAULT_STUDENTS},
+              updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            );
+            """
+        )
+    )
+    conn.execute(text("INSERT INTO site_stats (id) VALUES (TRUE) ON CONFLICT (id) DO NOTHING"))
+    refresh_site_stats(conn)
+
+    # Базовые категории (если хотите свои — добавляйте/удаляйте в /admin/categories).
+    conn.execute(
+        text(
+            """
+            INSERT INTO categories (name, name_ru, name_kz, name_en) VALUES
+              ('aiml', 'AI/ML', 'AI/ML', 'AI/ML'),
+              ('iot', 'IoT', 'IoT', 'IoT'),
+              ('web', 'Web', 'Web', 'Web'),
+              ('mobile', 'Mobile', 'Mobile', 'Mobile'),
+              ('vrar', 'VR/AR', 'VR/AR', 'VR/AR')
+            ON CONFLICT (name) DO UPDATE SET
+              name_ru = EXCLUDED.name_ru,
+              name_kz = EXCLUDED.name_kz,
+              name_en = EXCLUDED.name_en;
+            """
+        )
+    )
+
+
+def create_index_concurrently(conn: Connection, name: str, definition: str) -> None:
+    """
+    `CREATE INDEX CONCURRENTLY IF NOT EXISTS name ON definition` (autocommit `conn`).
+    An INVALID index left by an interrupted build is dropped and built again.
+    """
+    invalid = conn.execute(
+        text(
+            """
+            SELECT NOT i.indisvalid
+            FROM pg_index i
+            WHERE i.indexrelid = to_regclass(:name)
+            """
+        ),
+        {"name": name},
+    ).scalar()
+    if invalid:
+        log.warning("rebuilding invalid index %s", name)
+        conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+    conn.execute(text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {definition}"))
+
+
+def _indexes(conn: Connection) -> None:
+    # Ключ сортировки каталога (featured DESC, id ASC) — для keyset-пагинации.
+    create_index_concurrently(conn, "projects_featured_id_idx", "projects (featured DESC, id ASC)")
+    # GIN по тегам: фильтры `&&` (любой) и `@>` (все).
+    for column in ("technologies", "genres", "categories"):
+        create_index_concurrently(conn, f"projects_{column}_gin", f"projects USING GIN ({column})")
+    for lang in SEARCH_CONFIGS:
+        create_index_concurrently(conn, f"projects_search_{lang}_gin", f"projects USING GIN (search_{lang})")
+    create_index_concurrently(conn, "upload_variants_source_idx", "upload_variants (source)")
+    create_index_concurrently(conn, "upload_refs_project_idx", "upload_refs (project_id)")
+
+
+def _trigram_indexes(conn: Connection) -> None:
+    # Триграммы для опечаток в заголовках. pg_trgm может быть недоступен
+    # (нет contrib / прав) — тогда поиск работает только по tsvector, а версия
+    # не записывается: индексы создадутся при первом migrate() после установки.
+    try:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    except DBAPIError as e:
+        raise MigrationDeferred(f"pg_trgm is not available: {e.orig}") from e
+    for lang in SEARCH_CONFIGS:
+        create_index_concurrently(
+            conn, f"projects_title_{lang}_trgm", f"projects USING GIN (lower(title_{lang}) gin_trgm_ops)"
+        )
+
+
+# Таблицы, из которых собирается CatalogSnapshot (catalog.build_snapshot).
+CATALOG_TABLES = ("projects", "categories", "technologies", "genres", "site_stats", "upload_variants")
+
+
+def _catalog_version(conn: Connection) -> None:
+    # Версия каталога, общая для всех воркеров: триггеры увеличивают её в той же
+    # транзакции, что и запись (админка, CLI import, GC загрузок, ручной SQL).
+    conn.execute(
+        text(
+            """
+            CREATE TABLE IF NOT EXISTS catalog_version (
+              id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+              version BIGINT NOT NULL DEFAULT 0
+            );
+            """
+        )
+    )
+    conn.execute(text("INSERT INTO catalog_version (id) VALUES (TRUE) ON CONFLICT (id) DO NOTHING"))
+    conn.execute(
+        text(
+            """
+            CREATE OR REPLACE FUNCTION bump_catalog_version() RETURNS trigger
+            LANGUAGE plpgsql AS $$
+            BEGIN
+              UPDATE catalog_version SET version = version + 1;
+              RETURN NULL;
+            END
+            $$;
+            """
+        )
+    )
+    for table in CATALOG_TABLES:
+        conn.execute(text(f"DROP TRIGGER IF EXISTS {table}_catalog_version ON {table}"))
+        conn.execute(
+            text(
+                f"""
+                CREATE TRIGGER {table}_catalog_version
+                AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}
+                FOR EACH STATEMENT EXECUTE FUNCTION bump_catalog_version()
+                """
+            )
+        )
+
+
+def _admin_jobs(conn: Connection) -> None:
+    # Фоновые задачи админки (jobs.JobRegistry): статус виден любому воркеру и после рестарта.
+    conn.execute(
+        text(
+            """
+            CREATE TABLE IF NOT EXISTS admin_jobs (
+              id TEXT PRIMARY KEY,
+              kind TEXT NOT NULL,
+              status TEXT NOT NULL DEFAULT 'queued',
+              progress JSONB NOT NULL DEFAULT '{}',
+              result JSONB,
+              error TEXT,
+              created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+              started_at TIMESTAMPTZ,
+              finished_at TIMESTAMPTZ,
+              heartbeat_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            );
+            """
+        )
+    )
+    # Не больше одной активной задачи каждого вида (на все воркеры).
+    conn.execute(
+        text(
+            """
+            CREATE UNIQUE INDEX IF NOT EXISTS admin_jobs_active_kind
+            ON admin_jobs (kind) WHERE status IN ('queued', 'running')
+            """
+        )
+    )
+    conn.execute(text("CREATE INDEX IF NOT EXISTS admin_jobs_created_idx ON admin_jobs (created_at DESC)"))
+
+
+MIGRATIONS: Tuple[Migration, ...] = (
+    Migration(1, "baseline", _baseline),
+    Migration(2, "catalog indexes", _indexes, transactional=False),
+    Migration(3, "title trigram indexes", _trigram_indexes, transactional=False),
+    Migration(4, "catalog version", _catalog_version),
+    Migration(5, "admin jobs", _admin_jobs),
+)
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def applied_versions(conn: Connection) -> List[int]:
+    if conn.execute(text("SELECT to_regclass('schema_version')")).scalar() is None:
+        return []
+    return list(conn.execute(text("SELECT version FROM schema_version ORDER BY version")).scalars())
+
+
+def pending_migrations(conn: Connection) -> List[Migration]:
+    done = set(applied_versions(conn))
+    return [m for m in MIGRATIONS if m.version not in done]
+
+
+def _apply(engine: Engine, migration: Migration) -> None:
+    record = text("INSERT INTO schema_version (version, name) VALUES (:version, :name) ON CONFLICT DO NOTHING")
+    params = {"version": migration.version, "name": migration.name}
+    if migration.transactional:
+        with engine.begin() as conn:
+            migration.apply(conn)
+            conn.execute(record, params)
+        return
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        migration.apply(conn)
+        conn.execute(record, params)
+
+
+def _try_lock(conn: Connection) -> bool:
+    return bool(conn.execute(text("SELECT pg_try_advisory_lock(:id)"), {"id": SCHEMA_LOCK_ID}).scalar())
+
+
+def _wait_lock(conn: Connection) -> None:
+    while not _try_lock(conn):
+        time.sleep(LOCK_POLL_SECONDS)
+
+
+def migrate(engine: Engine, *, wait: bool = True) -> Dict[str, Any]:
+    """
+    Applies pending migrations under the advisory lock. With `wait=False` returns
+    `skipped=True` instead of waiting while another process migrates (unless the
+    database has no schema yet, in which case there is nothing to serve without it).
+    """
+    with engine.connect() as conn:
+        applied = applied_versions(conn)
+    if {m.version for m in MIGRATIONS} <= set(applied):
+        return {"current": max(applied), "applied": [], "deferred": [], "skipped": False}
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as lock_conn:
+        if not _try_lock(lock_conn):
+            if applied and not wait:
+                log.info("schema migration is running in another process, not waiting")
+                return {"current": max(applied), "applied": [], "deferred": [], "skipped": True}
+            _wait_lock(lock_conn)
+        try:
+            lock_conn.execute(text(SCHEMA_VERSION_SQL))
+            done: List[int] = []
+            deferred: List[int] = []
+            for migration in pending_migrations(lock_conn):
+                log.info("applying schema migration %s (%s)", migration.version, migration.name)
+                try:
+                    _apply(engine, migration)
+                except MigrationDeferred as e:
+                    log.warning("schema migration %s (%s) deferred: %s", migration.version, migration.name, e)
+                    deferred.append(migration.version)
+                    continue
+                done.append(migration.version)
+            current = max(applied_versions(lock_conn), default=0)
+        finally:
+            lock_conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": SCHEMA_LOCK_ID})
+    return {"current": current, "applied": done, "deferred": deferred, "skipped": False}
@@ -0,0 +1,140 @@
+"""
+ProjectRecord: the one in-memory representation of a `projects` row.
+
+Built once per row straight from a SQLAlchemy RowMapping (no dict(r) copy):
+every column is normalized in one pass, with a fast path for what psycopg
+returns (str for TEXT, list of str for TEXT[]); from_rows normalizes each
+distinct tag array once per result. A NamedTuple rather than a
+frozen dataclass: it is just as immutable, but construction does not pay for
+one object.__setattr__ per field, which dominated the snapshot build. The
+catalog snapshot keeps records (not response dicts); the public API renders
+them with `to_api()`, the admin forms and the uploads cleanup read their attributes.
+"""
+from typing import Any, Callable, Dict, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+from .utils import PROJECT_KEY_COLUMNS, parse_tech_input, srcset_for
+
+Tags = Tuple[str, ...]
+Variants = Optional[Mapping[str, List[Dict[str, Any]]]]
+
+
+def tags(value: Any) -> Tags:
+    """TEXT[] / "a,b" / "{a,b}" / None -> tuple of non-empty strings."""
+    if value is None:
+        return ()
+    if value.__class__ is list or isinstance(value, (list, tuple)):
+        try:
+            out = tuple(map(str.strip, value))
+        except TypeError:  # NULL / non-str elements
+            out = tuple(str(x).strip() for x in value if x is not None)
+        return tuple(filter(None, out)) if "" in out else out
+    return tuple(parse_tech_input(str(value)))
+
+
+def _text(value: Any) -> str:
+    if value.__class__ is str:
+        return value
+    return "" if value is None else str(value)
+
+
+class ProjectRecord(NamedTuple):
+    id: int
+    title_ru: str = ""
+    title_kz: str = ""
+    title_en: str = ""
+    description_ru: str = ""
+    description_kz: str = ""
+    description_en: str = ""
+    technologies: Tags = ()
+    genres: Tags = ()
+    image: str = ""
+    images: Tags = ()
+    category: str = ""
+    categories: Tags = ()
+    featured: bool = False
+    project_url: str = ""
+
+    @classmethod
+    def from_row(cls, row: Mapping[str, Any], vocab: Callable[[Any], Tags] = tags) -> "ProjectRecord":
+        """`vocab` normalizes technologies / genres / categories (see from_rows)."""
+        get = row.get
+        return _new_record(
+            cls,
+            (
+                int(row["id"]),
+                _text(get("title_ru")),
+                _text(get("title_kz")),
+                _text(get("title_en")),
+                _text(get("description_ru")),
+                _text(get("description_kz")),
+                _text(get("description_en")),
+                vocab(get("technologies")),
+                vocab(get("genres")),
+                _text(get("image")),
+                tags(get("images")),
+                _text(get("category")),
+                vocab(get("categories")),
+                bool(get("featured")),
+                _text(get("project_url")),
+            ),
+        )
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Mapping[str, Any]]) -> Tuple["ProjectRecord", ...]:
+        """
+        Records for a whole result. Technologies / genres / categories come from
+        small vocabularies, so each distinct array is normalized once and the
+        resulting tuple is shared by every record that has it.
+        """
+        memo: Dict[Tags, Tags] = {}
+
+        def vocab(value: Any) -> Tags:
+            if value.__class__ is not list:
+                return tags(value)
+            key = tuple(value)
+            out = memo.get(key)
+            if out is None:
+                out = memo[key] = tags(value)
+            return out
+
+        return tuple(cls.from_row(r, vocab) for r in rows)
+
+    @property
+    def category_codes(self) -> Tags:
+        """Primary `category` + `categories`, deduplicated (what the category filter matches)."""
+        codes = (self.category,) + self.categories if self.category else self.categories
+        return tuple(dict.fromkeys(codes))
+
+    def to_api(self, variants: Variants = None, keys: Optional[Tuple[str, ...]] = None) -> Dict[str, Any]:
+        """
+        Public project dict (camelCase); `keys` limits it to a projection
+        (see utils.project_keys). Tag tuples are emitted as JSON arrays.
+        """
+        return {k: _API_VALUES[k](self, variants) for k in (keys or API_KEYS)}
+
+
+_API_VALUES: Dict[str, Callable[[ProjectRecord, Variants], Any]] = {
+    "id": lambda p, v: str(p.id),
+    "titleRu": lambda p, v: p.title_ru,
+    "titleKz": lambda p, v: p.title_kz,
+    "titleEn": lambda p, v: p.title_en,
+    "descriptionRu": lambda p, v: p.description_ru,
+    "descriptionKz": lambda p, v: p.description_kz,
+    "descriptionEn": lambda p, v: p.description_en,
+    "technologies": lambda p, v: p.technologies,
+    "genres": lambda p, v: p.genres,
+    "image": lambda p, v: p.image,
+    "images": lambda p, v: p.images,
+    "imageSrcset": lambda p, v: srcset_for(v, p.image),
+    "imagesSrcset": lambda p, v: [srcset_for(v, u) for u in p.images],
+    "category": lambda p, v: p.category,
+    "categories": lambda p, v: p.categories,
+    "featured": lambda p, v: p.featured,
+    "projectUrl": lambda p, v: p.project_url,
+}
+
+# Все поля заполнены выше, поэтому без разбора аргументов NamedTuple.__new__.
+_new_record = tuple.__new__
+
+# Response key order (same as PROJECT_KEY_COLUMNS).
+API_KEYS = tuple(PROJECT_KEY_COLUMNS)
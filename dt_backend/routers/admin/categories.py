@@ -5,10 +5,11 @@ from sqlalchemy.engine import Engine
 
 from .auth import require_login
 from .html import admin_layout
+from ...catalog import CatalogCache
 from ...utils import escape_html
 
 
-def create_admin_categories_router(engine: Engine) -> APIRouter:
+def create_admin_categories_router(engine: Engine, catalog: CatalogCache) -> APIRouter:
     router = APIRouter(tags=["admin-categories"])
 
     @router.get("/api/admin/categories", response_class=HTMLResponse)
@@ -118,6 +119,7 @@ def create_admin_categories_router(engine: Engine) -> APIRouter:
                 ),
                 {"name": clean, "ru": ru, "kz": kz, "en": en},
             )
+        catalog.invalidate()
 
         return RedirectResponse("/api/admin/categories", status_code=302)
 
@@ -127,6 +129,7 @@ def create_admin_categories_router(engine: Engine) -> APIRouter:
 
         with engine.begin() as conn:
             conn.execute(text("DELETE FROM categories WHERE id = :id"), {"id": category_id})
+        catalog.invalidate()
 
         return RedirectResponse("/api/admin/categories", status_code=302)
 
@@ -5,10 +5,11 @@ from sqlalchemy.engine import Engine
 
 from .auth import require_login
 from .html import admin_layout
+from ...catalog import CatalogCache
 from ...utils import escape_html
 
 
-def create_admin_genres_router(engine: Engine) -> APIRouter:
+def create_admin_genres_router(engine: Engine, catalog: CatalogCache) -> APIRouter:
     router = APIRouter(tags=["admin-genres"])
 
     @router.get("/api/admin/genres", response_class=HTMLResponse)
@@ -77,6 +78,7 @@ def create_admin_genres_router(engine: Engine) -> APIRouter:
                 text("INSERT INTO genres (name) VALUES (:name) ON CONFLICT (name) DO NOTHING"),
                 {"name": clean},
             )
+        catalog.invalidate()
 
         return RedirectResponse("/api/admin/genres", status_code=302)
 
@@ -86,6 +88,7 @@ def create_admin_genres_router(engine: Engine) -> APIRouter:
 
         with engine.begin() as conn:
             conn.execute(text("DELETE FROM genres WHERE id = :id"), {"id": genre_id})
+        catalog.invalidate()
 
         return RedirectResponse("/api/admin/genres", status_code=302)
 
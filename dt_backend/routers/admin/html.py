@@ -3,8 +3,9 @@ from typing import Any, Dict, Optional
 from ...utils import escape_html
 
 
-def admin_layout(title: str, body: str) -> str:
-    return f"""
+def admin_layout_parts(title: str) -> tuple[str, str]:
+    """(head, tail) of admin_layout, for pages streamed between them."""
+    head = f"""
     <html>
       <head><meta charset="utf-8"><title>{escape_html(title)}</title></head>
       <body style="margin:0;background:#000;color:#fff;font-family:Arial;">
@@ -16,14 +17,22 @@ def admin_layout(title: str, body: str) -> str:
               <a href="/api/admin/categories" style="color:#F5A623;text-decoration:none;">Categories</a>
               <a href="/api/admin/technologies" style="color:#F5A623;text-decoration:none;">Technologies</a>
               <a href="/api/admin/genres" style="color:#F5A623;text-decoration:none;">Genres</a>
+              <a href="/api/admin/stats" style="color:#F5A623;text-decoration:none;">Stats</a>
               <a href="/api/admin/logout" style="color:#F5A623;text-decoration:none;">Logout</a>
             </div>
           </div>
-          {body}
+          """
+    tail = """
         </div>
       </body>
     </html>
     """
+    return head, tail
+
+
+def admin_layout(title: str, body: str) -> str:
+    head, tail = admin_layout_parts(title)
+    return f"{head}{body}{tail}"
 
 
 def project_form_html(
@@ -0,0 +1,24 @@
+from fastapi import APIRouter, HTTPException, Request
+
+from .auth import require_login
+from ...jobs import JobRegistry
+
+
+def create_admin_jobs_router(jobs: JobRegistry) -> APIRouter:
+    router = APIRouter(tags=["admin-jobs"])
+
+    @router.get("/api/admin/jobs")
+    def admin_jobs(request: Request):
+        require_login(request)
+        return {"items": [job.to_api() for job in jobs.list()]}
+
+    @router.get("/api/admin/jobs/{job_id}")
+    def admin_job(job_id: str, request: Request):
+        require_login(request)
+
+        job = jobs.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return job.to_api()
+
+    return router
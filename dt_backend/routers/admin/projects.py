@@ -1,19 +1,42 @@
-import secrets
-from pathlib import Path
+from datetime import datetime, timezone
 from typing import Optional
 
-from fastapi import APIRouter, File, HTTPException, Request, UploadFile
+from fastapi import APIRouter, BackgroundTasks, File, HTTPException, Query, Request, UploadFile
 from fastapi import Form
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse
 from sqlalchemy import text
 from sqlalchemy.engine import Engine
+from starlette.concurrency import run_in_threadpool
 
 from .auth import require_login
-from .html import admin_layout, project_form_html
-from ...utils import escape_html, parse_tech_input, safe_filename, sanitize_rich_text_html
-
-
-def create_admin_projects_router(engine: Engine, uploads_dir: Path) -> APIRouter:
+from .html import admin_layout, admin_layout_parts, project_form_html
+from ... import upload_maintenance
+from ...admin_listing import (
+    ADMIN_PAGE_SIZE,
+    DEFAULT_SORT,
+    SORTS,
+    AdminListQuery,
+    fetch_admin_page,
+    iter_chunks,
+    page_links,
+    thumbnail_url,
+)
+from ...catalog import CatalogCache
+from ...exporter import FORMATS as EXPORT_FORMATS, iter_export
+from ...importer import FORMATS as IMPORT_FORMATS, ProjectImportError, detect_format, import_projects
+from ...jobs import Job, JobRegistry
+from ...records import ProjectRecord
+from ...stats import refresh_site_stats
+from ...uploads import UploadStore, set_project_refs
+from ...utils import escape_html, parse_tech_input, sanitize_rich_text_html
+
+
+def create_admin_projects_router(
+    engine: Engine,
+    catalog: CatalogCache,
+    uploads: UploadStore,
+    jobs: JobRegistry,
+) -> APIRouter:
     router = APIRouter(tags=["admin-projects"])
 
     def _truthy(value: Optional[str]) -> bool:
@@ -29,24 +52,6 @@ def create_admin_projects_router(engine: Engine, uploads_dir: Path) -> APIRouter
             genres = conn.execute(text("SELECT name FROM genres ORDER BY name ASC")).scalars().all()
         return list(categories or []), list(technologies or []), list(genres or [])
 
-    async def _save_image(upload: UploadFile) -> str:
-        fname = safe_filename(upload.filename)
-        fname = f"{secrets.token_hex(6)}_{fname}"
-        dest = uploads_dir / fname
-        dest.write_bytes(await upload.read())
-        return f"/static/uploads/{fname}"
-
-    def _delete_upload(path: str) -> None:
-        try:
-            if not path or not str(path).startswith("/static/uploads/"):
-                return
-            fname = str(path).split("/static/uploads/")[-1]
-            fpath = uploads_dir / fname
-            if fpath.exists():
-                fpath.unlink()
-        except Exception:
-            pass
-
     def _unique_keep_order(items: list[str]) -> list[str]:
         seen: set[str] = set()
         out: list[str] = []
@@ -58,123 +63,192 @@ def create_admin_projects_router(engine: Engine, uploads_dir: Path) -> APIRouter
             out.append(s)
         return out
 
-    def _upload_exists(url_path: str) -> bool:
-        p = str(url_path or "").strip()
-        if not p.startswith("/static/uploads/"):
-            return True
-        fname = p.split("/static/uploads/")[-1]
-        if not fname:
-            return False
-        return (uploads_dir / fname).exists()
+    @router.post("/api/admin/projects/cleanup-uploads", status_code=202)
+    def cleanup_missing_uploads(request: Request, background: BackgroundTasks):
+        """
+        Starts a background job that removes references to missing files in
+        /static/uploads from DB (does NOT delete any existing files). Poll
+        /api/admin/jobs/{jobId} for progress and the result.
+        """
+        require_login(request)
+
+        def run(job: Job) -> dict:
+            result = upload_maintenance.cleanup_missing_uploads(engine, uploads, job)
+            if result["updated"]:
+                catalog.invalidate()
+            return result
+
+        job, created = jobs.submit("cleanup-uploads")
+        if created:
+            background.add_task(jobs.run, job, run)
+        return {"ok": True, **job.to_api()}
 
-    @router.post("/api/admin/projects/cleanup-uploads")
-    def cleanup_missing_uploads(request: Request):
+    @router.post("/api/admin/uploads/gc", status_code=202)
+    def gc_uploads(
+        request: Request,
+        background: BackgroundTasks,
+        dry_run: bool = Query(False),
+        grace_hours: float = Query(upload_maintenance.GC_GRACE_SECONDS / 3600, ge=0),
+        batch_size: int = Query(upload_maintenance.GC_BATCH_SIZE, ge=1, le=10000),
+    ):
         """
-        Removes references to missing files in /static/uploads from DB.
-        Does NOT delete any existing files.
+        Starts a background job that deletes files in /static/uploads no project
+        references (older than `grace_hours`). `dry_run=1` only reports them.
         """
         require_login(request)
 
-        checked = 0
-        updated = 0
-        removed_refs = 0
+        def run(job: Job) -> dict:
+            return upload_maintenance.collect_garbage(
+                engine, uploads, job, dry_run=dry_run, grace_seconds=grace_hours * 3600, batch_size=batch_size
+            )
 
-        with engine.connect() as conn:
-            rows = conn.execute(text("SELECT id, image, images FROM projects ORDER BY id ASC")).mappings().all()
+        job, created = jobs.submit("uploads-gc")
+        if created:
+            background.add_task(jobs.run, job, run)
+        return {"ok": True, **job.to_api()}
 
-        with engine.begin() as conn:
-            for r in rows:
-                checked += 1
-                pid = int(r["id"])
-
-                image = str(r.get("image") or "").strip()
-                images = parse_tech_input(r.get("images"))
-
-                new_image = image if _upload_exists(image) else ""
-                if image and not new_image:
-                    removed_refs += 1
-
-                new_images: list[str] = []
-                for p in images:
-                    if not p:
-                        continue
-                    if _upload_exists(p):
-                        new_images.append(p)
-                    else:
-                        removed_refs += 1
-
-                new_images = _unique_keep_order(new_images)
-                if new_image:
-                    new_images = [new_image] + [p for p in new_images if p != new_image]
-
-                if new_image != image or new_images != images:
-                    updated += 1
-                    conn.execute(
-                        text("UPDATE projects SET image=:image, images=:images WHERE id=:id"),
-                        {"id": pid, "image": new_image, "images": new_images},
-                    )
-
-        return {"ok": True, "checked": checked, "updated": updated, "removedRefs": removed_refs}
+    @router.post("/api/admin/projects/import")
+    def admin_projects_import(
+        request: Request,
+        file: UploadFile = File(...),
+        format: Optional[str] = Form(None),
+    ):
+        """
+        Bulk import from CSV or JSONL (see dt_backend.importer); the format comes
+        from `format` or the file name / content type. All or nothing.
+        """
+        require_login(request)
+
+        fmt = (format or "").strip().lower() or detect_format(file.filename, file.content_type)
+        if fmt not in IMPORT_FORMATS:
+            raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(IMPORT_FORMATS)}")
+
+        try:
+            with engine.begin() as conn:
+                result = import_projects(conn, file.file, fmt)
+        except ProjectImportError as e:
+            raise HTTPException(status_code=400, detail={"invalid": e.total, "errors": e.errors})
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"import db error: {e}")
+        catalog.invalidate()
+
+        return {"ok": True, **result}
+
+    @router.get("/api/admin/projects/export")
+    def admin_projects_export(
+        request: Request,
+        format: str = Query("ndjson"),
+        copy: bool = Query(False),
+    ):
+        """
+        Streams the whole projects table as NDJSON or CSV (importable again via
+        /api/admin/projects/import). `copy=1` lets Postgres format it (COPY TO STDOUT).
+        """
+        require_login(request)
+
+        fmt = format.strip().lower()
+        if fmt not in EXPORT_FORMATS:
+            raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+
+        filename = f"projects-{datetime.now(timezone.utc):%Y%m%d-%H%M%S}.{fmt}"
+        return StreamingResponse(
+            iter_export(engine, fmt, copy=copy),
+            media_type=EXPORT_FORMATS[fmt],
+            headers={"Content-Disposition": f'attachment; filename="{filename}"', "Cache-Control": "no-store"},
+        )
 
     @router.get("/api/admin/projects", response_class=HTMLResponse)
-    def admin_projects(request: Request):
+    def admin_projects(
+        request: Request,
+        page: int = Query(1),
+        per_page: int = Query(ADMIN_PAGE_SIZE),
+        sort: str = Query(DEFAULT_SORT),
+        q: str = Query(""),
+    ):
         require_login(request)
 
-        with engine.connect() as conn:
-            rows = conn.execute(
-                text(
-                    """
-                    SELECT id, title_ru, title_en, category, featured, project_url, image
-                    FROM projects
-                    ORDER BY id DESC
-                    """
-                )
-            ).mappings().all()
+        query = AdminListQuery.parse(page, per_page, sort, q)
+        try:
+            with engine.connect() as conn:
+                listing = fetch_admin_page(conn, query)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"projects db error: {e}")
+        variants = catalog.get().variants
+
+        def render():
+            head, tail = admin_layout_parts("Admin • Projects")
+            yield head
+
+            sort_options = "".join(
+                f'<option value="{k}" {"selected" if k == query.sort else ""}>{k.replace("_", " ")}</option>'
+                for k in SORTS
+            )
+            yield f"""
+            <style>
+              .plist {{width:100%;border-collapse:collapse;background:#0b0b0b;border:1px solid #222;border-radius:14px;overflow:hidden;}}
+              .plist th {{text-align:left;}}
+              .plist th, .plist td {{padding:10px;border-bottom:1px solid #222;}}
+              .plist img {{width:64px;height:40px;object-fit:cover;border-radius:6px;display:block;}}
+              .plist a {{color:#F5A623;}}
+              .plist button {{background:transparent;border:0;color:#ff5b5b;cursor:pointer;}}
+              .pager a, .pager span {{margin-right:10px;color:#F5A623;text-decoration:none;}}
+            </style>
+
+            <div style="display:flex;gap:10px;align-items:center;flex-wrap:wrap;margin-bottom:14px;">
+              <a href="/api/admin/projects/new" style="display:inline-block;padding:10px 12px;border-radius:10px;background:#F5A623;color:#000;font-weight:800;text-decoration:none;">+ Add project</a>
+              <form method="get" action="/api/admin/projects" style="display:flex;gap:8px;margin:0;">
+                <input name="q" value="{escape_html(query.q)}" placeholder="Search title"
+                       style="padding:10px;border-radius:10px;border:1px solid #333;background:#111;color:#fff;">
+                <select name="sort" style="padding:10px;border-radius:10px;border:1px solid #333;background:#111;color:#fff;">{sort_options}</select>
+                <input type="hidden" name="per_page" value="{query.per_page}">
+                <button style="padding:10px 12px;border-radius:10px;border:1px solid #333;background:#111;color:#fff;cursor:pointer;">Apply</button>
+              </form>
+              <span style="opacity:.7;">{listing.total} projects</span>
+            </div>
+
+            <table class="plist">
+              <thead>
+                <tr><th></th><th>ID</th><th>Title RU</th><th>Title EN</th><th>Category</th><th>Featured</th><th>Actions</th></tr>
+              </thead>
+              <tbody>
+            """
 
-        items = []
-        for r in rows:
-            items.append(
-                f"""
+            for r in listing.rows:
+                thumb = thumbnail_url(variants, r.get("image"))
+                img = f'<img src="{escape_html(thumb)}" alt="" loading="lazy">' if thumb else ""
+                yield f"""
                 <tr>
-                  <td style="padding:10px;border-bottom:1px solid #222;">{r["id"]}</td>
-                  <td style="padding:10px;border-bottom:1px solid #222;">{escape_html(r.get("title_ru",""))}</td>
-                  <td style="padding:10px;border-bottom:1px solid #222;">{escape_html(r.get("title_en",""))}</td>
-                  <td style="padding:10px;border-bottom:1px solid #222;">{escape_html(r.get("category",""))}</td>
-                  <td style="padding:10px;border-bottom:1px solid #222;">{"✅" if r.get("featured") else "—"}</td>
-                  <td style="padding:10px;border-bottom:1px solid #222;">
-                    <a style="color:#F5A623" href="/api/admin/projects/{r["id"]}/edit">Edit</a>
+                  <td>{img}</td>
+                  <td>{r["id"]}</td>
+                  <td>{escape_html(r.get("title_ru", ""))}</td>
+                  <td>{escape_html(r.get("title_en", ""))}</td>
+                  <td>{escape_html(r.get("category", ""))}</td>
+                  <td>{"✅" if r.get("featured") else "—"}</td>
+                  <td>
+                    <a href="/api/admin/projects/{r["id"]}/edit">Edit</a>
                     &nbsp;|&nbsp;
                     <form style="display:inline" method="post" action="/api/admin/projects/{r["id"]}/delete"
                           onsubmit="return confirm('Delete project #{r["id"]}?');">
-                      <button style="background:transparent;border:0;color:#ff5b5b;cursor:pointer;">Delete</button>
+                      <button>Delete</button>
                     </form>
                   </td>
                 </tr>
                 """
-            )
+            if not listing.rows:
+                yield '<tr><td colspan="7" style="padding:12px;opacity:.7;">No projects</td></tr>'
 
-        body = f"""
-            <div style="margin-bottom:14px;">
-              <a href="/api/admin/projects/new" style="display:inline-block;padding:10px 12px;border-radius:10px;background:#F5A623;color:#000;font-weight:800;text-decoration:none;">+ Add project</a>
-            </div>
-
-            <table style="width:100%;border-collapse:collapse;background:#0b0b0b;border:1px solid #222;border-radius:14px;overflow:hidden;">
-              <thead>
-                <tr>
-                  <th style="text-align:left;padding:10px;border-bottom:1px solid #222;">ID</th>
-                  <th style="text-align:left;padding:10px;border-bottom:1px solid #222;">Title RU</th>
-                  <th style="text-align:left;padding:10px;border-bottom:1px solid #222;">Title EN</th>
-                  <th style="text-align:left;padding:10px;border-bottom:1px solid #222;">Category</th>
-                  <th style="text-align:left;padding:10px;border-bottom:1px solid #222;">Featured</th>
-                  <th style="text-align:left;padding:10px;border-bottom:1px solid #222;">Actions</th>
-                </tr>
-              </thead>
-              <tbody>
-                {''.join(items) if items else '<tr><td colspan="6" style="padding:12px;opacity:.7;">No projects</td></tr>'}
+            pager = "".join(
+                f'<a href="/api/admin/projects{escape_html(link)}">{label}</a>' if link else f"<span>{label}</span>"
+                for label, link in page_links(listing)
+            )
+            yield f"""
               </tbody>
             </table>
-        """
-        return HTMLResponse(admin_layout("Admin • Projects", body))
+            <div class="pager" style="margin-top:14px;">{pager}</div>
+            """
+            yield tail
+
+        return StreamingResponse(iter_chunks(render()), media_type="text/html; charset=utf-8")
 
     @router.get("/api/admin/projects/new", response_class=HTMLResponse)
     def admin_projects_new(request: Request):
@@ -218,14 +292,7 @@ def create_admin_projects_router(engine: Engine, uploads_dir: Path) -> APIRouter
         description_kz = sanitize_rich_text_html(description_kz)
         description_en = sanitize_rich_text_html(description_en)
 
-        image_path = ""
-        if image_file and image_file.filename:
-            image_path = await _save_image(image_file)
-
-        gallery_paths: list[str] = []
-        for f in gallery_files or []:
-            if f and f.filename:
-                gallery_paths.append(await _save_image(f))
+        image_path, gallery_paths = await uploads.save_images(image_file, gallery_files)
 
         tech_list = parse_tech_input(technologies)
         genres_list = parse_tech_input(genres)
@@ -238,38 +305,45 @@ def create_admin_projects_router(engine: Engine, uploads_dir: Path) -> APIRouter
 
         images_list = _unique_keep_order(([image_path] if image_path else []) + gallery_paths)
 
-        with engine.begin() as conn:
-            conn.execute(
-                text(
-                    """
-                    INSERT INTO projects (
-                        title_ru, title_kz, title_en,
-                        description_ru, description_kz, description_en,
-                        technologies, genres, image, images, category, categories, featured, project_url
-                    ) VALUES (
-                        :title_ru, :title_kz, :title_en,
-                        :description_ru, :description_kz, :description_en,
-                        :technologies, :genres, :image, :images, :category, :categories, :featured, :project_url
-                    )
-                    """
-                ),
-                {
-                    "title_ru": title_ru,
-                    "title_kz": title_kz,
-                    "title_en": title_en,
-                    "description_ru": description_ru,
-                    "description_kz": description_kz,
-                    "description_en": description_en,
-                    "technologies": tech_list,
-                    "genres": genres_list,
-                    "image": image_path,
-                    "images": images_list,
-                    "category": category,
-                    "categories": categories_list,
-                    "featured": featured_bool,
-                    "project_url": project_url.strip(),
-                },
-            )
+        def write() -> None:
+            with engine.begin() as conn:
+                project_id = conn.execute(
+                    text(
+                        """
+                        INSERT INTO projects (
+                            title_ru, title_kz, title_en,
+                            description_ru, description_kz, description_en,
+                            technologies, genres, image, images, category, categories, featured, project_url
+                        ) VALUES (
+                            :title_ru, :title_kz, :title_en,
+                            :description_ru, :description_kz, :description_en,
+                            :technologies, :genres, :image, :images, :category, :categories, :featured, :project_url
+                        )
+                        RETURNING id
+                        """
+                    ),
+                    {
+                        "title_ru": title_ru,
+                        "title_kz": title_kz,
+                        "title_en": title_en,
+                        "description_ru": description_ru,
+                        "description_kz": description_kz,
+                        "description_en": description_en,
+                        "technologies": tech_list,
+                        "genres": genres_list,
+                        "image": image_path,
+                        "images": images_list,
+                        "category": category,
+                        "categories": categories_list,
+                        "featured": featured_bool,
+                        "project_url": project_url.strip(),
+                    },
+                ).scalar_one()
+                set_project_refs(conn, project_id, images_list)
+                refresh_site_stats(conn)
+
+        await run_in_threadpool(write)
+        catalog.invalidate()
 
         return RedirectResponse("/api/admin/projects", status_code=302)
 
@@ -296,8 +370,7 @@ def create_admin_projects_router(engine: Engine, uploads_dir: Path) -> APIRouter
         if not row:
             raise HTTPException(status_code=404, detail="Project not found")
 
-        tech_selected = parse_tech_input(row.get("technologies"))
-        genres_selected = parse_tech_input(row.get("genres"))
+        project = ProjectRecord.from_row(row)
         categories, technologies, genres = _load_lists()
 
         html = project_form_html(
@@ -306,18 +379,18 @@ def create_admin_projects_router(engine: Engine, uploads_dir: Path) -> APIRouter
             technologies=technologies,
             genres=genres,
             values={
-                "title_ru": row.get("title_ru", ""),
-                "title_kz": row.get("title_kz", ""),
-                "title_en": row.get("title_en", ""),
-                "description_ru": row.get("description_ru", ""),
-                "description_kz": row.get("description_kz", ""),
-                "description_en": row.get("description_en", ""),
-                "technologies_selected": tech_selected,
-                "genres_selected": genres_selected,
-                "category": row.get("category", "web"),
-                "featured": bool(row.get("featured")),
-                "project_url": row.get("project_url", "") or "",
-                "image": row.get("image", "") or "",
+                "title_ru": project.title_ru,
+                "title_kz": project.title_kz,
+                "title_en": project.title_en,
+                "description_ru": project.description_ru,
+                "description_kz": project.description_kz,
+                "description_en": project.description_en,
+                "technologies_selected": project.technologies,
+                "genres_selected": project.genres,
+                "category": project.category or "web",
+                "featured": project.featured,
+                "project_url": project.project_url,
+                "image": project.image,
             },
             show_current_image=True,
         )
@@ -351,21 +424,24 @@ def create_admin_projects_router(engine: Engine, uploads_dir: Path) -> APIRouter
         description_kz = sanitize_rich_text_html(description_kz)
         description_en = sanitize_rich_text_html(description_en)
 
-        with engine.connect() as conn:
-            row = conn.execute(
-                text("SELECT image, images FROM projects WHERE id=:id"),
-                {"id": project_id},
-            ).mappings().first()
+        def load():
+            with engine.connect() as conn:
+                return conn.execute(
+                    text("SELECT id, image, images FROM projects WHERE id=:id"),
+                    {"id": project_id},
+                ).mappings().first()
+
+        row = await run_in_threadpool(load)
 
         if not row:
             raise HTTPException(status_code=404, detail="Project not found")
 
-        old_img = row.get("image") or ""
-        old_images = parse_tech_input(row.get("images"))
+        current = ProjectRecord.from_row(row)
+        old_img = current.image
+        old_images = list(current.images)
 
-        image_path = old_img or ""
-        if image_file and image_file.filename:
-            image_path = await _save_image(image_file)
+        new_image, gallery_paths = await uploads.save_images(image_file, gallery_files)
+        image_path = new_image or old_img or ""
 
         tech_list = parse_tech_input(technologies)
         genres_list = parse_tech_input(genres)
@@ -378,11 +454,6 @@ def create_admin_projects_router(engine: Engine, uploads_dir: Path) -> APIRouter
         remove_list = parse_tech_input(remove_images)
         kept_old_images = [p for p in old_images if p and p not in remove_list]
 
-        gallery_paths: list[str] = []
-        for f in gallery_files or []:
-            if f and f.filename:
-                gallery_paths.append(await _save_image(f))
-
         replace_gallery_bool = _truthy(replace_gallery)
         base_images = ([] if replace_gallery_bool else kept_old_images) + gallery_paths
         base_images = _unique_keep_order(base_images)
@@ -393,56 +464,59 @@ def create_admin_projects_router(engine: Engine, uploads_dir: Path) -> APIRouter
         else:
             images_list = base_images
 
-        with engine.begin() as conn:
-            res = conn.execute(
-                text(
-                    """
-                    UPDATE projects
-                    SET
-                        title_ru=:title_ru,
-                        title_kz=:title_kz,
-                        title_en=:title_en,
-                        description_ru=:description_ru,
-                        description_kz=:description_kz,
-                        description_en=:description_en,
-                        technologies=:technologies,
-                        genres=:genres,
-                        image=:image,
-                        images=:images,
-                        category=:category,
-                        categories=:categories,
-                        featured=:featured,
-                        project_url=:project_url
-                    WHERE id=:id
-                    """
-                ),
-                {
-                    "id": project_id,
-                    "title_ru": title_ru,
-                    "title_kz": title_kz,
-                    "title_en": title_en,
-                    "description_ru": description_ru,
-                    "description_kz": description_kz,
-                    "description_en": description_en,
-                    "technologies": tech_list,
-                    "genres": genres_list,
-                    "image": image_path,
-                    "images": images_list,
-                    "category": category,
-                    "categories": categories_list,
-                    "featured": featured_bool,
-                    "project_url": project_url.strip(),
-                },
-            )
-            if res.rowcount == 0:
-                raise HTTPException(status_code=404, detail="Project not found")
+        def write() -> list[str]:
+            with engine.begin() as conn:
+                res = conn.execute(
+                    text(
+                        """
+                        UPDATE projects
+                        SET
+                            title_ru=:title_ru,
+                            title_kz=:title_kz,
+                            title_en=:title_en,
+                            description_ru=:description_ru,
+                            description_kz=:description_kz,
+                            description_en=:description_en,
+                            technologies=:technologies,
+                            genres=:genres,
+                            image=:image,
+                            images=:images,
+                            category=:category,
+                            categories=:categories,
+                            featured=:featured,
+                            project_url=:project_url
+                        WHERE id=:id
+                        """
+                    ),
+                    {
+                        "id": project_id,
+                        "title_ru": title_ru,
+                        "title_kz": title_kz,
+                        "title_en": title_en,
+                        "description_ru": description_ru,
+                        "description_kz": description_kz,
+                        "description_en": description_en,
+                        "technologies": tech_list,
+                        "genres": genres_list,
+                        "image": image_path,
+                        "images": images_list,
+                        "category": category,
+                        "categories": categories_list,
+                        "featured": featured_bool,
+                        "project_url": project_url.strip(),
+                    },
+                )
+                if res.rowcount == 0:
+                    raise HTTPException(status_code=404, detail="Project not found")
+                dropped = set_project_refs(conn, project_id, [image_path] + images_list)
+                refresh_site_stats(conn)
+            return dropped
+
+        dropped = await run_in_threadpool(write)
+        catalog.invalidate()
 
-        # Cleanup removed uploads (best-effort).
-        if remove_list:
-            still_used = set(images_list + ([image_path] if image_path else []))
-            for p in remove_list:
-                if p and p not in still_used:
-                    _delete_upload(p)
+        # Files no other project uses are removed (best-effort).
+        await run_in_threadpool(uploads.release, dropped)
 
         return RedirectResponse("/api/admin/projects", status_code=302)
 
@@ -451,16 +525,12 @@ def create_admin_projects_router(engine: Engine, uploads_dir: Path) -> APIRouter
         require_login(request)
 
         with engine.begin() as conn:
-            row = conn.execute(
-                text("SELECT image, images FROM projects WHERE id=:id"),
-                {"id": project_id},
-            ).mappings().first()
+            dropped = set_project_refs(conn, project_id, [])
             conn.execute(text("DELETE FROM projects WHERE id=:id"), {"id": project_id})
+            refresh_site_stats(conn)
+        catalog.invalidate()
 
-        img = (row or {}).get("image") or ""
-        imgs = parse_tech_input((row or {}).get("images"))
-        for p in _unique_keep_order(([img] if img else []) + imgs):
-            _delete_upload(p)
+        uploads.release(dropped)
 
         return RedirectResponse("/api/admin/projects", status_code=302)
 
@@ -0,0 +1,73 @@
+from fastapi import APIRouter, Form, HTTPException, Request
+from fastapi.responses import HTMLResponse, RedirectResponse
+from sqlalchemy.engine import Engine
+
+from .auth import require_login
+from .html import admin_layout
+from ...catalog import CatalogCache
+from ...stats import load_site_stats, refresh_site_stats, set_students
+
+
+def create_admin_stats_router(engine: Engine, catalog: CatalogCache) -> APIRouter:
+    router = APIRouter(tags=["admin-stats"])
+
+    @router.get("/api/admin/stats", response_class=HTMLResponse)
+    def admin_stats(request: Request):
+        require_login(request)
+
+        with engine.connect() as conn:
+            row = load_site_stats(conn)
+        if row is None:
+            raise HTTPException(status_code=500, detail="stats db error: site_stats is empty")
+
+        body = f"""
+          <table style="border-collapse:collapse;background:#0b0b0b;border:1px solid #222;border-radius:14px;overflow:hidden;margin-bottom:14px;">
+            <tr><td style="padding:10px;border-bottom:1px solid #222;">Projects</td>
+                <td style="padding:10px;border-bottom:1px solid #222;">{int(row["projects"])}</td></tr>
+            <tr><td style="padding:10px;border-bottom:1px solid #222;">Technologies</td>
+                <td style="padding:10px;border-bottom:1px solid #222;">{int(row["technologies"])}</td></tr>
+            <tr><td style="padding:10px;">Updated</td>
+                <td style="padding:10px;">{row["updated_at"]:%Y-%m-%d %H:%M:%S %Z}</td></tr>
+          </table>
+
+          <form method="post" action="/api/admin/stats" style="display:flex;gap:10px;align-items:end;flex-wrap:wrap;">
+            <div>
+              <label style="display:block;margin-bottom:6px;opacity:.85;">Students (shown on the homepage)</label>
+              <input name="students" type="number" min="0" required value="{int(row["students"])}"
+                     style="min-width:160px;padding:10px;border-radius:10px;border:1px solid #333;background:#111;color:#fff;">
+            </div>
+            <button style="padding:10px 12px;border-radius:10px;background:#F5A623;color:#000;font-weight:800;border:0;cursor:pointer;">
+              Save
+            </button>
+          </form>
+          <form method="post" action="/api/admin/stats/refresh" style="margin-top:10px;">
+            <button style="background:transparent;border:0;color:#F5A623;cursor:pointer;padding:0;">Recount projects and technologies</button>
+          </form>
+        """
+        return HTMLResponse(admin_layout("Admin • Stats", body))
+
+    @router.post("/api/admin/stats")
+    def admin_stats_update(request: Request, students: int = Form(...)):
+        require_login(request)
+
+        if students < 0:
+            raise HTTPException(status_code=400, detail="students must be >= 0")
+
+        with engine.begin() as conn:
+            set_students(conn, students)
+        catalog.invalidate()
+
+        return RedirectResponse("/api/admin/stats", status_code=302)
+
+    @router.post("/api/admin/stats/refresh")
+    def admin_stats_refresh(request: Request):
+        require_login(request)
+
+        # Для правок мимо админки (ручной SQL и т.п.).
+        with engine.begin() as conn:
+            refresh_site_stats(conn)
+        catalog.invalidate()
+
+        return RedirectResponse("/api/admin/stats", status_code=302)
+
+    return router
@@ -5,10 +5,11 @@ from sqlalchemy.engine import Engine
 
 from .auth import require_login
 from .html import admin_layout
+from ...catalog import CatalogCache
 from ...utils import escape_html
 
 
-def create_admin_technologies_router(engine: Engine) -> APIRouter:
+def create_admin_technologies_router(engine: Engine, catalog: CatalogCache) -> APIRouter:
     router = APIRouter(tags=["admin-technologies"])
 
     @router.get("/api/admin/technologies/json")
@@ -86,6 +87,7 @@ def create_admin_technologies_router(engine: Engine) -> APIRouter:
                 text("INSERT INTO technologies (name) VALUES (:name) ON CONFLICT (name) DO NOTHING"),
                 {"name": clean},
             )
+        catalog.invalidate()
 
         return RedirectResponse("/api/admin/technologies", status_code=302)
 
@@ -102,6 +104,7 @@ def create_admin_technologies_router(engine: Engine) -> APIRouter:
                 text("UPDATE technologies SET name = :name WHERE id = :id"),
                 {"id": tech_id, "name": clean},
             )
+        catalog.invalidate()
 
         return RedirectResponse("/api/admin/technologies", status_code=302)
 
@@ -111,6 +114,7 @@ def create_admin_technologies_router(engine: Engine) -> APIRouter:
 
         with engine.begin() as conn:
             conn.execute(text("DELETE FROM technologies WHERE id = :id"), {"id": tech_id})
+        catalog.invalidate()
 
         return RedirectResponse("/api/admin/technologies", status_code=302)
 
@@ -2,13 +2,11 @@
 Admin authentication using Jinja2 templates (original design).
 Routes: /admin/login, /admin/logout
 """
-from pathlib import Path
-
 from fastapi import APIRouter, Form, HTTPException, Request
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
 
 from ...config import Settings
+from ...templating import SiteTemplates
 
 
 def is_logged_in(request: Request) -> bool:
@@ -20,11 +18,11 @@ def require_login(request: Request):
         raise HTTPException(status_code=401, detail="Not authorized")
 
 
-def create_admin_template_auth_router(settings: Settings, templates_dir: Path) -> APIRouter:
+def create_admin_template_auth_router(settings: Settings, site: SiteTemplates) -> APIRouter:
     """
     Admin authentication router using original Jinja2 templates.
     """
-    templates = Jinja2Templates(directory=str(templates_dir))
+    templates = site.templates
     router = APIRouter(tags=["admin-template-auth"])
 
     @router.get("/admin", response_class=HTMLResponse)
@@ -37,7 +35,7 @@ def create_admin_template_auth_router(settings: Settings, templates_dir: Path) -
     @router.get("/admin/login", response_class=HTMLResponse)
     def admin_login_page(request: Request):
         """Show login page using original template."""
-        response = templates.TemplateResponse("admin_login.html", {
+        response = templates.TemplateResponse(request, "admin_login.html", {
             "request": request,
             "error": None
         })
@@ -56,7 +54,7 @@ def create_admin_template_auth_router(settings: Settings, templates_dir: Path) -
             return RedirectResponse("/admin/projects", status_code=302)
 
         # Show login page with error
-        response = templates.TemplateResponse("admin_login.html", {
+        response = templates.TemplateResponse(request, "admin_login.html", {
             "request": request,
             "error": "Неверный логин или пароль"
         }, status_code=401)
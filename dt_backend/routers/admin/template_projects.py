@@ -2,39 +2,45 @@
 Admin projects management using Jinja2 templates (original design).
 Routes: /admin/projects, /admin/projects/new, /admin/projects/{id}/edit, etc.
 """
-import secrets
-from pathlib import Path
 from typing import Optional
 
-from fastapi import APIRouter, File, Form, HTTPException, Request, UploadFile
-from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
+from fastapi import APIRouter, File, Form, HTTPException, Query, Request, UploadFile
+from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse
 from sqlalchemy import text
 from sqlalchemy.engine import Engine
+from starlette.concurrency import run_in_threadpool
 
 from .template_auth import require_login
-from ...utils import parse_tech_input, safe_filename
+from ...admin_listing import (
+    ADMIN_PAGE_SIZE,
+    DEFAULT_SORT,
+    SORTS,
+    AdminListQuery,
+    fetch_admin_page,
+    iter_chunks,
+    page_links,
+    thumbnail_url,
+)
+from ...catalog import CatalogCache
+from ...records import ProjectRecord
+from ...stats import refresh_site_stats
+from ...templating import SiteTemplates
+from ...uploads import UploadStore, set_project_refs
+from ...utils import parse_tech_input
 
 
 def create_admin_template_projects_router(
     engine: Engine,
-    uploads_dir: Path,
-    templates_dir: Path
+    catalog: CatalogCache,
+    uploads: UploadStore,
+    site: SiteTemplates,
 ) -> APIRouter:
     """
     Admin projects router using original Jinja2 templates.
     """
-    templates = Jinja2Templates(directory=str(templates_dir))
+    templates = site.templates
     router = APIRouter(tags=["admin-template-projects"])
 
-    async def _save_image(upload: UploadFile) -> str:
-        """Save uploaded image and return URL path."""
-        fname = safe_filename(upload.filename)
-        fname = f"{secrets.token_hex(6)}_{fname}"
-        dest = uploads_dir / fname
-        dest.write_bytes(await upload.read())
-        return f"/static/uploads/{fname}"
-
     def _parse_technologies(tech_str: str) -> list[str]:
         """Parse comma-separated technologies."""
         if not tech_str:
@@ -42,35 +48,41 @@ def create_admin_template_projects_router(
         return [t.strip() for t in tech_str.split(',') if t.strip()]
 
     @router.get("/admin/projects", response_class=HTMLResponse)
-    def admin_projects_list(request: Request):
-        """Show projects list using original template."""
+    def admin_projects_list(
+        request: Request,
+        page: int = Query(1),
+        per_page: int = Query(ADMIN_PAGE_SIZE),
+        sort: str = Query(DEFAULT_SORT),
+        q: str = Query(""),
+    ):
+        """Show one page of projects using original template (streamed)."""
         require_login(request)
 
+        query = AdminListQuery.parse(page, per_page, sort, q)
         with engine.connect() as conn:
-            rows = conn.execute(
-                text("""
-                    SELECT id, title_ru, title_kz, title_en,
-                           category, featured, image, project_url
-                    FROM projects
-                    ORDER BY id DESC
-                """)
-            ).mappings().all()
-
-        projects = [dict(r) for r in rows]
-
-        response = templates.TemplateResponse("admin_projects.html", {
-            "request": request,
-            "projects": projects
-        })
-        response.charset = "utf-8"
-        return response
+            listing = fetch_admin_page(conn, query)
+        variants = catalog.get().variants
+
+        for p in listing.rows:
+            p["thumbnail"] = thumbnail_url(variants, p.get("image"))
+
+        stream = templates.env.get_template("admin_projects.html").generate(
+            {
+                "request": request,
+                "projects": listing.rows,
+                "listing": listing,
+                "sorts": list(SORTS),
+                "page_links": page_links(listing),
+            }
+        )
+        return StreamingResponse(iter_chunks(stream), media_type="text/html; charset=utf-8")
 
     @router.get("/admin/projects/new", response_class=HTMLResponse)
     def admin_projects_new_page(request: Request):
         """Show new project form using original template."""
         require_login(request)
 
-        response = templates.TemplateResponse("admin_project_form.html", {
+        response = templates.TemplateResponse(request, "admin_project_form.html", {
             "request": request,
             "project": None
         })
@@ -99,38 +111,43 @@ def create_admin_template_projects_router(
         tech_list = _parse_technologies(technologies)
 
         # Handle image upload
-        image_path = ""
-        if image and image.filename:
-            image_path = await _save_image(image)
+        image_path, _ = await uploads.save_images(image)
 
         # Insert project
-        with engine.begin() as conn:
-            conn.execute(
-                text("""
-                    INSERT INTO projects (
-                        title_ru, title_kz, title_en,
-                        description_ru, description_kz, description_en,
-                        technologies, category, image, project_url, featured
-                    ) VALUES (
-                        :title_ru, :title_kz, :title_en,
-                        :description_ru, :description_kz, :description_en,
-                        :technologies, :category, :image, :project_url, :featured
-                    )
-                """),
-                {
-                    "title_ru": title_ru,
-                    "title_kz": title_kz,
-                    "title_en": title_en,
-                    "description_ru": description_ru,
-                    "description_kz": description_kz,
-                    "description_en": description_en,
-                    "technologies": tech_list,
-                    "category": category,
-                    "image": image_path,
-                    "project_url": project_url,
-                    "featured": bool(featured)
-                }
-            )
+        def write() -> None:
+            with engine.begin() as conn:
+                project_id = conn.execute(
+                    text("""
+                        INSERT INTO projects (
+                            title_ru, title_kz, title_en,
+                            description_ru, description_kz, description_en,
+                            technologies, category, categories, image, project_url, featured
+                        ) VALUES (
+                            :title_ru, :title_kz, :title_en,
+                            :description_ru, :description_kz, :description_en,
+                            :technologies, :category, ARRAY[CAST(:category AS text)], :image, :project_url, :featured
+                        )
+                        RETURNING id
+                    """),
+                    {
+                        "title_ru": title_ru,
+                        "title_kz": title_kz,
+                        "title_en": title_en,
+                        "description_ru": description_ru,
+                        "description_kz": description_kz,
+                        "description_en": description_en,
+                        "technologies": tech_list,
+                        "category": category,
+                        "image": image_path,
+                        "project_url": project_url,
+                        "featured": bool(featured)
+                    }
+                ).scalar_one()
+                set_project_refs(conn, project_id, [image_path])
+                refresh_site_stats(conn)
+
+        await run_in_threadpool(write)
+        catalog.invalidate()
 
         return RedirectResponse("/admin/projects", status_code=302)
 
@@ -148,9 +165,9 @@ def create_admin_template_projects_router(
         if not row:
             raise HTTPException(status_code=404, detail="Project not found")
 
-        project = dict(row)
+        project = ProjectRecord.from_row(row)
 
-        response = templates.TemplateResponse("admin_project_form.html", {
+        response = templates.TemplateResponse(request, "admin_project_form.html", {
             "request": request,
             "project": project
         })
@@ -177,11 +194,14 @@ def create_admin_template_projects_router(
         require_login(request)
 
         # Get current project
-        with engine.connect() as conn:
-            row = conn.execute(
-                text("SELECT image FROM projects WHERE id = :id"),
-                {"id": project_id}
-            ).first()
+        def load():
+            with engine.connect() as conn:
+                return conn.execute(
+                    text("SELECT image FROM projects WHERE id = :id"),
+                    {"id": project_id}
+                ).first()
+
+        row = await run_in_threadpool(load)
 
         if not row:
             raise HTTPException(status_code=404, detail="Project not found")
@@ -190,43 +210,58 @@ def create_admin_template_projects_router(
         tech_list = _parse_technologies(technologies)
 
         # Handle image upload
-        image_path = row[0]  # Keep current image by default
-        if image and image.filename:
-            image_path = await _save_image(image)
+        new_image, _ = await uploads.save_images(image)
+        image_path = new_image or row[0]  # Keep current image by default
 
         # Update project
-        with engine.begin() as conn:
-            conn.execute(
-                text("""
-                    UPDATE projects SET
-                        title_ru = :title_ru,
-                        title_kz = :title_kz,
-                        title_en = :title_en,
-                        description_ru = :description_ru,
-                        description_kz = :description_kz,
-                        description_en = :description_en,
-                        technologies = :technologies,
-                        category = :category,
-                        image = :image,
-                        project_url = :project_url,
-                        featured = :featured
-                    WHERE id = :id
-                """),
-                {
-                    "id": project_id,
-                    "title_ru": title_ru,
-                    "title_kz": title_kz,
-                    "title_en": title_en,
-                    "description_ru": description_ru,
-                    "description_kz": description_kz,
-                    "description_en": description_en,
-                    "technologies": tech_list,
-                    "category": category,
-                    "image": image_path,
-                    "project_url": project_url,
-                    "featured": bool(featured)
-                }
-            )
+        def write() -> list[str]:
+            with engine.begin() as conn:
+                updated = conn.execute(
+                    text("""
+                        UPDATE projects SET
+                            title_ru = :title_ru,
+                            title_kz = :title_kz,
+                            title_en = :title_en,
+                            description_ru = :description_ru,
+                            description_kz = :description_kz,
+                            description_en = :description_en,
+                            technologies = :technologies,
+                            category = :category,
+                            -- справа `category` ещё старая основная категория: её тоже убираем
+                            categories = array_prepend(
+                                CAST(:category AS text),
+                                array_remove(array_remove(categories, category), CAST(:category AS text))
+                            ),
+                            image = :image,
+                            project_url = :project_url,
+                            featured = :featured
+                        WHERE id = :id
+                        RETURNING image, images
+                    """),
+                    {
+                        "id": project_id,
+                        "title_ru": title_ru,
+                        "title_kz": title_kz,
+                        "title_en": title_en,
+                        "description_ru": description_ru,
+                        "description_kz": description_kz,
+                        "description_en": description_en,
+                        "technologies": tech_list,
+                        "category": category,
+                        "image": image_path,
+                        "project_url": project_url,
+                        "featured": bool(featured)
+                    }
+                ).first()
+                dropped = set_project_refs(conn, project_id, [updated[0]] + list(updated[1] or [])) if updated else []
+                refresh_site_stats(conn)
+            return dropped
+
+        dropped = await run_in_threadpool(write)
+        catalog.invalidate()
+
+        # Replaced cover is removed if no other project uses it.
+        await run_in_threadpool(uploads.release, dropped)
 
         return RedirectResponse("/admin/projects", status_code=302)
 
@@ -236,10 +271,15 @@ def create_admin_template_projects_router(
         require_login(request)
 
         with engine.begin() as conn:
+            dropped = set_project_refs(conn, project_id, [])
             conn.execute(
                 text("DELETE FROM projects WHERE id = :id"),
                 {"id": project_id}
             )
+            refresh_site_stats(conn)
+        catalog.invalidate()
+
+        uploads.release(dropped)
 
         return RedirectResponse("/admin/projects", status_code=302)
 
@@ -1,195 +1,313 @@
-from typing import Any, Dict, Optional
+import time
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request
 from sqlalchemy import text
-from sqlalchemy.engine import Engine
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.concurrency import run_in_threadpool
 
-from ...utils import row_to_project
+from ...catalog import CatalogCache, decode_cursor
+from ...facets import facet_counts
+from ...filters import ProjectFilter
+from ...http_cache import FastJSONResponse, cached_body, json_response
+from ...images import load_variants
+from ...records import ProjectRecord
+from ...search import TRIGRAM_PROBE_SECONDS, TRIGRAM_PROBE_SQL, search_params, search_sql
+from ...utils import (
+    LANGS,
+    lang_from_accept_language,
+    parse_fields,
+    project_columns,
+    project_keys,
+)
 
+T = TypeVar("T")
 
-def create_public_api_router(engine: Engine) -> APIRouter:
-    router = APIRouter()
+DEFAULT_PAGE_SIZE = 24
+MAX_PAGE_SIZE = 200
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 100
 
-    @router.get("/api/stats")
-    def api_stats():
+
+def create_public_api_router(
+    engine: Engine,
+    catalog: CatalogCache,
+    async_engine: Optional[AsyncEngine] = None,
+) -> APIRouter:
+    """
+    Public read API. Handlers are `async def`: catalog reads come from memory,
+    and the few DB queries go through `async_engine` when it is configured
+    (DB_ASYNC=1) or through the thread pool otherwise. Responses are encoded
+    once by http_cache.encode_json (orjson), never by jsonable_encoder.
+    """
+    router = APIRouter(default_response_class=FastJSONResponse)
+    health_body = cached_body({"status": "ok"})
+
+    def _projection(
+        request: Request, lang: Optional[str], fields: Optional[str]
+    ) -> Tuple[Optional[Tuple[str, ...]], Dict[str, str]]:
+        """
+        Response keys for `lang`/`fields` plus extra headers. `lang=auto`, or
+        `fields` with title/description but no `lang`, falls back to Accept-Language.
+        """
         try:
+            parsed = parse_fields(fields)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        headers: Dict[str, str] = {}
+        wants_text = parsed is not None and ("title" in parsed or "description" in parsed)
+        if lang == "auto" or (lang is None and wants_text):
+            lang = lang_from_accept_language(request.headers.get("accept-language"))
+            headers["Vary"] = "Accept-Language"
+        elif lang is not None and lang not in LANGS:
+            raise HTTPException(status_code=400, detail="lang must be one of: ru, kz, en, auto")
+
+        if lang is not None:
+            headers["Content-Language"] = lang
+        return project_keys(parsed, lang), headers
+
+    # pg_trgm: {"enabled": bool, "checked": monotonic time of the last probe}.
+    trigram: Dict[str, float] = {"enabled": False, "checked": float("-inf")}
+
+    async def _run(query: Callable[[Connection], T]) -> T:
+        """Runs a sync `query(conn)` on the async driver if configured, else in the thread pool."""
+        if async_engine is not None:
+            async with async_engine.connect() as conn:
+                return await conn.run_sync(query)
+
+        def _sync() -> T:
             with engine.connect() as conn:
-                projects_count = conn.execute(text("SELECT COUNT(*) FROM projects")).scalar_one()
-
-                tech_count = conn.execute(
-                    text(
-                        """
-                        SELECT COALESCE(COUNT(DISTINCT t), 0) AS cnt
-                        FROM projects
-                        LEFT JOIN LATERAL unnest(technologies) AS t ON TRUE
-                        """
-                    )
-                ).scalar_one()
-
-            return {
-                "projects": int(projects_count),
-                "students": 500,  # stub
-                "technologies": int(tech_count),
-            }
+                return query(conn)
+
+        return await run_in_threadpool(_sync)
+
+    def _project_filter(
+        category: Optional[List[str]],
+        technology: Optional[List[str]],
+        genre: Optional[List[str]],
+        match: Optional[str],
+    ) -> ProjectFilter:
+        try:
+            return ProjectFilter.from_query(technology, genre, category, match)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    @router.get("/api/stats")
+    async def api_stats(request: Request):
+        # site_stats входит в snapshot каталога (как в /api/bootstrap): без запроса к БД.
+        try:
+            snapshot = await catalog.aget()
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"stats db error: {e}")
+        if not snapshot.stats:
+            raise HTTPException(status_code=500, detail="stats db error: site_stats is empty")
+
+        return json_response(request, snapshot.response("stats", lambda: dict(snapshot.stats)))
 
     @router.get("/api/projects")
-    def api_projects(category: Optional[str] = Query(default=None)):
-        try:
-            sql = """
-                SELECT
-                    id,
-                    title_ru, title_kz, title_en,
-                    description_ru, description_kz, description_en,
-                    technologies,
-                    genres,
-                    image,
-                    images,
-                    category,
-                    categories,
-                    featured,
-                    project_url
-                FROM projects
-            """
-            params: Dict[str, Any] = {}
-
-            if category and category != "all":
-                sql += " WHERE category = :category OR :category = ANY(categories)"
-                params["category"] = category
-
-            sql += " ORDER BY featured DESC, id ASC"
+    async def api_projects(
+        request: Request,
+        category: Optional[List[str]] = Query(default=None),
+        technology: Optional[List[str]] = Query(default=None),
+        genre: Optional[List[str]] = Query(default=None),
+        match: Optional[str] = Query(default=None),
+        limit: Optional[int] = Query(default=None, ge=1, le=MAX_PAGE_SIZE),
+        cursor: Optional[str] = Query(default=None),
+        lang: Optional[str] = Query(default=None),
+        fields: Optional[str] = Query(default=None),
+    ):
+        """
+        Без `limit` — весь список (как раньше). С `limit` — страница
+        {"items": [...], "nextCursor": "..."}; `nextCursor` передаётся как `cursor`.
+        `lang=ru|kz|en|auto` оставляет тексты одного языка, `fields=id,title,...` — только нужные поля.
+        Фильтры `category`/`technology`/`genre` можно повторять; `match=any|all` — ИЛИ/И внутри измерения.
+        """
+        keys, headers = _projection(request, lang, fields)
+        f = _project_filter(category, technology, genre, match)
 
-            with engine.connect() as conn:
-                rows = conn.execute(text(sql), params).mappings().all()
+        after = None
+        if cursor:
+            try:
+                after = decode_cursor(cursor)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid cursor")
 
-            return [row_to_project(dict(r)) for r in rows]
+        try:
+            snapshot = await catalog.aget()
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"projects db error: {e}")
 
+        projects = snapshot.filtered(f)
+        # Все пустые выборки делят один ответ, чтобы кэш не рос от мусорных query.
+        key = ("projects", f if projects else None)
+
+        if limit is None and after is None:
+            body = snapshot.response(key + (keys,), lambda: [p.to_api(snapshot.variants, keys) for p in projects])
+            return json_response(request, body, headers)
+
+        page_size = limit or DEFAULT_PAGE_SIZE
+
+        def build_page():
+            items, next_cursor = snapshot.page(projects, after, page_size)
+            return {"items": [p.to_api(snapshot.variants, keys) for p in items], "nextCursor": next_cursor}
+
+        return json_response(request, snapshot.response(key + (keys, after, page_size), build_page), headers)
+
+    @router.get("/api/facets")
+    async def api_facets(
+        request: Request,
+        category: Optional[List[str]] = Query(default=None),
+        technology: Optional[List[str]] = Query(default=None),
+        genre: Optional[List[str]] = Query(default=None),
+        match: Optional[str] = Query(default=None),
+    ):
+        """
+        Сколько проектов у каждой технологии/жанра/категории (+ total) среди
+        проектов, подходящих под те же фильтры, что у /api/projects.
+        Считается одним запросом и кэшируется в snapshot до следующей записи.
+        """
+        f = _project_filter(category, technology, genre, match)
+        key = ("facets", f)
+        try:
+            snapshot = await catalog.aget()
+            body = snapshot.cached(key)
+            if body is None:
+                counts = await _run(lambda conn: facet_counts(conn, f))
+                body = snapshot.response(key, lambda: counts)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"facets db error: {e}")
+        return json_response(request, body)
+
     @router.get("/api/projects/{project_id}")
-    def api_project(project_id: int):
+    async def api_project(
+        request: Request,
+        project_id: int,
+        lang: Optional[str] = Query(default=None),
+        fields: Optional[str] = Query(default=None),
+    ):
+        keys, headers = _projection(request, lang, fields)
         try:
-            with engine.connect() as conn:
-                row = conn.execute(
-                    text(
-                        """
-                        SELECT
-                            id,
-                            title_ru, title_kz, title_en,
-                            description_ru, description_kz, description_en,
-                            technologies,
-                            genres,
-                            image,
-                            images,
-                            category,
-                            categories,
-                            featured,
-                            project_url
-                        FROM projects
-                        WHERE id = :id
-                        """
-                    ),
-                    {"id": project_id},
-                ).mappings().first()
-
-            if not row:
-                raise HTTPException(status_code=404, detail="Project not found")
-
-            return row_to_project(dict(row))
-        except HTTPException:
-            raise
+            snapshot = await catalog.aget()
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"project db error: {e}")
 
+        project = snapshot.projects_by_id.get(project_id)
+        if project is None:
+            raise HTTPException(status_code=404, detail="Project not found")
+        body = snapshot.response(("project", project_id, keys), lambda: project.to_api(snapshot.variants, keys))
+        return json_response(request, body, headers)
+
+    @router.get("/api/search")
+    async def api_search(
+        request: Request,
+        q: str = Query(..., min_length=1, max_length=200),
+        lang: Optional[str] = Query(default=None),
+        fields: Optional[str] = Query(default=None),
+        category: Optional[List[str]] = Query(default=None),
+        technology: Optional[List[str]] = Query(default=None),
+        genre: Optional[List[str]] = Query(default=None),
+        match: Optional[str] = Query(default=None),
+        limit: int = Query(default=SEARCH_PAGE_SIZE, ge=1, le=SEARCH_MAX_PAGE_SIZE),
+        offset: int = Query(default=0, ge=0, le=10_000),
+    ):
+        """
+        Ранжированный поиск по заголовкам и описаниям на одном языке
+        (`lang`, иначе Accept-Language). Ответ: {"items", "total", "nextOffset"};
+        `lang`/`fields`/фильтры — как у /api/projects.
+        """
+        keys, headers = _projection(request, lang, fields)
+        f = _project_filter(category, technology, genre, match)
+        if lang in LANGS:
+            search_lang = lang
+        else:
+            search_lang = lang_from_accept_language(request.headers.get("accept-language"))
+            headers["Vary"] = "Accept-Language"
+
+        params = search_params(q, limit, offset)
+        if params is None:
+            return json_response(request, cached_body({"items": [], "total": 0, "nextOffset": None}), headers)
+
+        def query(conn: Connection):
+            now = time.monotonic()
+            if now - trigram["checked"] >= TRIGRAM_PROBE_SECONDS:
+                trigram["enabled"] = bool(conn.execute(text(TRIGRAM_PROBE_SQL)).scalar())
+                trigram["checked"] = now
+            sql, filter_params = search_sql(search_lang, project_columns(keys), f, bool(trigram["enabled"]))
+            rows = conn.execute(text(sql), {**params, **filter_params}).mappings().all()
+            variants = {}
+            if keys is None or "imageSrcset" in keys or "imagesSrcset" in keys:
+                urls = [u for r in rows for u in [r.get("image")] + list(r.get("images") or [])]
+                variants = load_variants(conn, urls)
+            return rows, variants
+
+        try:
+            rows, variants = await _run(query)
+            snapshot = await catalog.aget()
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"search db error: {e}")
+
+        total = int(rows[0]["total_count"]) if rows else 0
+        items = [p.to_api(variants, keys) for p in ProjectRecord.from_rows(rows)]
+        next_offset = offset + len(items) if offset + len(items) < total else None
+        body = cached_body({"items": items, "total": total, "nextOffset": next_offset}, last_modified=snapshot.modified_at)
+        return json_response(request, body, headers)
+
     @router.get("/api/technologies")
-    def api_technologies():
+    async def api_technologies(request: Request):
         try:
-            with engine.connect() as conn:
-                rows = conn.execute(text("SELECT name FROM technologies ORDER BY name ASC")).mappings().all()
-                if rows:
-                    return [r["name"] for r in rows]
-
-                derived = conn.execute(
-                    text(
-                        """
-                        SELECT DISTINCT t AS name
-                        FROM projects
-                        LEFT JOIN LATERAL unnest(technologies) AS t ON TRUE
-                        WHERE t IS NOT NULL AND t <> ''
-                        ORDER BY name ASC
-                        """
-                    )
-                ).mappings().all()
-                return [r["name"] for r in derived]
+            snapshot = await catalog.aget()
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"technologies db error: {e}")
+        return json_response(request, snapshot.response("technologies", lambda: snapshot.technologies))
+
+    @router.get("/api/bootstrap")
+    async def api_bootstrap(request: Request):
+        """
+        Categories, technologies, genres and stats in one body with one ETag,
+        for first paint. All four come from the catalog snapshot, which loads
+        them over a single connection; the body is serialized once per snapshot.
+        """
+        try:
+            snapshot = await catalog.aget()
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"bootstrap db error: {e}")
+        return json_response(
+            request,
+            snapshot.response(
+                "bootstrap",
+                lambda: {
+                    "categories": snapshot.categories,
+                    "technologies": snapshot.technologies,
+                    "genres": snapshot.genres,
+                    "stats": dict(snapshot.stats),
+                },
+            ),
+        )
 
     @router.get("/api/categories")
-    def api_categories():
+    async def api_categories(request: Request):
         try:
-            with engine.connect() as conn:
-                rows = conn.execute(
-                    text("SELECT id, name, name_ru, name_kz, name_en FROM categories ORDER BY name ASC")
-                ).mappings().all()
-                if rows:
-                    out = []
-                    for r in rows:
-                        code = r["name"]
-                        out.append(
-                            {
-                                "id": int(r["id"]),
-                                "code": code,
-                                "nameRu": r.get("name_ru") or code,
-                                "nameKz": r.get("name_kz") or code,
-                                "nameEn": r.get("name_en") or code,
-                            }
-                        )
-                    return out
-
-                derived = conn.execute(
-                    text(
-                        """
-                        SELECT DISTINCT category AS name
-                        FROM projects
-                        WHERE category IS NOT NULL AND category <> ''
-                        ORDER BY name ASC
-                        """
-                    )
-                ).mappings().all()
-                return [{"code": r["name"], "nameRu": r["name"], "nameKz": r["name"], "nameEn": r["name"]} for r in derived]
+            snapshot = await catalog.aget()
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"categories db error: {e}")
+        return json_response(request, snapshot.response("categories", lambda: snapshot.categories))
 
     @router.get("/api/genres")
-    def api_genres():
+    async def api_genres(request: Request):
         try:
-            with engine.connect() as conn:
-                rows = conn.execute(text("SELECT name FROM genres ORDER BY name ASC")).mappings().all()
-                if rows:
-                    return [r["name"] for r in rows]
-
-                derived = conn.execute(
-                    text(
-                        """
-                        SELECT DISTINCT g AS name
-                        FROM projects
-                        LEFT JOIN LATERAL unnest(genres) AS g ON TRUE
-                        WHERE g IS NOT NULL AND g <> ''
-                        ORDER BY name ASC
-                        """
-                    )
-                ).mappings().all()
-                return [r["name"] for r in derived]
+            snapshot = await catalog.aget()
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"genres db error: {e}")
+        return json_response(request, snapshot.response("genres", lambda: snapshot.genres))
 
     @router.get("/health")
-    def health():
-        return {"status": "ok"}
+    async def health(request: Request):
+        return json_response(request, health_body)
 
     @router.get("/api/health")
-    def api_health():
-        return {"status": "ok"}
+    async def api_health(request: Request):
+        return json_response(request, health_body)
 
     return router
@@ -1,33 +1,35 @@
-from pathlib import Path
-
 from fastapi import APIRouter, Request
 from fastapi.responses import HTMLResponse
-from fastapi.templating import Jinja2Templates
+
+from ...http_cache import cached_response
+from ...templating import SiteTemplates
 
 
-def create_legacy_pages_router(templates_dir: Path) -> APIRouter:
+def create_legacy_pages_router(site: SiteTemplates) -> APIRouter:
     """
     Старые Jinja-страницы. Чтобы не конфликтовать с / (редирект на фронт),
-    уносим их под /legacy.
+    уносим их под /legacy. Страницы статичные: рендерятся один раз (SiteTemplates.prerender).
     """
-    templates = Jinja2Templates(directory=str(templates_dir))
     router = APIRouter(prefix="/legacy", tags=["legacy"])
 
+    def page(request: Request, name: str):
+        cached = site.static_page(name, request.app.url_path_for)
+        return cached_response(request, cached, media_type="text/html; charset=utf-8")
+
     @router.get("/", response_class=HTMLResponse)
     def page_index(request: Request):
-        return templates.TemplateResponse("index.html", {"request": request})
+        return page(request, "index.html")
 
     @router.get("/projects", response_class=HTMLResponse)
     def page_projects(request: Request):
-        return templates.TemplateResponse("projects.html", {"request": request})
+        return page(request, "projects.html")
 
     @router.get("/technologies", response_class=HTMLResponse)
     def page_technologies(request: Request):
-        return templates.TemplateResponse("technologies.html", {"request": request})
+        return page(request, "technologies.html")
 
     @router.get("/about", response_class=HTMLResponse)
     def page_about(request: Request):
-        return templates.TemplateResponse("about.html", {"request": request})
+        return page(request, "about.html")
 
     return router
-
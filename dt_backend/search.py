@@ -0,0 +1,75 @@
+"""
+Full-text project search.
+
+Each language has a stored generated `search_<lang>` tsvector (title weighted
+A, tag-stripped description weighted B) with a GIN index, see migrations.
+When pg_trgm is installed, titles also match by trigram word similarity
+(`<%`, GIN-indexed on lower(title_<lang>)), which tolerates typos in a prefix
+of the title. Whether it is installed is re-checked every
+TRIGRAM_PROBE_SECONDS: migration 3 may create it after the workers started.
+"""
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from .filters import ProjectFilter
+
+# Kazakh has no built-in snowball config, so it is only tokenized ('simple').
+SEARCH_CONFIGS: Dict[str, str] = {"ru": "russian", "kz": "simple", "en": "english"}
+
+# Как часто воркер заново проверяет, установлен ли pg_trgm.
+TRIGRAM_PROBE_SECONDS = 60.0
+
+TRIGRAM_PROBE_SQL = "SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')"
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def prefix_tsquery(q: str) -> str:
+    """
+    "machine learn" -> "machine & learn:*": all words required, the last one
+    as a prefix (search-as-you-type). Only \\w tokens are kept, so the result
+    is always valid to_tsquery input. Returns "" when there are no words.
+    """
+    words = _WORD_RE.findall((q or "").lower())[:16]
+    if not words:
+        return ""
+    return " & ".join(words[:-1] + [words[-1] + ":*"])
+
+
+def search_sql(
+    lang: str,
+    columns: List[str],
+    f: ProjectFilter,
+    trigram: bool,
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Ranked search query; expects params :tsq, :q, :limit, :offset
+    (plus the filter params returned here).
+    """
+    config = SEARCH_CONFIGS[lang]
+    vector = f"p.search_{lang}"
+    title = f"lower(p.title_{lang})"
+
+    match = f"{vector} @@ tsq.query"
+    rank = f"ts_rank_cd({vector}, tsq.query)"
+    if trigram:
+        match = f"({match} OR :q <% {title})"
+        rank = f"{rank} + word_similarity(:q, {title})"
+
+    where, params = f.where_sql(alias="p")
+    select = ", ".join(f"p.{c}" for c in columns)
+    sql = f"""
+        SELECT {select}, COUNT(*) OVER () AS total_count
+        FROM projects p, to_tsquery('{config}', :tsq) AS tsq(query)
+        WHERE {match} AND {where}
+        ORDER BY {rank} DESC, p.featured DESC, p.id ASC
+        LIMIT :limit OFFSET :offset
+    """
+    return sql, params
+
+
+def search_params(q: str, limit: int, offset: int) -> Optional[Dict[str, Any]]:
+    tsq = prefix_tsquery(q)
+    if not tsq:
+        return None
+    return {"tsq": tsq, "q": q.strip().lower(), "limit": limit, "offset": offset}
@@ -0,0 +1,152 @@
+"""
+/static mount with cache headers and precompressed assets.
+
+Fingerprinted uploads never change under the same URL, so they are served as
+immutable for a year:
+  - content-addressed `uploads/ab/cd/<sha256>.<ext>` (+ `.w<width>.<fmt>` variants);
+  - legacy `uploads/<token_hex(6)>_<name>` files, which are never overwritten either.
+Everything else (css, styles.css) is `no-cache`: browsers keep it but
+revalidate with ETag / Last-Modified and get a 304.
+
+Text assets are served from a `.br` / `.gz` sibling when the client accepts
+that encoding and the sibling is not older than the original (see
+`precompress` and `python -m dt_backend.cli precompress-static`). Byte ranges
+(and If-Range) are handled by Starlette's FileResponse; range requests always
+get the identity encoding.
+"""
+import gzip
+import mimetypes
+import os
+import re
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+from .compression import accepted_encodings
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli not installed
+    brotli = None
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "public, no-cache"
+
+_IMMUTABLE_PATH_RE = re.compile(
+    r"^uploads/(?:[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.|[0-9a-f]{12}_[^/]+$)"
+)
+
+COMPRESSIBLE_SUFFIXES = frozenset({".css", ".js", ".mjs", ".svg", ".html", ".txt", ".json", ".map", ".xml"})
+
+# (Content-Encoding, file suffix) in order of preference.
+PRECOMPRESSED: Tuple[Tuple[str, str], ...] = (("br", ".br"), ("gzip", ".gz"))
+
+# Smaller files are not worth a second request-path stat / a sibling on disk.
+PRECOMPRESS_MIN_SIZE = 256
+
+
+def is_immutable_path(path: str) -> bool:
+    """`path` is relative to the /static mount."""
+    return bool(_IMMUTABLE_PATH_RE.match(path.lstrip("/")))
+
+
+class CachingStaticFiles(StaticFiles):
+    def _precompressed(
+        self, full_path: "os.PathLike[str] | str", stat_result: os.stat_result, request_headers: Headers
+    ) -> Optional[Tuple[str, str, os.stat_result]]:
+        if "range" in request_headers:
+            return None
+        accepted = accepted_encodings(request_headers.get("accept-encoding"))
+        for encoding, suffix in PRECOMPRESSED:
+            if encoding not in accepted:
+                continue
+            candidate = f"{os.fspath(full_path)}{suffix}"
+            try:
+                st = os.stat(candidate)
+            except OSError:
+                continue
+            if st.st_mtime >= stat_result.st_mtime:
+                return encoding, candidate, st
+        return None
+
+    def file_response(
+        self,
+        full_path: "os.PathLike[str] | str",
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        path = self.get_path(scope).replace(os.sep, "/")
+
+        headers: Dict[str, str] = {}
+        if is_immutable_path(path):
+            headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        else:
+            headers["Cache-Control"] = REVALIDATE_CACHE_CONTROL
+
+        sibling = None
+        if Path(path).suffix.lower() in COMPRESSIBLE_SUFFIXES:
+            headers["Vary"] = "Accept-Encoding"
+            sibling = self._precompressed(full_path, stat_result, request_headers)
+
+        if sibling is not None:
+            encoding, sibling_path, sibling_stat = sibling
+            headers["Content-Encoding"] = encoding
+            response = FileResponse(
+                sibling_path,
+                status_code=status_code,
+                headers=headers,
+                media_type=mimetypes.guess_type(os.fspath(full_path))[0] or "application/octet-stream",
+                stat_result=sibling_stat,
+            )
+        else:
+            response = FileResponse(full_path, status_code=status_code, headers=headers, stat_result=stat_result)
+
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+def precompress(directory: Path, *, force: bool = False) -> Dict[str, int]:
+    """
+    Writes `.gz` (and `.br` when brotli is installed) siblings for text assets
+    under `directory`, skipping uploads/, tiny files, up-to-date siblings and
+    ones that would not be smaller. Returns counters for the CLI.
+    """
+    stats = {"files": 0, "written": 0, "skipped": 0, "bytes_in": 0, "bytes_out": 0}
+    encoders = [(".gz", lambda data: gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        encoders.insert(0, (".br", lambda data: brotli.compress(data, quality=11)))
+
+    uploads = directory / "uploads"
+    for src in sorted(directory.rglob("*")):
+        if not src.is_file() or uploads in src.parents or src.suffix.lower() not in COMPRESSIBLE_SUFFIXES:
+            continue
+        st = src.stat()
+        if st.st_size < PRECOMPRESS_MIN_SIZE:
+            continue
+        stats["files"] += 1
+        data = None
+        for suffix, encode in encoders:
+            dest = src.with_name(src.name + suffix)
+            if not force and dest.exists() and dest.stat().st_mtime >= st.st_mtime:
+                stats["skipped"] += 1
+                continue
+            if data is None:
+                data = src.read_bytes()
+            out = encode(data)
+            if len(out) >= len(data):
+                stats["skipped"] += 1
+                continue
+            tmp = dest.with_name(dest.name + ".tmp")
+            tmp.write_bytes(out)
+            os.replace(tmp, dest)
+            stats["written"] += 1
+            stats["bytes_in"] += len(data)
+            stats["bytes_out"] += len(out)
+    return stats
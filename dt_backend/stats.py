@@ -0,0 +1,59 @@
+"""
+Homepage counters kept in the single-row `site_stats` table.
+
+Counting projects and distinct technologies needs a scan of `projects`, so it
+is done by the write paths (inside their transaction, via
+`refresh_site_stats`) instead of on every /api/stats request. `students` is
+not derived from data: it is edited in /api/admin/stats.
+"""
+from typing import Any, Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+DEFAULT_STUDENTS = 500
+
+SITE_STATS_SQL = "SELECT projects, technologies, students, updated_at FROM site_stats WHERE id"
+
+REFRESH_SQL = """
+    UPDATE site_stats SET
+      projects = (SELECT COUNT(*) FROM projects),
+      technologies = (
+        SELECT COUNT(DISTINCT t)
+        FROM projects, unnest(technologies) AS t
+      ),
+      updated_at = now()
+    WHERE id
+"""
+
+
+def refresh_site_stats(conn: Connection) -> None:
+    """
+    Recounts projects/technologies. Call it in the same transaction as the
+    write that changed `projects`. The row lock is taken first, so two
+    concurrent writers are serialized and the second one counts the first
+    one's committed rows (READ COMMITTED takes a new snapshot per statement).
+    """
+    conn.execute(text("SELECT 1 FROM site_stats WHERE id FOR UPDATE"))
+    conn.execute(text(REFRESH_SQL))
+
+
+def set_students(conn: Connection, students: int) -> None:
+    conn.execute(
+        text("UPDATE site_stats SET students = :students, updated_at = now() WHERE id"),
+        {"students": students},
+    )
+
+
+def load_site_stats(conn: Connection) -> Optional[Dict[str, Any]]:
+    row = conn.execute(text(SITE_STATS_SQL)).mappings().first()
+    return dict(row) if row else None
+
+
+def stats_payload(row: Dict[str, Any]) -> Dict[str, int]:
+    return {
+        "projects": int(row["projects"]),
+        "students": int(row["students"]),
+        "technologies": int(row["technologies"]),
+    }
+
@@ -0,0 +1,71 @@
+"""
+One Jinja environment for every template-rendering router.
+
+create_app builds a SiteTemplates once. It has a filesystem bytecode cache
+shared by workers, so a restart loads compiled templates instead of parsing
+them. At startup it compiles every template under templates/ (precompile) and
+renders the static legacy pages (prerender). Those pages do not depend on the
+request, so they are served from memory as CachedBody (ETag / 304,
+compressed once); static URLs in them are paths, not absolute URLs.
+"""
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional
+
+import jinja2
+from fastapi.templating import Jinja2Templates
+
+from .http_cache import CachedBody, cached_bytes
+
+log = logging.getLogger(__name__)
+
+# Страницы без данных из БД и без request: рендерятся один раз.
+STATIC_PAGES = ("index.html", "projects.html", "technologies.html", "about.html")
+
+UrlPathFor = Callable[..., Any]
+
+
+class SiteTemplates:
+    def __init__(self, directory: Path, *, cache_dir: Optional[str] = None, auto_reload: bool = False) -> None:
+        if cache_dir:
+            Path(cache_dir).mkdir(parents=True, exist_ok=True)
+        env = jinja2.Environment(
+            loader=jinja2.FileSystemLoader(str(directory)),
+            autoescape=jinja2.select_autoescape(),
+            # Без auto_reload шаблон не stat-ится при каждом get_template.
+            auto_reload=auto_reload,
+            bytecode_cache=jinja2.FileSystemBytecodeCache(cache_dir or None),
+        )
+        self.templates = Jinja2Templates(env=env)
+        self._pages: Dict[str, CachedBody] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def env(self) -> jinja2.Environment:
+        return self.templates.env
+
+    def precompile(self) -> int:
+        """Loads (and compiles, or reads from the bytecode cache) every .html template."""
+        names = self.env.list_templates(filter_func=lambda n: n.endswith(".html"))
+        for name in names:
+            try:
+                self.env.get_template(name)
+            except jinja2.TemplateError:
+                log.exception("template %s does not compile", name)
+        return len(names)
+
+    def prerender(self, url_path_for: UrlPathFor, names: Iterable[str] = STATIC_PAGES) -> None:
+        for name in names:
+            self.static_page(name, url_path_for)
+
+    def static_page(self, name: str, url_path_for: UrlPathFor) -> CachedBody:
+        """Rendered body of a request-independent page (memoized until restart)."""
+        page = self._pages.get(name)
+        if page is None:
+            html = self.env.get_template(name).render(
+                url_for=lambda route, /, **params: str(url_path_for(route, **params))
+            )
+            with self._lock:
+                page = self._pages.setdefault(name, cached_bytes(html.encode("utf-8")))
+        return page
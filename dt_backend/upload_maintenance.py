@@ -0,0 +1,267 @@
+"""
+Background maintenance of uploads (run through jobs.JobRegistry).
+
+cleanup_missing_uploads: drops image/images references to files that are no
+longer on disk. The uploads directory is listed once (UploadStore.stored_urls),
+new values are computed in memory while projects stream from a server-side
+cursor, and changed rows are written with one `UPDATE ... FROM (VALUES ...)`
+per batch. A row edited by an admin in the meantime is left alone (the UPDATE
+matches on the old values as read, not normalized).
+
+collect_garbage: deletes files in static/uploads that no project references
+(projects.image / projects.images; a WebP/AVIF variant lives as long as its
+original). Files younger than the grace period are kept: an upload is on disk
+before the project that uses it is committed. Deletion goes in batches; each
+batch locks the blob rows, re-checks references and mtimes, then removes the
+files and their upload_blobs / upload_variants / stale upload_refs rows.
+"""
+import re
+import time
+from typing import Any, Dict, List, Sequence, Set, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from .images import UPLOADS_URL_PREFIX
+from .jobs import Job
+from .records import ProjectRecord
+from .uploads import UploadStore
+
+# Проектов на один fetch курсора и на один пакетный UPDATE.
+CLEANUP_BATCH_SIZE = 500
+
+GC_GRACE_SECONDS = 24 * 3600
+GC_BATCH_SIZE = 200
+# Сколько путей-кандидатов показывать в отчёте.
+GC_SAMPLE_SIZE = 50
+
+# images.make_variants: `<original>.w<width>.<ext>`
+_VARIANT_RE = re.compile(r"^(?P<source>.+)\.w\d+\.(?:webp|avif)$")
+
+REFERENCED_SQL = f"""
+    SELECT DISTINCT u
+    FROM projects, unnest(array_append(images, image)) AS u
+    WHERE u LIKE '{UPLOADS_URL_PREFIX}%'
+"""
+
+# (id, old image, old images, new image, new images). Old values are the raw
+# column values: the UPDATE matches on them, and ProjectRecord would drop blank entries.
+Change = Tuple[int, Any, Any, str, List[str]]
+
+BATCH_UPDATE_SQL = """
+    WITH v (id, old_image, old_images, image, images) AS (
+      VALUES {values}
+    ),
+    updated AS (
+      UPDATE projects AS p
+      SET image = v.image, images = v.images
+      FROM v
+      WHERE p.id = v.id AND p.image = v.old_image AND p.images = v.old_images
+      RETURNING p.id, p.image, p.images
+    ),
+    dropped AS (
+      DELETE FROM upload_refs AS r
+      USING updated AS u
+      WHERE r.project_id = u.id AND NOT (r.url = ANY(array_append(u.images, u.image)))
+      RETURNING r.url
+    )
+    SELECT (SELECT COUNT(*) FROM updated) AS updated, ARRAY(SELECT url FROM dropped) AS dropped
+"""
+
+
+def _reconcile(rec: ProjectRecord, stored: Set[str]) -> Tuple[str, List[str], int]:
+    """(new image, new images, removed references) for one project."""
+
+    def exists(url: str) -> bool:
+        return not url.startswith(UPLOADS_URL_PREFIX) or url in stored
+
+    image = rec.image.strip()
+    new_image = image if exists(image) else ""
+    removed = 1 if image and not new_image else 0
+
+    new_images: List[str] = []
+    for url in rec.images:
+        if exists(url):
+            if url not in new_images:
+                new_images.append(url)
+        else:
+            removed += 1
+    if new_image:
+        new_images = [new_image] + [u for u in new_images if u != new_image]
+    return new_image, new_images, removed
+
+
+def _write_batch(engine: Engine, changes: Sequence[Change]) -> Tuple[int, List[str]]:
+    values = []
+    params: Dict[str, Any] = {}
+    for i, (project_id, old_image, old_images, image, images) in enumerate(changes):
+        values.append(
+            f"(CAST(:id{i} AS integer), CAST(:old_image{i} AS text), CAST(:old_images{i} AS text[]), "
+            f"CAST(:image{i} AS text), CAST(:images{i} AS text[]))"
+        )
+        params.update(
+            {
+                f"id{i}": project_id,
+                f"old_image{i}": old_image,
+                f"old_images{i}": old_images,
+                f"image{i}": image,
+                f"images{i}": images,
+            }
+        )
+    with engine.begin() as conn:
+        row = conn.execute(text(BATCH_UPDATE_SQL.format(values=", ".join(values))), params).one()
+    return int(row.updated), list(row.dropped)
+
+
+def cleanup_missing_uploads(engine: Engine, store: UploadStore, job: Job) -> Dict[str, Any]:
+    """
+    Removes references to missing /static/uploads files from projects.
+    Does NOT delete any existing files (only blob rows of files already gone).
+    """
+    job.report(phase="listing")
+    stored = store.stored_urls()
+    job.report(phase="checking", files=len(stored))
+
+    checked = updated = removed_refs = 0
+    dropped: List[str] = []
+    with engine.connect() as conn:
+        result = conn.execution_options(yield_per=CLEANUP_BATCH_SIZE).execute(
+            text("SELECT id, image, images FROM projects ORDER BY id ASC")
+        )
+        for batch in result.mappings().partitions():
+            changes: List[Change] = []
+            for row in batch:
+                rec = ProjectRecord.from_row(row)
+                image, images, removed = _reconcile(rec, stored)
+                if image != row["image"] or images != row["images"]:
+                    changes.append((rec.id, row["image"], row["images"], image, images))
+                    removed_refs += removed
+            checked += len(batch)
+            if changes:
+                n, gone = _write_batch(engine, changes)
+                updated += n
+                dropped += gone
+            job.report(checked=checked, updated=updated, removedRefs=removed_refs)
+
+    # Файлов уже нет; release() убирает их upload_blobs/варианты, если ссылок не осталось.
+    store.release(dropped)
+    return {"checked": checked, "updated": updated, "removedRefs": removed_refs}
+
+
+def _owner(url: str) -> str:
+    """The URL whose reference keeps `url` alive (the original for a variant)."""
+    m = _VARIANT_RE.match(url)
+    return m.group("source") if m else url
+
+
+def _is_fresh(store: UploadStore, url: str, cutoff: float) -> bool:
+    path = store.path_for(url)
+    try:
+        return path is not None and path.stat().st_mtime >= cutoff
+    except FileNotFoundError:
+        return False
+
+
+def _delete_batch(engine: Engine, store: UploadStore, urls: Sequence[str], cutoff: float) -> Tuple[List[str], int]:
+    """Deletes what is still garbage among `urls`; returns (deleted urls, bytes)."""
+    owners = list({_owner(u) for u in urls})
+    deleted: List[str] = []
+    freed = 0
+    with engine.begin() as conn:
+        # Те же блокировки, что у UploadStore.release / _place.
+        conn.execute(
+            text("SELECT 1 FROM upload_blobs WHERE url = ANY(CAST(:urls AS text[])) ORDER BY url FOR UPDATE"),
+            {"urls": owners},
+        )
+        referenced = set(
+            conn.execute(
+                text(
+                    """
+                    SELECT DISTINCT u
+                    FROM projects, unnest(array_append(images, image)) AS u
+                    WHERE u = ANY(CAST(:urls AS text[]))
+                    """
+                ),
+                {"urls": owners},
+            ).scalars()
+        )
+        for url in urls:
+            if _owner(url) in referenced:
+                continue
+            path = store.path_for(url)
+            if path is None or _is_fresh(store, _owner(url), cutoff):
+                continue
+            try:
+                st = path.stat()
+                if st.st_mtime >= cutoff:
+                    continue
+                path.unlink()
+            except FileNotFoundError:
+                continue
+            deleted.append(url)
+            freed += st.st_size
+        if deleted:
+            params = {"urls": deleted}
+            conn.execute(text("DELETE FROM upload_refs WHERE url = ANY(CAST(:urls AS text[]))"), params)
+            conn.execute(
+                text("DELETE FROM upload_variants WHERE url = ANY(CAST(:urls AS text[])) OR source = ANY(CAST(:urls AS text[]))"),
+                params,
+            )
+            conn.execute(text("DELETE FROM upload_blobs WHERE url = ANY(CAST(:urls AS text[]))"), params)
+    return deleted, freed
+
+
+def collect_garbage(
+    engine: Engine,
+    store: UploadStore,
+    job: Job,
+    *,
+    dry_run: bool = False,
+    grace_seconds: float = GC_GRACE_SECONDS,
+    batch_size: int = GC_BATCH_SIZE,
+) -> Dict[str, Any]:
+    """Deletes unreferenced upload files older than `grace_seconds` (see module docstring)."""
+    cutoff = time.time() - grace_seconds
+
+    job.report(phase="listing")
+    files = store.stored_files()
+    with engine.connect() as conn:
+        referenced = set(conn.execute(text(REFERENCED_SQL)).scalars())
+
+    orphans: List[str] = []
+    orphan_bytes = too_new = 0
+    for url, (size, mtime) in sorted(files.items()):
+        owner = _owner(url)
+        if owner in referenced:
+            continue
+        # Вариант живёт, пока свежий его оригинал (повторная загрузка обновляет только mtime оригинала).
+        if max(mtime, files.get(owner, (0, 0.0))[1]) >= cutoff:
+            too_new += 1
+            continue
+        orphans.append(url)
+        orphan_bytes += size
+
+    report: Dict[str, Any] = {
+        "dryRun": dry_run,
+        "scanned": len(files),
+        "referenced": len(referenced),
+        "orphans": len(orphans),
+        "orphanBytes": orphan_bytes,
+        "tooNew": too_new,
+        "deleted": 0,
+        "reclaimedBytes": 0,
+        "sample": orphans[:GC_SAMPLE_SIZE],
+    }
+    job.report(phase="deleting" if not dry_run else "done", **{k: v for k, v in report.items() if k != "sample"})
+    if dry_run:
+        return report
+
+    for i in range(0, len(orphans), batch_size):
+        deleted, freed = _delete_batch(engine, store, orphans[i : i + batch_size], cutoff)
+        report["deleted"] += len(deleted)
+        report["reclaimedBytes"] += freed
+        job.report(deleted=report["deleted"], reclaimedBytes=report["reclaimedBytes"])
+
+    # Пустые каталоги шардов не удаляем: параллельная загрузка может как раз писать туда.
+    job.report(phase="done")
+    return report
@@ -0,0 +1,362 @@
+"""
+Shared upload service for the admin routers.
+
+Uploads are copied from Starlette's spooled temp file to disk in fixed-size
+chunks in a worker thread (never `await upload.read()` of the whole file on
+the event loop). Size limits are enforced while streaming, per file and per
+request, and the first bytes are sniffed so non-images are rejected before
+anything lands in `static/uploads`.
+
+Storage is content-addressed: a file is named by the SHA-256 of its bytes and
+sharded as `uploads/ab/cd/<sha256>.<ext>` (one row per file in
+`upload_blobs`), so the same image uploaded twice is stored once and its URL
+never changes meaning (served as immutable, see static_files.py). Which
+projects use which upload is tracked in `upload_refs`; a file is removed only
+when its last reference is released (and it was not just reused, see release).
+"""
+import hashlib
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from fastapi import HTTPException, UploadFile
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from starlette.concurrency import run_in_threadpool
+
+from .images import UPLOADS_URL_PREFIX, delete_variants, load_variants, make_variants, record_variants
+
+CHUNK_SIZE = 1024 * 1024
+SNIFF_SIZE = 32
+# Потоков для параллельного обхода шардов uploads (stored_urls).
+LIST_WORKERS = 8
+
+IMAGE_MIME_TYPES = {
+    "jpg": "image/jpeg",
+    "png": "image/png",
+    "gif": "image/gif",
+    "webp": "image/webp",
+    "avif": "image/avif",
+    "heic": "image/heic",
+    "bmp": "image/bmp",
+}
+
+
+# BITMAPCOREHEADER, BITMAPINFOHEADER, V3 (Adobe), V4, V5.
+BMP_DIB_HEADER_SIZES = frozenset({12, 40, 56, 108, 124})
+
+
+def _is_bmp(head: bytes, size: Optional[int]) -> bool:
+    """A "BM" prefix alone matches plenty of text: also checks the declared file size and the DIB header size."""
+    if len(head) < 18 or not head.startswith(b"BM"):
+        return False
+    declared = int.from_bytes(head[2:6], "little")
+    if declared < 26 or (size is not None and declared > size):
+        return False
+    return int.from_bytes(head[14:18], "little") in BMP_DIB_HEADER_SIZES
+
+
+def sniff_image_type(head: bytes, size: Optional[int] = None) -> Optional[str]:
+    """
+    Image extension from magic bytes, or None. SVG is deliberately not accepted
+    (scripts). `size` is the whole file size when known (checked against BMP's header).
+    """
+    if head.startswith(b"\xff\xd8\xff"):
+        return "jpg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return "gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    if head[4:8] == b"ftyp" and head[8:12] in (b"avif", b"avis", b"heic", b"heix", b"mif1", b"msf1"):
+        return "avif" if head[8:12] in (b"avif", b"avis") else "heic"
+    if _is_bmp(head, size):
+        return "bmp"
+    return None
+
+
+def blob_name(digest: str, ext: str) -> str:
+    """Path of a blob relative to the uploads dir: "ab/cd/abcd...ef.png"."""
+    return f"{digest[:2]}/{digest[2:4]}/{digest}.{ext}"
+
+
+def set_project_refs(conn: Connection, project_id: int, urls: Iterable[str]) -> List[str]:
+    """
+    Makes the upload references of `project_id` exactly the /static/uploads
+    URLs in `urls` (other URLs are ignored). Returns the URLs whose reference
+    was dropped; pass them to UploadStore.release() after the commit.
+    """
+    keep = [u for u in dict.fromkeys(str(u or "").strip() for u in urls) if u.startswith(UPLOADS_URL_PREFIX)]
+    dropped = (
+        conn.execute(
+            text("DELETE FROM upload_refs WHERE project_id = :pid AND NOT (url = ANY(CAST(:keep AS text[]))) RETURNING url"),
+            {"pid": project_id, "keep": keep},
+        )
+        .scalars()
+        .all()
+    )
+    if keep:
+        conn.execute(
+            text(
+                """
+                INSERT INTO upload_refs (url, project_id)
+                SELECT u, :pid FROM unnest(CAST(:keep AS text[])) AS u
+                ON CONFLICT DO NOTHING
+                """
+            ),
+            {"pid": project_id, "keep": keep},
+        )
+    return list(dropped)
+
+
+# release() не удаляет файлы моложе этого: _place обновляет mtime при повторном
+# использовании blob, а ссылка проекта на него появляется только после коммита.
+RELEASE_GRACE_SECONDS = 3600
+
+
+class UploadBudget:
+    """Bytes left for one request; shared by all files of a multipart form."""
+
+    def __init__(self, max_bytes: int) -> None:
+        self.remaining = max_bytes
+
+
+class UploadStore:
+    def __init__(
+        self,
+        directory: Path,
+        engine: Engine,
+        *,
+        max_file_bytes: int,
+        max_request_bytes: int,
+        image_avif: bool = False,
+        release_grace_seconds: float = RELEASE_GRACE_SECONDS,
+    ) -> None:
+        self.directory = directory
+        self._engine = engine
+        self.max_file_bytes = max_file_bytes
+        self.max_request_bytes = max_request_bytes
+        self.image_avif = image_avif
+        self.release_grace_seconds = release_grace_seconds
+
+    def budget(self) -> UploadBudget:
+        return UploadBudget(self.max_request_bytes)
+
+    def path_for(self, url: str) -> Optional[Path]:
+        """Filesystem path of an /static/uploads/... URL (None for anything else)."""
+        p = str(url or "").strip()
+        if not p.startswith(UPLOADS_URL_PREFIX):
+            return None
+        name = p[len(UPLOADS_URL_PREFIX):]
+        if not name or ".." in Path(name).parts:
+            return None
+        return self.directory / name
+
+    def stored_urls(self, workers: int = LIST_WORKERS) -> Set[str]:
+        """
+        /static/uploads URLs of every file on disk. One pass over the directory;
+        shard subdirectories are listed in parallel (helps on network storage).
+        """
+        return set(self._scan(workers, stat=False))
+
+    def stored_files(self, workers: int = LIST_WORKERS) -> Dict[str, Tuple[int, float]]:
+        """Like stored_urls(), with (size, mtime) of each file."""
+        return {url: (st.st_size, st.st_mtime) for url, st in self._scan(workers, stat=True).items() if st}
+
+    def _scan(self, workers: int, *, stat: bool) -> Dict[str, Optional[os.stat_result]]:
+        root = str(self.directory)
+
+        def walk(top: str, recurse: bool) -> List[Tuple[str, Optional[os.stat_result]]]:
+            found = []
+            stack = [top]
+            while stack:
+                try:
+                    with os.scandir(stack.pop()) as it:
+                        for entry in it:
+                            if entry.is_dir(follow_symlinks=False):
+                                if recurse:
+                                    stack.append(entry.path)
+                                continue
+                            rel = os.path.relpath(entry.path, root).replace(os.sep, "/")
+                            try:
+                                st = entry.stat(follow_symlinks=False) if stat else None
+                            except FileNotFoundError:
+                                continue  # удалён во время обхода
+                            found.append((UPLOADS_URL_PREFIX + rel, st))
+                except FileNotFoundError:
+                    pass
+            return found
+
+        files = dict(walk(root, recurse=False))
+        try:
+            with os.scandir(root) as it:
+                subdirs = [e.path for e in it if e.is_dir(follow_symlinks=False)]
+        except FileNotFoundError:
+            return files
+
+        if subdirs:
+            with ThreadPoolExecutor(max_workers=min(workers, len(subdirs))) as pool:
+                for found in pool.map(lambda d: walk(d, recurse=True), subdirs):
+                    files.update(found)
+        return files
+
+    def _copy(self, src: BinaryIO, budget: UploadBudget) -> Tuple[str, str, str, int]:
+        """Streams `src` into a temp file; returns (temp path, sha256 hex, ext, size)."""
+        head = src.read(SNIFF_SIZE)
+        ext = sniff_image_type(head)
+        if ext is None:
+            raise HTTPException(status_code=415, detail="Only image uploads are allowed")
+
+        fd, tmp_name = tempfile.mkstemp(prefix=".upload-", suffix=".part", dir=self.directory)
+        digest = hashlib.sha256()
+        written = 0
+        try:
+            with os.fdopen(fd, "wb") as out:
+                chunk = head
+                while chunk:
+                    written += len(chunk)
+                    if written > self.max_file_bytes:
+                        raise HTTPException(
+                            status_code=413,
+                            detail=f"File is larger than {self.max_file_bytes / (1024 * 1024):g} MB",
+                        )
+                    if written > budget.remaining:
+                        raise HTTPException(
+                            status_code=413,
+                            detail=f"Upload is larger than {self.max_request_bytes / (1024 * 1024):g} MB in total",
+                        )
+                    digest.update(chunk)
+                    out.write(chunk)
+                    chunk = src.read(CHUNK_SIZE)
+            # Заявленный в BMP размер файла известен только после копирования.
+            if ext == "bmp" and sniff_image_type(head, written) is None:
+                raise HTTPException(status_code=415, detail="Only image uploads are allowed")
+        except BaseException:
+            _unlink(Path(tmp_name))
+            raise
+        budget.remaining -= written
+        return tmp_name, digest.hexdigest(), ext, written
+
+    def _place(self, tmp_name: str, digest: str, ext: str, size: int) -> Tuple[str, bool]:
+        """
+        Moves the temp file to its content address (or drops it if the blob is
+        already stored). Returns (url, has_variants). The blob row is upserted
+        first, so a concurrent release() of the same blob (which holds the row
+        lock) finishes before we check whether the file is on disk.
+        """
+        name = blob_name(digest, ext)
+        url = f"{UPLOADS_URL_PREFIX}{name}"
+        dest = self.directory / name
+        try:
+            with self._engine.begin() as conn:
+                conn.execute(
+                    text(
+                        """
+                        INSERT INTO upload_blobs (sha256, url, size, mime)
+                        VALUES (:sha256, :url, :size, :mime)
+                        ON CONFLICT (sha256) DO UPDATE SET size = EXCLUDED.size
+                        """
+                    ),
+                    {"sha256": digest, "url": url, "size": size, "mime": IMAGE_MIME_TYPES[ext]},
+                )
+                if dest.exists():
+                    _unlink(Path(tmp_name))
+                    # Свежий mtime: GC (upload_maintenance) не трогает файлы моложе grace period,
+                    # а ссылка на переиспользованный файл появится только после коммита проекта.
+                    os.utime(dest)
+                    return url, bool(load_variants(conn, [url]))
+                dest.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(tmp_name, dest)
+                return url, False
+        except BaseException:
+            _unlink(Path(tmp_name))
+            raise
+
+    async def save_image(self, upload: UploadFile, budget: UploadBudget) -> str:
+        """Streams `upload` into content-addressed storage and returns its /static/uploads URL."""
+        await upload.seek(0)
+        tmp_name, digest, ext, size = await run_in_threadpool(self._copy, upload.file, budget)
+        url, has_variants = await run_in_threadpool(self._place, tmp_name, digest, ext, size)
+
+        if not has_variants:
+            # Resized WebP/AVIF copies for srcset (once per distinct file).
+            original = self.directory / blob_name(digest, ext)
+            await run_in_threadpool(self._make_variants, original, url)
+        return url
+
+    def _make_variants(self, original: Path, url: str) -> None:
+        """Encodes the variants and records them (Pillow and a sync transaction: thread pool only)."""
+        variants = make_variants(original, url, avif=self.image_avif)
+        with self._engine.begin() as conn:
+            record_variants(conn, url, variants)
+
+    async def save_images(
+        self,
+        cover: Optional[UploadFile],
+        gallery: Iterable[Optional[UploadFile]] = (),
+    ) -> Tuple[str, List[str]]:
+        """
+        Saves an optional cover and gallery files under one request budget.
+        Returns (cover URL or "", gallery URLs); if any file is rejected the
+        ones already stored (and not referenced elsewhere) are released before
+        the error propagates.
+        """
+        budget = self.budget()
+        saved: List[str] = []
+        try:
+            cover_url = ""
+            if cover and cover.filename:
+                cover_url = await self.save_image(cover, budget)
+                saved.append(cover_url)
+            for f in gallery or []:
+                if f and f.filename:
+                    saved.append(await self.save_image(f, budget))
+        except BaseException:
+            await run_in_threadpool(self.release, saved)
+            raise
+        return cover_url, saved[1:] if cover_url else saved
+
+    def release(self, urls: Sequence[str]) -> None:
+        """
+        Deletes uploads that no project references any more (file, variants,
+        blob row). Referenced and non-upload URLs are left alone. Best-effort.
+
+        A file touched within `release_grace_seconds` is kept too: _place may
+        have just reused it for a project whose upload_refs row is not
+        committed yet. The uploads GC removes it later if it stays unreferenced.
+        """
+        for url in dict.fromkeys(urls):
+            path = self.path_for(url)
+            if path is None:
+                continue
+            try:
+                with self._engine.begin() as conn:
+                    conn.execute(text("SELECT 1 FROM upload_blobs WHERE url = :url FOR UPDATE"), {"url": url})
+                    referenced = conn.execute(
+                        text("SELECT EXISTS (SELECT 1 FROM upload_refs WHERE url = :url)"), {"url": url}
+                    ).scalar_one()
+                    if referenced or _modified_within(path, self.release_grace_seconds):
+                        continue
+                    conn.execute(text("DELETE FROM upload_blobs WHERE url = :url"), {"url": url})
+                    delete_variants(conn, self.directory, url)
+                    _unlink(path)
+            except Exception:
+                pass
+
+
+def _modified_within(path: Path, seconds: float) -> bool:
+    try:
+        return time.time() - path.stat().st_mtime < seconds
+    except OSError:  # файла уже нет
+        return False
+
+
+def _unlink(path: Path) -> None:
+    try:
+        path.unlink()
+    except OSError:
+        pass
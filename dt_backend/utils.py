@@ -1,5 +1,9 @@
+import hashlib
 import re
-from typing import Any, Dict, List
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Mapping
 
 import html
 from html.parser import HTMLParser
@@ -7,6 +11,12 @@ from typing import Optional, Tuple
 from urllib.parse import urlparse
 
 
+def srcset_for(variants: Optional[Mapping[str, List[Dict[str, Any]]]], url: Any) -> List[Dict[str, Any]]:
+    if not variants or not url:
+        return []
+    return variants.get(str(url), [])
+
+
 def escape_html(s: Any) -> str:
     return (
         str(s if s is not None else "")
@@ -64,64 +74,114 @@ def parse_tech_input(value: Any) -> List[str]:
     return _parse_csv_tags(str(value))
 
 
-def row_to_project(row: Dict[str, Any]) -> Dict[str, Any]:
-    tech = row.get("technologies")
-    if tech is None:
-        tech_list: List[str] = []
-    elif isinstance(tech, list):
-        tech_list = [str(x) for x in tech]
-    elif isinstance(tech, str):
-        tech_list = _parse_csv_tags(tech)
-    else:
-        tech_list = []
-
-    genres = row.get("genres")
-    if genres is None:
-        genres_list: List[str] = []
-    elif isinstance(genres, list):
-        genres_list = [str(x) for x in genres]
-    elif isinstance(genres, str):
-        genres_list = _parse_csv_tags(genres)
-    else:
-        genres_list = []
-
-    categories = row.get("categories")
-    if categories is None:
-        categories_list: List[str] = []
-    elif isinstance(categories, list):
-        categories_list = [str(x) for x in categories]
-    elif isinstance(categories, str):
-        categories_list = _parse_csv_tags(categories)
-    else:
-        categories_list = []
-
-    images = row.get("images")
-    if images is None:
-        images_list: List[str] = []
-    elif isinstance(images, list):
-        images_list = [str(x) for x in images]
-    elif isinstance(images, str):
-        images_list = _parse_csv_tags(images)
-    else:
-        images_list = []
-
-    return {
-        "id": str(row.get("id")),
-        "titleRu": row.get("title_ru"),
-        "titleKz": row.get("title_kz"),
-        "titleEn": row.get("title_en"),
-        "descriptionRu": row.get("description_ru"),
-        "descriptionKz": row.get("description_kz"),
-        "descriptionEn": row.get("description_en"),
-        "technologies": tech_list,
-        "genres": genres_list,
-        "image": row.get("image"),
-        "images": images_list,
-        "category": row.get("category"),
-        "categories": categories_list,
-        "featured": bool(row.get("featured")),
-        "projectUrl": row.get("project_url"),
-    }
+LANGS = ("ru", "kz", "en")
+DEFAULT_LANG = "ru"
+
+# Поля публичного ответа проекта; title/description раскрываются в titleRu/titleKz/...
+PROJECT_FIELDS = (
+    "id",
+    "title",
+    "description",
+    "technologies",
+    "genres",
+    "image",
+    "images",
+    "imageSrcset",
+    "imagesSrcset",
+    "category",
+    "categories",
+    "featured",
+    "projectUrl",
+)
+_LOCALIZED_FIELDS = ("title", "description")
+
+# Ключ ответа -> колонка projects (для SELECT только нужных колонок).
+PROJECT_KEY_COLUMNS: Dict[str, str] = {
+    "id": "id",
+    "titleRu": "title_ru",
+    "titleKz": "title_kz",
+    "titleEn": "title_en",
+    "descriptionRu": "description_ru",
+    "descriptionKz": "description_kz",
+    "descriptionEn": "description_en",
+    "technologies": "technologies",
+    "genres": "genres",
+    "image": "image",
+    "images": "images",
+    "imageSrcset": "image",
+    "imagesSrcset": "images",
+    "category": "category",
+    "categories": "categories",
+    "featured": "featured",
+    "projectUrl": "project_url",
+}
+
+_ACCEPT_LANGUAGE_ALIASES = {"ru": "ru", "kk": "kz", "kz": "kz", "en": "en"}
+
+
+def lang_from_accept_language(header: Optional[str]) -> str:
+    """
+    Picks ru/kz/en from an Accept-Language header by q-value.
+    Kazakh is "kk" in BCP 47; "kz" is accepted too.
+    """
+    best = DEFAULT_LANG
+    best_q = -1.0
+    for part in (header or "").split(","):
+        tag, _, params = part.strip().partition(";")
+        lang = _ACCEPT_LANGUAGE_ALIASES.get(tag.strip().lower().split("-")[0])
+        if not lang:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if q > best_q:
+            best, best_q = lang, q
+    return best
+
+
+def parse_fields(value: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """
+    "id,title,image" -> ("id", "title", "image"). None/"" -> None (all fields).
+    Raises ValueError for unknown names.
+    """
+    if not value:
+        return None
+    out: List[str] = []
+    for name in _parse_csv_tags(value):
+        if name not in PROJECT_FIELDS:
+            raise ValueError(f"unknown field: {name}")
+        if name not in out:
+            out.append(name)
+    return tuple(out) or None
+
+
+def project_keys(fields: Optional[Tuple[str, ...]], lang: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """
+    Response keys for a projection. `lang` keeps only that language's
+    title/description. Returns None when nothing is projected away.
+    """
+    if fields is None and lang is None:
+        return None
+
+    langs = (lang,) if lang else LANGS
+    keys: List[str] = []
+    for name in fields or PROJECT_FIELDS:
+        if name in _LOCALIZED_FIELDS:
+            keys.extend(f"{name}{code.capitalize()}" for code in langs)
+        else:
+            keys.append(name)
+    return tuple(keys)
+
+
+def project_columns(keys: Optional[Tuple[str, ...]]) -> List[str]:
+    """projects columns needed to build `keys` (all of them for None); `id` is always included."""
+    if keys is None:
+        return list(dict.fromkeys(PROJECT_KEY_COLUMNS.values()))
+    return list(dict.fromkeys(["id"] + [PROJECT_KEY_COLUMNS[k] for k in keys]))
 
 
 class _RichTextSanitizer(HTMLParser):
@@ -213,16 +273,196 @@ class _RichTextSanitizer(HTMLParser):
         return "".join(self._out)
 
 
+# Разметка, которую понимает быстрый путь. Всё остальное (комментарии, <script>,
+# '&' без ';', атрибуты без пробела и т.п.) разбирает HTMLParser: результат
+# должен совпадать с ним байт в байт (проверка: benchmarks/bench_sanitize.py).
+_FAST_TOKEN_RE = re.compile(
+    r"<(?P<end>/)?(?P<tag>[a-zA-Z][a-zA-Z0-9]*)"
+    r"(?P<attrs>(?:\s+[a-zA-Z_:][-a-zA-Z0-9_:.]*(?:\s*=\s*(?:\"[^\"<>]*\"|'[^'<>]*'|[^\s\"'=<>`]+))?)*)"
+    r"\s*(?P<selfclose>/)?>"
+    r"|(?P<ref>&(?:[a-zA-Z][a-zA-Z0-9]*|#[0-9]+|#[xX][0-9a-fA-F]+);)"
+    # "R&D ..." HTMLParser отдаёт как entityref "D" -> "&D;".
+    r"|&(?P<bare>[a-zA-Z][a-zA-Z0-9]*)(?=[^-.a-zA-Z0-9;])"
+    r"|(?P<amp>&)(?=[^a-zA-Z#])"
+    r"|(?P<lt><)(?=[\s0-9<>=])"
+)
+_FAST_SPECIAL_RE = re.compile(r"[<&]")
+_FAST_ATTR_RE = re.compile(
+    r"([a-zA-Z_:][-a-zA-Z0-9_:.]*)(?:\s*=\s*(?:\"([^\"]*)\"|'([^']*)'|([^\s\"'=<>`]+)))?"
+)
+# Содержимое этих тегов HTMLParser читает как текст (правила зависят от версии Python).
+_RAW_TEXT_TAGS = frozenset(
+    {"script", "style", "textarea", "title", "xmp", "iframe", "noembed", "noframes", "noscript", "plaintext"}
+)
+_PLAIN_SCHEME_RE = re.compile(r"([a-zA-Z][a-zA-Z0-9+.-]*):")
+# С такими символами urlparse чистит/проверяет URL сам (пробелы, управляющие, IPv6, не-ASCII).
+_URL_SPECIAL_RE = re.compile(r"[^\x21-\x7e]|[\[\]]")
+_SAFE_SCHEMES = ("http", "https", "mailto")
+
+
+def _safe_href(href: str) -> bool:
+    if _URL_SPECIAL_RE.search(href) is None:
+        m = _PLAIN_SCHEME_RE.match(href)
+        return m is not None and m.group(1).lower() in _SAFE_SCHEMES
+    try:
+        return urlparse(href).scheme in _SAFE_SCHEMES
+    except Exception:
+        return False
+
+
+def _sanitize_fast(s: str) -> Optional[str]:
+    """Single-pass sanitizer for common markup; None if `s` needs HTMLParser."""
+    out: List[str] = []
+    stack: List[str] = []
+    depth: Dict[str, int] = {}
+    allowed = _RichTextSanitizer._ALLOWED_TAGS
+    escape = html.escape
+
+    def close(t: str) -> None:
+        if depth.get(t):
+            while stack:
+                last = stack.pop()
+                depth[last] -= 1
+                out.append(f"</{last}>")
+                if last == t:
+                    break
+
+    pos = 0
+    n = len(s)
+    while pos < n:
+        special = _FAST_SPECIAL_RE.search(s, pos)
+        start = special.start() if special else n
+        if start > pos:
+            out.append(escape(s[pos:start]))
+        if special is None:
+            break
+        m = _FAST_TOKEN_RE.match(s, start)
+        if m is None:
+            return None
+        pos = m.end()
+
+        tag = m.group("tag")
+        if tag is None:
+            if m.group("ref") is not None:
+                out.append(m.group("ref"))
+            elif m.group("bare") is not None:
+                out.append(f"&{m.group('bare')};")
+            else:
+                out.append("&amp;" if m.group("amp") else "&lt;")
+            continue
+
+        t = tag.lower()
+        if m.group("end"):
+            if m.group("attrs") or m.group("selfclose"):
+                return None
+            if t in allowed and t != "br":
+                close(t)
+            continue
+        if t in _RAW_TEXT_TAGS:
+            return None
+        if t not in allowed:
+            continue
+
+        if t == "a":
+            href = ""
+            for name, dq, sq, bare in _FAST_ATTR_RE.findall(m.group("attrs")):
+                value = dq or sq or bare
+                if name.lower() == "href" and value:
+                    href = (html.unescape(value) if "&" in value else value).strip()
+                    break
+            if not href or not _safe_href(href):
+                # Как у HTMLParser: <a .../> закрывает внешний <a>, даже если сам отброшен.
+                if m.group("selfclose"):
+                    close(t)
+                continue
+            out.append(f'<a href="{escape(href, quote=True)}" target="_blank" rel="noopener noreferrer nofollow">')
+        else:
+            out.append(f"<{t}>")
+            if t == "br":
+                continue
+        stack.append(t)
+        depth[t] = depth.get(t, 0) + 1
+        if m.group("selfclose"):
+            close(t)
+
+    while stack:
+        out.append(f"</{stack.pop()}>")
+    return "".join(out)
+
+
+def _sanitize_with_parser(s: str) -> str:
+    parser = _RichTextSanitizer()
+    parser.feed(s)
+    parser.close()
+    return parser.get_html()
+
+
+# Память по хешу содержимого: повторное сохранение неизменённого описания
+# (и вывод самого санитайзера, он идемпотентен) не разбирается заново.
+# Ограничена суммарным размером строк; большие тексты не запоминаются (хеш
+# стоит дороже, чем повтор они дают).
+SANITIZE_MEMO_BYTES = 8 * 1024 * 1024
+SANITIZE_MEMO_MAX_INPUT = 256 * 1024
+# Выше этого размера (символов) — только эталонный HTMLParser: на огромных
+# входах быстрый путь не выигрывает, а поведение парсера предсказуемо.
+SANITIZE_FAST_MAX_INPUT = 1024 * 1024
+_sanitize_memo: "OrderedDict[bytes, str]" = OrderedDict()
+_sanitize_memo_size = 0
+_sanitize_memo_lock = threading.Lock()
+
+
+def _memo_key(s: str) -> bytes:
+    return hashlib.blake2b(s.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+
+def _memo_put(key: bytes, value: str) -> None:
+    global _sanitize_memo_size
+    old = _sanitize_memo.pop(key, None)
+    if old is not None:
+        _sanitize_memo_size -= sys.getsizeof(old)
+    _sanitize_memo[key] = value
+    _sanitize_memo_size += sys.getsizeof(value)
+    while _sanitize_memo_size > SANITIZE_MEMO_BYTES and _sanitize_memo:
+        _, evicted = _sanitize_memo.popitem(last=False)
+        _sanitize_memo_size -= sys.getsizeof(evicted)
+
+
+def _memo_clear() -> None:
+    global _sanitize_memo_size
+    with _sanitize_memo_lock:
+        _sanitize_memo.clear()
+        _sanitize_memo_size = 0
+
+
 def sanitize_rich_text_html(raw: Any) -> str:
     """
     Sanitizes rich text HTML from the admin editor.
     - Allows only a small set of tags (no inline styles, no arbitrary attributes).
     - For <a>, keeps only safe href schemes: http/https/mailto.
+    Results up to SANITIZE_MEMO_MAX_INPUT are memoized by content hash.
     """
     s = str(raw if raw is not None else "").strip()
     if not s:
         return ""
-    parser = _RichTextSanitizer()
-    parser.feed(s)
-    parser.close()
-    return parser.get_html()
+    if len(s) > SANITIZE_FAST_MAX_INPUT:
+        return _sanitize_with_parser(s)
+    if len(s) > SANITIZE_MEMO_MAX_INPUT:
+        result = _sanitize_fast(s)
+        return result if result is not None else _sanitize_with_parser(s)
+
+    key = _memo_key(s)
+    with _sanitize_memo_lock:
+        hit = _sanitize_memo.get(key)
+        if hit is not None:
+            _sanitize_memo.move_to_end(key)
+            return hit
+
+    result = _sanitize_fast(s)
+    if result is None:
+        result = _sanitize_with_parser(s)
+
+    with _sanitize_memo_lock:
+        _memo_put(key, result)
+        if result != s and result == result.strip() and len(result) <= SANITIZE_MEMO_MAX_INPUT:
+            _memo_put(_memo_key(result), result)
+    return result
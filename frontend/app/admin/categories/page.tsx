@@ -42,7 +42,7 @@ export default function AdminCategoriesPage() {
     setLoading(true)
     setError("")
     try {
-      const res = await fetch(`${API_BASE}/api/categories`, { cache: "no-store" })
+      const res = await fetch(`${API_BASE}/api/categories`, { cache: "no-cache" })
       if (!res.ok) throw new Error(`GET /api/categories failed: ${res.status}`)
       const data = (await res.json()) as CategoryDto[]
       const mapped: UiCategory[] = Array.isArray(data)
@@ -90,15 +90,13 @@ export function ProjectEditor({ mode }: { mode: Mode }) {
 
   async function loadLookups() {
     try {
-      const [catsRes, techRes, genresRes] = await Promise.all([
-        fetch(`${API_BASE}/api/categories`, { cache: "no-store" }),
-        fetch(`${API_BASE}/api/technologies`, { cache: "no-store" }),
-        fetch(`${API_BASE}/api/genres`, { cache: "no-store" }),
-      ])
+      // One request for all lookups (categories, technologies, genres).
+      const res = await fetch(`${API_BASE}/api/bootstrap`, { cache: "no-cache" })
+      const data = res.ok ? ((await res.json()) as any) : {}
 
-      const catsRaw = catsRes.ok ? ((await catsRes.json()) as any) : []
-      const techs = techRes.ok ? ((await techRes.json()) as string[]) : []
-      const gens = genresRes.ok ? ((await genresRes.json()) as string[]) : []
+      const catsRaw = data?.categories ?? []
+      const techs = (data?.technologies ?? []) as string[]
+      const gens = (data?.genres ?? []) as string[]
 
       const cats = Array.isArray(catsRaw)
         ? catsRaw
@@ -121,7 +119,7 @@ export function ProjectEditor({ mode }: { mode: Mode }) {
     setError("")
     try {
       const res = await fetch(`${API_BASE}/api/projects/${encodeURIComponent(id)}`, {
-        cache: "no-store",
+        cache: "no-cache",
       })
       if (!res.ok) throw new Error(`GET /api/projects/${id} failed: ${res.status}`)
       const p = (await res.json()) as BackendProject
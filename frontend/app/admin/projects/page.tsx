@@ -47,7 +47,7 @@ export default function AdminProjectsPage() {
     setError("")
     setInfo("")
     try {
-      const res = await fetch(`${API_BASE}/api/projects`, { cache: "no-store" })
+      const res = await fetch(`${API_BASE}/api/projects`, { cache: "no-cache" })
       if (!res.ok) throw new Error(`GET /api/projects failed: ${res.status}`)
       const data = (await res.json()) as BackendProject[]
       setItems(Array.isArray(data) ? data : [])
@@ -76,7 +76,24 @@ export default function AdminProjectsPage() {
         const text = await res.text().catch(() => "")
         throw new Error(`Cleanup failed: ${res.status} ${text}`)
       }
-      const data = (await res.json()) as any
+      let job = (await res.json()) as any
+      // Cleanup runs as a background job: poll until it finishes.
+      while (job?.status === "queued" || job?.status === "running") {
+        setInfo(`Cleanup running. Checked: ${job?.progress?.checked ?? 0}`)
+        await new Promise((resolve) => setTimeout(resolve, 1000))
+        const poll = await fetch(`${API_BASE}/api/admin/jobs/${encodeURIComponent(job.jobId)}`, {
+          credentials: "include",
+          cache: "no-store",
+        })
+        if (!poll.ok) {
+          throw new Error(`Cleanup status failed: ${poll.status}`)
+        }
+        job = await poll.json()
+      }
+      if (job?.status !== "done") {
+        throw new Error(`Cleanup failed: ${job?.error ?? "unknown error"}`)
+      }
+      const data = job.result
       setInfo(
         `Cleanup ok. Checked: ${data?.checked ?? 0}, updated: ${data?.updated ?? 0}, removed refs: ${data?.removedRefs ?? 0}`
       )
@@ -44,7 +44,22 @@ export function ProjectCard({ project, className }: Props) {
     >
       {/* IMAGE */}
       <div className="relative h-56 overflow-hidden bg-slate-900">
-        {project.image && !imgFailed ? (
+        {project.image && !imgFailed && project.imageSrcSet ? (
+          // eslint-disable-next-line @next/next/no-img-element
+          <img
+            src={project.image}
+            srcSet={project.imageSrcSet}
+            alt={title}
+            loading="lazy"
+            decoding="async"
+            className="absolute inset-0 h-full w-full object-cover opacity-80 group-hover:opacity-100 group-hover:scale-110 transition-all duration-700"
+            sizes="(max-width: 768px) 100vw, 350px"
+            onError={() => {
+              brokenImageUrls.add(project.image as string)
+              setImgFailed(true)
+            }}
+          />
+        ) : project.image && !imgFailed ? (
           <Image
             src={project.image}
             alt={title}
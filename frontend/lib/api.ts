@@ -1,3 +1,10 @@
+export type BackendImageVariant = {
+  url: string
+  width: number
+  height: number
+  type?: string
+}
+
 export type BackendProject = {
   id: string | number
   titleRu?: string
@@ -10,6 +17,8 @@ export type BackendProject = {
   genres?: string[] | string
   image?: string
   images?: string[] | string
+  imageSrcset?: BackendImageVariant[]
+  imagesSrcset?: BackendImageVariant[][]
   category?: string
   categories?: string[] | string
   featured?: boolean
@@ -31,6 +40,23 @@ export type BackendCategory = {
   nameEn?: string
 }
 
+// /api/bootstrap: all lookups + stats in one request
+export type Bootstrap = {
+  categories: BackendCategory[]
+  technologies: string[]
+  genres: string[]
+  stats: Stats
+}
+
+// /api/facets: project counts per tag for the current filter
+export type FacetCount = { name: string; count: number }
+export type Facets = {
+  total: number
+  technologies: FacetCount[]
+  genres: FacetCount[]
+  categories: FacetCount[]
+}
+
 export type LoginResponse = {
   access_token?: string
   token?: string
@@ -67,7 +93,8 @@ export function clearToken() {
 
 // ---- base requests ----
 async function apiGet<T>(path: string): Promise<T> {
-  const res = await fetch(`${API_BASE}${path}`, { cache: "no-store" })
+  // "no-cache": браузер ревалидирует по ETag и получает 304 вместо полного тела.
+  const res = await fetch(`${API_BASE}${path}`, { cache: "no-cache" })
   if (!res.ok) {
     let text = await res.text().catch(() => "")
     if (text.length > 100) text = text.substring(0, 100) + "..."
@@ -120,6 +147,20 @@ export function getCategories() {
   return apiGet<BackendCategory[]>("/api/categories")
 }
 
+export function getBootstrap() {
+  return apiGet<Bootstrap>("/api/bootstrap")
+}
+
+export function getFacets(filters: { category?: string[]; technology?: string[]; genre?: string[]; match?: "any" | "all" } = {}) {
+  const q = new URLSearchParams()
+  for (const key of ["category", "technology", "genre"] as const) {
+    for (const v of filters[key] ?? []) q.append(key, v)
+  }
+  if (filters.match) q.set("match", filters.match)
+  const qs = q.toString()
+  return apiGet<Facets>(`/api/facets${qs ? `?${qs}` : ""}`)
+}
+
 // ---- admin/auth ----
 export async function login(username: string, password: string) {
   const res = await fetch(`${API_BASE}/api/auth/login`, {
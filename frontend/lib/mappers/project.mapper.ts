@@ -12,6 +12,7 @@ export type UiProject = {
   category: UiCategory
   techStack: string[]
   image?: string
+  imageSrcSet?: string
   projectUrl?: string
   featured: boolean
 }
@@ -80,6 +81,15 @@ export function normalizeImage(apiBase: string, image?: string | null): string |
   return `${apiBase}/${img}`
 }
 
+// WebP-варианты обложки -> строка для <img srcset>, браузер сам выберет ширину.
+export function buildSrcSet(apiBase: string, variants?: BackendProject["imageSrcset"]): string | undefined {
+  if (!Array.isArray(variants) || variants.length === 0) return undefined
+  const parts = variants
+    .filter((v) => v && v.url && v.width && (!v.type || v.type === "image/webp"))
+    .map((v) => `${normalizeImage(apiBase, v.url)} ${v.width}w`)
+  return parts.length ? parts.join(", ") : undefined
+}
+
 export function normalizeProjectUrl(p: BackendProject): string | undefined {
   const url = String((p.projectUrl ?? p.project_url ?? "")).trim()
   if (!url) return undefined
@@ -112,6 +122,7 @@ export function backendToUiProject(
     category: mapCategory(p.category ?? undefined),
     techStack,
     image: normalizeImage(opts.apiBase, p.image ?? undefined),
+    imageSrcSet: buildSrcSet(opts.apiBase, p.imageSrcset),
     projectUrl: normalizeProjectUrl(p),
     featured: Boolean(p.featured), // ВАЖНО: поле всегда есть
   }
@@ -0,0 +1,137 @@
+"""Keyset pagination of /api/projects: cursors and CatalogSnapshot.page (no database)."""
+import base64
+
+import pytest
+
+from dt_backend.catalog import CatalogSnapshot, decode_cursor, encode_cursor, project_sort_key
+from dt_backend.records import ProjectRecord
+
+# ORDER BY featured DESC, id ASC: 3, 7, 9, затем 1, 2, 5, 8.
+FEATURED = (3, 7, 9)
+PLAIN = (1, 2, 5, 8)
+PROJECTS = tuple(ProjectRecord(id=i, featured=True) for i in FEATURED) + tuple(ProjectRecord(id=i) for i in PLAIN)
+ORDER = list(FEATURED + PLAIN)
+
+
+def snapshot(projects=PROJECTS) -> CatalogSnapshot:
+    return CatalogSnapshot(
+        version=1,
+        built_at=0.0,
+        modified_at=0.0,
+        digest="",
+        projects=projects,
+        projects_by_id={p.id: p for p in projects},
+        projects_by_category={},
+        ids_by_technology={},
+        ids_by_genre={},
+        ids_by_category={},
+        categories=(),
+        technologies=(),
+        genres=(),
+        variants={},
+        stats={},
+    )
+
+
+def walk(limit: int):
+    pages, after = [], None
+    while True:
+        items, cursor = CatalogSnapshot.page(PROJECTS, after, limit)
+        pages.append([p.id for p in items])
+        if cursor is None:
+            return pages
+        after = decode_cursor(cursor)
+
+
+@pytest.mark.parametrize("project", PROJECTS, ids=lambda p: f"{p.id}-{'featured' if p.featured else 'plain'}")
+def test_cursor_round_trip(project):
+    cursor = encode_cursor(project)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == project_sort_key(project)
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "",
+        "!!!",
+        "ж",
+        base64.urlsafe_b64encode(b"2:5").decode(),
+        base64.urlsafe_b64encode(b"1:").decode(),
+        base64.urlsafe_b64encode(b"1:x").decode(),
+        base64.urlsafe_b64encode(b"\xff\xfe").decode(),
+    ],
+)
+def test_invalid_cursor(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+@pytest.mark.parametrize("limit", range(1, len(PROJECTS) + 2))
+def test_pages_cover_catalog_once(limit):
+    pages = walk(limit)
+    assert [pid for page in pages for pid in page] == ORDER
+    assert all(len(page) == limit for page in pages[:-1])
+    assert 0 < len(pages[-1]) <= limit
+
+
+def test_page_crosses_featured_boundary():
+    assert walk(2) == [[3, 7], [9, 1], [2, 5], [8]]
+    assert walk(3) == [[3, 7, 9], [1, 2, 5], [8]]
+
+
+def test_last_full_page_has_no_cursor():
+    assert walk(len(PROJECTS)) == [ORDER]
+    items, cursor = CatalogSnapshot.page(PROJECTS, decode_cursor(encode_cursor(PROJECTS[-2])), 1)
+    assert [p.id for p in items] == [8] and cursor is None
+
+
+def test_cursor_of_deleted_project_resumes_after_its_position():
+    # Проект 4 (не featured) удалён между запросами: страница начинается с 5.
+    after = decode_cursor(encode_cursor(ProjectRecord(id=4)))
+    items, _ = CatalogSnapshot.page(PROJECTS, after, 2)
+    assert [p.id for p in items] == [5, 8]
+    # Удалённый featured 8 — следующим идёт 9.
+    after = decode_cursor(encode_cursor(ProjectRecord(id=8, featured=True)))
+    assert [p.id for p in CatalogSnapshot.page(PROJECTS, after, 1)[0]] == [9]
+
+
+class StaticCatalog:
+    """CatalogCache stand-in serving one snapshot."""
+
+    def __init__(self, snap: CatalogSnapshot) -> None:
+        self.snap = snap
+
+    async def aget(self) -> CatalogSnapshot:
+        return self.snap
+
+
+@pytest.fixture()
+def client():
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from dt_backend.routers.public.api import create_public_api_router
+
+    app = FastAPI()
+    app.include_router(create_public_api_router(None, StaticCatalog(snapshot())))
+    with TestClient(app) as c:
+        yield c
+
+
+def test_api_pages_follow_next_cursor(client):
+    ids, params = [], {"limit": 3, "fields": "id"}
+    while True:
+        body = client.get("/api/projects", params=params).json()
+        ids += [p["id"] for p in body["items"]]
+        if body["nextCursor"] is None:
+            break
+        params["cursor"] = body["nextCursor"]
+    assert ids == [str(pid) for pid in ORDER]
+
+
+@pytest.mark.parametrize("cursor", ["!!!", base64.urlsafe_b64encode(b"2:5").decode()])
+def test_api_invalid_cursor_is_400(client, cursor):
+    r = client.get("/api/projects", params={"limit": 3, "cursor": cursor})
+    assert r.status_code == 400
+    assert r.json()["detail"] == "Invalid cursor"
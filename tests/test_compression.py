@@ -0,0 +1,141 @@
+"""Accept-Encoding negotiation and CompressionMiddleware (no database)."""
+import gzip
+
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from dt_backend.compression import CompressionMiddleware, CompressionSettings, accepted_encodings, choose_encoding
+
+TEXT = "проект игра game design " * 100
+
+
+@pytest.mark.parametrize(
+    "header,expected",
+    [
+        (None, set()),
+        ("", set()),
+        ("gzip", {"gzip"}),
+        ("gzip, br", {"gzip", "br"}),
+        ("GZip ; q=0.5, Br", {"gzip", "br"}),
+        ("br;q=0, gzip", {"gzip"}),
+        ("br;q=0.0, gzip;q=0", set()),
+        ("gzip;q=abc", set()),
+        ("deflate, identity", {"deflate", "identity"}),
+    ],
+)
+def test_accepted_encodings(header, expected):
+    assert accepted_encodings(header) == expected
+
+
+@pytest.mark.parametrize(
+    "header,encoding",
+    [
+        ("gzip, br", "br"),
+        ("br;q=0.1, gzip", "br"),
+        ("br;q=0, gzip", "gzip"),
+        ("gzip;q=0, br;q=0", None),
+        ("deflate", None),
+        (None, None),
+    ],
+)
+def test_choose_encoding(header, encoding):
+    assert choose_encoding(header) == encoding
+
+
+def test_choose_encoding_without_brotli(monkeypatch):
+    from dt_backend import compression
+
+    monkeypatch.setattr(compression, "brotli", None)
+    assert choose_encoding("br, gzip") == "gzip"
+    assert choose_encoding("br") is None
+
+
+def _text(request):
+    return PlainTextResponse(TEXT, headers={"ETag": '"t"'})
+
+
+def _small(request):
+    return PlainTextResponse("tiny")
+
+
+def _no_transform(request):
+    return PlainTextResponse(TEXT, headers={"Cache-Control": "public, no-transform"})
+
+
+def _binary(request):
+    return Response(b"\x00" * 2000, media_type="application/octet-stream")
+
+
+def _not_found(request):
+    return PlainTextResponse(TEXT, status_code=404)
+
+
+def _stream(request):
+    async def chunks():
+        for _ in range(10):
+            yield TEXT.encode("utf-8")
+
+    return StreamingResponse(chunks(), media_type="text/plain")
+
+
+@pytest.fixture()
+def client():
+    app = Starlette(
+        routes=[
+            Route("/text", _text),
+            Route("/small", _small),
+            Route("/no-transform", _no_transform),
+            Route("/binary", _binary),
+            Route("/missing", _not_found),
+            Route("/stream", _stream),
+        ]
+    )
+    app.add_middleware(CompressionMiddleware, settings=CompressionSettings(minimum_size=500))
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "br"])
+def test_compresses_negotiated_encoding(client, encoding):
+    r = client.get("/text", headers={"Accept-Encoding": encoding})
+    assert r.headers["content-encoding"] == encoding
+    assert r.headers["vary"] == "Accept-Encoding"
+    assert r.headers["etag"] == 'W/"t"'
+    assert int(r.headers["content-length"]) < len(TEXT.encode("utf-8"))
+    assert r.text == TEXT
+
+
+def test_refused_encoding_is_not_used(client):
+    r = client.get("/text", headers={"Accept-Encoding": "br;q=0, gzip;q=0"})
+    assert "content-encoding" not in r.headers
+    assert r.headers["etag"] == '"t"'
+    assert r.text == TEXT
+
+
+def test_refused_brotli_falls_back_to_gzip(client):
+    r = client.get("/text", headers={"Accept-Encoding": "br;q=0, gzip"})
+    assert r.headers["content-encoding"] == "gzip"
+
+
+@pytest.mark.parametrize("path", ["/small", "/no-transform", "/binary", "/missing"])
+def test_passthrough(client, path):
+    r = client.get(path, headers={"Accept-Encoding": "gzip, br"})
+    assert "content-encoding" not in r.headers
+
+
+def test_head_is_not_compressed(client):
+    r = client.head("/text", headers={"Accept-Encoding": "gzip, br"})
+    assert r.status_code == 200
+    assert "content-encoding" not in r.headers
+    assert r.headers["etag"] == '"t"'
+
+
+def test_streamed_body_is_compressed_per_chunk(client):
+    with client.stream("GET", "/stream", headers={"Accept-Encoding": "gzip"}) as r:
+        assert r.headers["content-encoding"] == "gzip"
+        assert "content-length" not in r.headers
+        raw = b"".join(r.iter_raw())
+    assert gzip.decompress(raw).decode("utf-8") == TEXT * 10
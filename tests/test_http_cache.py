@@ -0,0 +1,120 @@
+"""http_cache.json_response: ETag / Last-Modified revalidation, with and without compression (no database)."""
+from email.utils import formatdate
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from dt_backend.compression import CompressionSettings
+from dt_backend.http_cache import _etag_matches, cached_body, json_response
+
+MODIFIED = 1_700_000_000.0
+BODY = cached_body({"items": [{"id": str(i), "title": "проект " * 10} for i in range(50)]}, last_modified=MODIFIED)
+
+
+def make_client(compression):
+    app = FastAPI()
+    if compression is not None:
+        app.state.compression = compression
+
+    @app.get("/doc")
+    async def doc(request: Request):
+        return json_response(request, BODY)
+
+    return TestClient(app)
+
+
+@pytest.fixture()
+def client():
+    with make_client(CompressionSettings(minimum_size=100)) as c:
+        yield c
+
+
+@pytest.mark.parametrize(
+    "header,matches",
+    [
+        ('"abc"', True),
+        ('W/"abc"', True),
+        ('"x", W/"abc" , "y"', True),
+        ("*", True),
+        ('"abcd"', False),
+        ('W/"x"', False),
+        ("abc", False),
+        ("", False),
+    ],
+)
+def test_etag_matching_is_weak(header, matches):
+    assert _etag_matches(header, '"abc"') is matches
+
+
+def test_compressed_response_has_weak_etag(client):
+    r = client.get("/doc", headers={"Accept-Encoding": "gzip"})
+    assert r.status_code == 200
+    assert r.headers["content-encoding"] == "gzip"
+    assert r.headers["etag"] == f"W/{BODY.etag}"
+    assert r.headers["vary"] == "Accept-Encoding"
+    assert r.content == BODY.body
+
+
+def test_identity_response_has_strong_etag(client):
+    r = client.get("/doc", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in r.headers
+    assert r.headers["etag"] == BODY.etag
+
+
+@pytest.mark.parametrize("sent", ["weak", "strong"])
+@pytest.mark.parametrize("encoding", ["gzip", "br", "identity"])
+def test_if_none_match_is_304(client, sent, encoding):
+    etag = f"W/{BODY.etag}" if sent == "weak" else BODY.etag
+    r = client.get("/doc", headers={"Accept-Encoding": encoding, "If-None-Match": etag})
+    assert r.status_code == 304
+    assert r.content == b""
+    assert "content-encoding" not in r.headers
+    assert r.headers["vary"] == "Accept-Encoding"
+
+
+def test_if_none_match_mismatch_is_200(client):
+    r = client.get("/doc", headers={"Accept-Encoding": "gzip", "If-None-Match": 'W/"other"'})
+    assert r.status_code == 200
+    assert r.content == BODY.body
+
+
+@pytest.mark.parametrize(
+    "since,status",
+    [
+        (MODIFIED, 304),
+        (MODIFIED + 60, 304),
+        (MODIFIED - 60, 200),
+    ],
+)
+def test_if_modified_since(client, since, status):
+    r = client.get("/doc", headers={"If-Modified-Since": formatdate(since, usegmt=True)})
+    assert r.status_code == status
+    assert r.headers["last-modified"] == formatdate(MODIFIED, usegmt=True)
+
+
+def test_unparseable_if_modified_since_is_200(client):
+    assert client.get("/doc", headers={"If-Modified-Since": "yesterday"}).status_code == 200
+
+
+def test_if_none_match_takes_precedence(client):
+    r = client.get(
+        "/doc",
+        headers={"If-None-Match": '"other"', "If-Modified-Since": formatdate(MODIFIED, usegmt=True)},
+    )
+    assert r.status_code == 200
+
+
+def test_without_compression_settings():
+    with make_client(None) as c:
+        r = c.get("/doc", headers={"Accept-Encoding": "gzip, br"})
+        assert "content-encoding" not in r.headers and "vary" not in r.headers
+        assert r.headers["etag"] == BODY.etag
+        assert c.get("/doc", headers={"If-None-Match": BODY.etag}).status_code == 304
+
+
+def test_compressed_bytes_are_memoized(client):
+    client.get("/doc", headers={"Accept-Encoding": "gzip"})
+    first = BODY._encoded["gzip"]
+    client.get("/doc", headers={"Accept-Encoding": "gzip"})
+    assert BODY._encoded["gzip"] is first
@@ -0,0 +1,140 @@
+"""
+utils.sanitize_rich_text_html: the single-pass fast path must give exactly what
+the HTMLParser reference gives, and the content-hash memo must stay bounded.
+"""
+import random
+import sys
+
+import pytest
+
+from dt_backend import utils
+from dt_backend.utils import _sanitize_fast, _sanitize_with_parser, sanitize_rich_text_html
+
+_WORDS = "проект игра game design level жоба AI unity dt студент & < > \" ' R&D x<5".split()
+
+_FUZZ_PIECES = [
+    "<p>", "</p>", "<b>", "</B>", "<br>", "<br/>", "<p/>", "<span style='x'>", "</span>", "<ul>", "<li>",
+    "</ul>", "<a href=\"http://a.kz/?q=1&amp;r=2\">", "<a HREF='mailto:x@y'>", "<a href=javascript:x>",
+    "<a href=\"  https://x \">", "<a>", "<a href=\"https://[::1\">", "<a href=\"ht\ttp://x\">", "<a/>",
+    "</a>", "<a href=\"https://ж.kz\"/>", "&amp;", "&#39;", "&#x27;", "&nbsp", "&", "& ", "&#", "<", "< ",
+    "<5", "<<", "<>", "<=", ">", "\"", "'", "<!-- c -->", "<script>x</script>", "<p class=a", "</p x>", "<x-y>",
+    "text ", "текст ", "R&D ", "&a-b ", "&#39 ", "\n", "<code>", "</pre>", "<blockquote>", "<i\n>",
+    "<a href=\"https://x\" title=\"<\">",
+]
+
+
+def _text(rng: random.Random, n: int) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(n))
+
+
+def _corpus():
+    rng = random.Random(42)
+    link = '<a href="https://example.com/{i}">link {i}</a>, '
+    realistic = "\n".join(
+        f"<p>{_text(rng, 30)} <strong>{_text(rng, 3)}</strong> &mdash; <em>{_text(rng, 4)}</em></p>"
+        f"<ul><li>{_text(rng, 6)}</li></ul>"
+        f'<p>See <a href="https://example.com/p/{i}?a=1&amp;b=2">demo</a><br/>&copy; 2024</p>'
+        for i in range(20)
+    )
+    return [
+        ("realistic", realistic),
+        ("pasted", "<!--StartFragment--><p class=MsoNormal style='margin:0'><span lang=RU>x</span></p>"
+                   "<script>alert('x')</script><a href=\"javascript:alert(1)\">x</a><p>y&nbsp text</p>"),
+        ("deep nesting", "<blockquote><b>" * 500 + "x" + "</b></blockquote>" * 500),
+        ("unclosed", "<li><em>x" * 1000),
+        ("links", "<p>" + "".join(link.format(i=i) for i in range(500)) + "</p>"),
+        ("unsafe links", "".join(f'<a href="mailto:u{i}@x.kz">m</a><a href=data:x>d</a>' for i in range(200))),
+        ("huge text", "<p>" + "lorem ipsum dolor sit amet " * 8000 + "</p>"),
+        ("stray < and &", "a < 5 & b " * 2000),
+    ]
+
+
+def _fuzz_docs(n: int):
+    rng = random.Random(7)
+    return ["".join(rng.choice(_FUZZ_PIECES) for _ in range(rng.randint(1, 40))) for _ in range(n)]
+
+
+@pytest.fixture(autouse=True)
+def empty_memo():
+    utils._memo_clear()
+    yield
+    utils._memo_clear()
+
+
+def _assert_matches_reference(doc: str) -> None:
+    s = doc.strip()
+    expected = _sanitize_with_parser(s) if s else ""
+    assert sanitize_rich_text_html(doc) == expected
+    fast = _sanitize_fast(s)
+    assert fast is None or fast == expected
+    # Идемпотентность: на ней держится запоминание вывода как ключа.
+    if expected and expected == expected.strip():
+        assert _sanitize_with_parser(expected) == expected
+        assert sanitize_rich_text_html(expected) == expected
+
+
+@pytest.mark.parametrize("name,doc", _corpus(), ids=[name for name, _ in _corpus()])
+def test_corpus_matches_reference(name, doc):
+    _assert_matches_reference(doc)
+
+
+def test_fuzz_matches_reference():
+    for doc in _fuzz_docs(2000):
+        _assert_matches_reference(doc)
+
+
+def test_realistic_markup_takes_fast_path():
+    doc = dict(_corpus())["realistic"]
+    assert _sanitize_fast(doc.strip()) is not None
+
+
+@pytest.mark.parametrize(
+    "doc",
+    [
+        '<a href="javascript:alert(1)">x</a>',
+        "<a href=' JaVaScRiPt:alert(1)'>x</a>",
+        '<a href="data:text/html,x">x</a>',
+        "<script>alert(1)</script>",
+        '<img src=x onerror="alert(1)">',
+        '<p onclick="x()" style="color:red">t</p>',
+    ],
+)
+def test_unsafe_markup_is_dropped(doc):
+    out = sanitize_rich_text_html(doc)
+    for needle in ("javascript", "data:", "<script", "onerror", "onclick", "style", "<img"):
+        assert needle not in out.lower()
+
+
+def test_memo_is_bounded_by_bytes(monkeypatch):
+    monkeypatch.setattr(utils, "SANITIZE_MEMO_BYTES", 64 * 1024)
+    for i in range(200):
+        sanitize_rich_text_html(f"<p>{i} " + "x" * 2000 + "</p>")
+        assert utils._sanitize_memo_size <= utils.SANITIZE_MEMO_BYTES
+    assert utils._sanitize_memo_size == sum(sys.getsizeof(v) for v in utils._sanitize_memo.values())
+    assert 0 < len(utils._sanitize_memo) < 200
+
+
+def test_memo_keeps_input_and_output_keys():
+    doc = "<p>R&D <b>x</b></p>"
+    first = sanitize_rich_text_html(doc)
+    # Вход и (отличающийся от него) вывод: повторное сохранение вывода тоже попадает в memo.
+    assert len(utils._sanitize_memo) == 2
+    assert sanitize_rich_text_html(doc) is first
+    assert sanitize_rich_text_html(first) is first
+
+
+def test_large_input_is_not_memoized():
+    doc = "<p>" + "y" * (utils.SANITIZE_MEMO_MAX_INPUT + 1) + "</p>"
+    assert sanitize_rich_text_html(doc) == _sanitize_with_parser(doc)
+    assert len(utils._sanitize_memo) == 0
+    assert utils._sanitize_memo_size == 0
+
+
+def test_huge_input_uses_reference_parser(monkeypatch):
+    def fast_path_not_allowed(s):
+        raise AssertionError("fast path used above SANITIZE_FAST_MAX_INPUT")
+
+    monkeypatch.setattr(utils, "_sanitize_fast", fast_path_not_allowed)
+    doc = "<p>" + "z &amp; " * (utils.SANITIZE_FAST_MAX_INPUT // 8 + 1) + "</p>"
+    assert sanitize_rich_text_html(doc) == _sanitize_with_parser(doc)
+    assert len(utils._sanitize_memo) == 0
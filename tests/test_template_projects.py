@@ -0,0 +1,44 @@
+"""Admin project form (routers/admin/template_projects.py) against a real database."""
+import pytest
+
+FORM = {
+    "title_ru": "Проект",
+    "title_kz": "Жоба",
+    "title_en": "Project",
+    "description_ru": "<p>ру</p>",
+    "description_kz": "<p>кз</p>",
+    "description_en": "<p>en</p>",
+}
+
+
+@pytest.fixture()
+def client(monkeypatch, database_url):
+    from fastapi.testclient import TestClient
+
+    monkeypatch.setenv("DATABASE_URL", database_url)
+    monkeypatch.setenv("ADMIN_USER", "test")
+    monkeypatch.setenv("ADMIN_PASS", "test")
+    # Каталог сверяет версию на каждый запрос: ответ виден сразу после записи.
+    monkeypatch.setenv("CATALOG_VERSION_CHECK_SECONDS", "0")
+
+    from dt_backend.app import create_app
+
+    with TestClient(create_app()) as c:
+        r = c.post("/api/admin/login", data={"username": "test", "password": "test"}, follow_redirects=False)
+        assert r.status_code == 302
+        yield c
+
+
+def test_update_moves_project_to_new_category(client):
+    r = client.post("/admin/projects/new", data={**FORM, "category": "iot"}, follow_redirects=False)
+    assert r.status_code == 302
+    pid = max(p["id"] for p in client.get("/api/projects").json())
+
+    r = client.post(f"/admin/projects/{pid}/edit", data={**FORM, "category": "web"}, follow_redirects=False)
+    assert r.status_code == 302
+
+    project = client.get(f"/api/projects/{pid}").json()
+    assert project["category"] == "web"
+    assert "iot" not in project["categories"]
+    assert pid in [p["id"] for p in client.get("/api/projects?category=web").json()]
+    assert pid not in [p["id"] for p in client.get("/api/projects?category=iot").json()]
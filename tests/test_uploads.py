@@ -0,0 +1,187 @@
+"""uploads.py: magic-byte sniffing, streaming limits and cleanup of rejected forms (no database)."""
+import asyncio
+import io
+import os
+
+import pytest
+from fastapi import HTTPException, UploadFile
+
+from dt_backend.images import UPLOADS_URL_PREFIX
+from dt_backend.uploads import SNIFF_SIZE, UploadStore, blob_name, sniff_image_type
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 100
+JPEG = b"\xff\xd8\xff\xe0" + b"\x00" * 100
+
+
+def bmp(size: int = 200, dib: int = 40, declared=None) -> bytes:
+    declared = size if declared is None else declared
+    head = b"BM" + declared.to_bytes(4, "little") + b"\x00" * 8 + dib.to_bytes(4, "little")
+    return head + b"\x00" * (size - len(head))
+
+
+@pytest.mark.parametrize(
+    "head,ext",
+    [
+        (JPEG, "jpg"),
+        (PNG, "png"),
+        (b"GIF87a" + b"\x00" * 10, "gif"),
+        (b"GIF89a" + b"\x00" * 10, "gif"),
+        (b"RIFF\x00\x00\x00\x00WEBPVP8 ", "webp"),
+        (b"\x00\x00\x00\x1cftypavif", "avif"),
+        (b"\x00\x00\x00\x1cftypheic", "heic"),
+        (b"\x00\x00\x00\x1cftypmif1", "heic"),
+    ],
+)
+def test_sniff_known_formats(head, ext):
+    assert sniff_image_type(head[:SNIFF_SIZE]) == ext
+
+
+@pytest.mark.parametrize(
+    "head",
+    [
+        b"",
+        b"hello world",
+        b"<svg xmlns='http://www.w3.org/2000/svg'/>",
+        b"%PDF-1.7\n",
+        b"PK\x03\x04" + b"\x00" * 20,
+        b"\x89PNG\r\n" + b"\x00" * 20,  # обрезанная сигнатура
+        b"RIFF\x00\x00\x00\x00WAVEfmt ",
+        b"\x00\x00\x00\x1cftypmp42",
+    ],
+)
+def test_sniff_rejects_non_images(head):
+    assert sniff_image_type(head) is None
+
+
+@pytest.mark.parametrize("dib", [12, 40, 56, 108, 124])
+def test_sniff_bmp_dib_sizes(dib):
+    assert sniff_image_type(bmp(dib=dib)[:SNIFF_SIZE]) == "bmp"
+    assert sniff_image_type(bmp(dib=dib)[:SNIFF_SIZE], size=200) == "bmp"
+
+
+@pytest.mark.parametrize(
+    "head",
+    [
+        b"BM is how this text file starts",
+        bmp(dib=0)[:SNIFF_SIZE],
+        bmp(dib=64)[:SNIFF_SIZE],
+        bmp(dib=0x20202020)[:SNIFF_SIZE],
+        bmp(declared=14)[:SNIFF_SIZE],
+        b"BM" + b"\x00" * 10,  # короче заголовка
+    ],
+)
+def test_sniff_rejects_garbage_bmp(head):
+    assert sniff_image_type(head) is None
+
+
+def test_sniff_bmp_declared_size_larger_than_file():
+    head = bmp(size=200, declared=5000)[:SNIFF_SIZE]
+    assert sniff_image_type(head) == "bmp"  # размер файла ещё неизвестен
+    assert sniff_image_type(head, size=200) is None
+    assert sniff_image_type(head, size=5000) == "bmp"
+
+
+def upload(data: bytes, filename: str = "f.bin") -> UploadFile:
+    return UploadFile(file=io.BytesIO(data), filename=filename)
+
+
+@pytest.fixture()
+def store(tmp_path):
+    return UploadStore(tmp_path, None, max_file_bytes=1000, max_request_bytes=1500)
+
+
+def leftovers(store):
+    return sorted(p.name for p in store.directory.rglob("*") if p.is_file())
+
+
+def test_copy_accepts_image(store):
+    tmp_name, digest, ext, size = store._copy(io.BytesIO(PNG), store.budget())
+    assert (ext, size) == ("png", len(PNG))
+    with open(tmp_name, "rb") as f:
+        assert f.read() == PNG
+
+
+def test_copy_rejects_non_image(store):
+    with pytest.raises(HTTPException) as exc:
+        store._copy(io.BytesIO(b"not an image at all" * 10), store.budget())
+    assert exc.value.status_code == 415
+    assert leftovers(store) == []
+
+
+def test_copy_rejects_bmp_shorter_than_declared(store):
+    with pytest.raises(HTTPException) as exc:
+        store._copy(io.BytesIO(bmp(size=200, declared=900)), store.budget())
+    assert exc.value.status_code == 415
+    assert leftovers(store) == []
+
+
+def test_copy_accepts_bmp_matching_declared_size(store):
+    assert store._copy(io.BytesIO(bmp(size=200)), store.budget())[2] == "bmp"
+
+
+def test_copy_enforces_file_limit(store):
+    budget = store.budget()
+    with pytest.raises(HTTPException) as exc:
+        store._copy(io.BytesIO(PNG + b"\x00" * 1000), budget)
+    assert exc.value.status_code == 413
+    assert "File is larger" in exc.value.detail
+    assert budget.remaining == store.max_request_bytes
+    assert leftovers(store) == []
+
+
+def test_copy_enforces_request_limit(store):
+    budget = store.budget()
+    store._copy(io.BytesIO(PNG + b"\x00" * 800), budget)
+    assert budget.remaining == store.max_request_bytes - len(PNG) - 800
+    with pytest.raises(HTTPException) as exc:
+        store._copy(io.BytesIO(JPEG + b"\x00" * 800), budget)
+    assert exc.value.status_code == 413
+    assert "in total" in exc.value.detail
+
+
+class FakeStore(UploadStore):
+    """_place/release without the database: blobs land on disk, releases are recorded."""
+
+    released = None
+
+    def _place(self, tmp_name, digest, ext, size):
+        dest = self.directory / blob_name(digest, ext)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(tmp_name, dest)
+        return f"{UPLOADS_URL_PREFIX}{blob_name(digest, ext)}", True
+
+    def release(self, urls):
+        self.released = list(urls)
+        for url in urls:
+            self.path_for(url).unlink()
+
+
+@pytest.fixture()
+def fake_store(tmp_path):
+    return FakeStore(tmp_path, None, max_file_bytes=1000, max_request_bytes=1500)
+
+
+def test_save_images_returns_urls(fake_store):
+    cover, gallery = asyncio.run(fake_store.save_images(upload(PNG), [upload(JPEG), None, upload(b"", "")]))
+    assert cover.startswith(UPLOADS_URL_PREFIX) and cover.endswith(".png")
+    assert len(gallery) == 1 and gallery[0].endswith(".jpg")
+    assert fake_store.path_for(cover).read_bytes() == PNG
+    assert fake_store.released is None
+
+
+@pytest.mark.parametrize(
+    "rejected,status",
+    [
+        (b"<html>nope</html>" * 4, 415),
+        (JPEG + b"\x00" * 1000, 413),  # больше max_file_bytes
+        (JPEG + b"\x00" * 700, 413),  # вместе с предыдущими больше max_request_bytes
+    ],
+    ids=["not an image", "file limit", "request limit"],
+)
+def test_save_images_releases_stored_files_when_a_later_one_is_rejected(fake_store, rejected, status):
+    gallery = [upload(bmp(size=700)), upload(rejected)]
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(fake_store.save_images(upload(PNG), gallery))
+    assert exc.value.status_code == status
+    assert len(fake_store.released) == 2
+    assert leftovers(fake_store) == []